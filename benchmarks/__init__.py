@@ -0,0 +1 @@
+__all__ = ['mock_llm', 'bench_pipeline', 'bench_risk_debate', 'bench_sharding']
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Backtest replay benchmark.
+Writes synthetic reports and random-walk prices for tickers x days, records
+one pass of the agent chain with a latency-injecting mock LLM, then replays
+it from the record/replay store (no model calls) and reports ticker-days per
+second for both passes, replay misses, whether the replayed decisions match
+the recorded ones, and the PnL scores.
+Each pass runs in a fresh process, since a Pathway graph runs once.
+
+Run with: python -m benchmarks.bench_backtest --tickers 50 --days 40 --latency 0.05
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from benchmarks.mock_llm import MockLLM
+
+
+def write_history(directory: Path, num_tickers: int, num_days: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    dates = [str(d) for d in np.arange("2024-01-01", num_days, dtype="datetime64[D]")[:num_days]]
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.02, size=(num_tickers, num_days)), axis=1)
+
+    with open(directory / "prices.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "ticker", "close"])
+        for i in range(num_tickers):
+            for j, date in enumerate(dates):
+                writer.writerow([date, f"T{i:04d}", f"{closes[i, j]:.4f}"])
+
+    with open(directory / "reports.jsonl", "w") as f:
+        for i in range(num_tickers):
+            ticker = f"T{i:04d}"
+            for j, date in enumerate(dates):
+                f.write(json.dumps({
+                    "date": date,
+                    "ticker": ticker,
+                    "market_report": f"{ticker} closed at {closes[i, j]:.2f} on {date}.",
+                    "news_report": f"No major news for {ticker} on {date}.",
+                    "social_media_report": f"Sentiment on {ticker} is mixed.",
+                    "fundamentals_report": f"{ticker} trades at {15 + i % 10} times earnings.",
+                }) + "\n")
+
+
+def run_pass(directory: str, mode: str, latency: float) -> Dict[str, Any]:
+    from src.backtest import run_backtest
+
+    llm = MockLLM(latency=latency, consistency=0.8)
+    result = run_backtest(
+        Path(directory) / "reports.jsonl", llm, prices_path=Path(directory) / "prices.csv",
+        mode=mode, cache_dir=Path(directory) / "store",
+    )
+    result["llm_calls"] = llm.calls
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--days", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per LLM call when recording")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        write_history(Path(directory), args.tickers, args.days)
+        results = {}
+        for mode in ("record", "replay"):
+            with context.Pool(1, maxtasksperchild=1) as pool:
+                results[mode] = pool.apply(run_pass, (directory, mode, args.latency))
+
+    recorded, replayed = results["record"]["decisions"], results["replay"]["decisions"]
+    for mode, result in results.items():
+        print(
+            f"{mode:>7}: {result['ticker_days']} ticker-days in {result['seconds']:.1f}s "
+            f"({result['ticker_days'] / result['seconds']:.0f}/s), {result['llm_calls']} model calls, "
+            f"{result['replay_misses']} replay misses"
+        )
+    print(f"replayed decisions match recorded: {recorded == replayed}")
+    for agent, scores in results["replay"]["scores"].items():
+        print(f"{agent:>17}: " + ", ".join(f"{name}={value:.4g}" for name, value in scores.items()))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({mode: {k: v for k, v in r.items() if k != "decisions"} for mode, r in results.items()}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
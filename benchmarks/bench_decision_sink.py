@@ -0,0 +1,146 @@
+"""
+Decision sink benchmark.
+Streams `cycles` re-evaluations of a ticker universe through the output
+stage, where each cycle changes the decision of a `--change-rate` fraction
+of the tickers, and compares writing every decision as JSON lines (what the
+order system re-reads today) with the delta-only DecisionSink.
+Reports rows and bytes written, and the downstream cost of one poll: finding
+the latest decision of every ticker by re-reading the full output, versus
+reading the files added by the last cycle plus O(1) index lookups.
+Each configuration runs in a fresh process, since a Pathway graph runs once.
+
+Run with: python -m benchmarks.bench_decision_sink --tickers 5000 --cycles 20 --change-rate 0.05
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import pathway as pw
+
+DECISIONS = ("BUY", "SELL", "HOLD")
+
+
+class DecisionSchema(pw.Schema):
+    ticker: str
+    final_proposal: str
+    final_investment_decision: str
+
+
+class CycleSubject(pw.io.python.ConnectorSubject):
+    """Emits every ticker once per cycle, committing each cycle; a fraction of decisions change per cycle."""
+
+    def __init__(self, tickers: int, cycles: int, change_rate: float, seed: int = 0):
+        super().__init__()
+        self.tickers = tickers
+        self.cycles = cycles
+        self.change_rate = change_rate
+        self.seed = seed
+
+    def run(self) -> None:
+        rng = random.Random(self.seed)
+        current = [rng.choice(DECISIONS) for _ in range(self.tickers)]
+        for cycle in range(self.cycles):
+            for i in range(self.tickers):
+                if cycle and rng.random() < self.change_rate:
+                    current[i] = rng.choice([d for d in DECISIONS if d != current[i]])
+                self.next(
+                    ticker=f"T{i:05d}",
+                    final_proposal=f"FINAL TRANSACTION PROPOSAL: **{current[i]}**",
+                    final_investment_decision=(
+                        f"**DECISION: {current[i]}**\n\n**Justification:** cycle {cycle} review of T{i:05d}. "
+                        + "Weighed the plan against the risks raised in the debate. " * 3
+                    ),
+                )
+            self.commit()
+
+
+def output_bytes(path: Path) -> int:
+    """Bytes of the output files; the index is a fixed-size file rewritten in place."""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file() and f.suffix != ".idx")
+
+
+def run_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    from src.decision_sink import DecisionIndex, read_changes, write_decisions
+
+    output = Path(config["directory"]) / config["name"]
+    output.mkdir()
+    decisions = pw.io.python.read(
+        CycleSubject(config["tickers"], config["cycles"], config["change_rate"]),
+        schema=DecisionSchema, autocommit_duration_ms=None,
+    )
+    sink = None
+    if config["name"] == "full":
+        pw.io.jsonlines.write(decisions, output / "decisions.jsonl")
+    else:
+        sink = write_decisions(decisions, output, batch_size=10**6, flush_interval_ms=0, name=None)
+
+    start = time.perf_counter()
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+    result: Dict[str, Any] = {"config": config["name"], "run_seconds": time.perf_counter() - start}
+    tickers = [f"T{i:05d}" for i in range(config["tickers"])]
+
+    # One poll of the order system: the latest decision of every ticker.
+    start = time.perf_counter()
+    if sink is None:
+        latest: Dict[str, str] = {}
+        with open(output / "decisions.jsonl") as f:
+            for line in f:
+                row = json.loads(line)
+                if row["diff"] > 0:
+                    latest[row["ticker"]] = row["final_investment_decision"]
+        result["rows_written"] = sum(1 for _ in open(output / "decisions.jsonl"))
+        result["poll_rows_read"] = result["rows_written"]
+    else:
+        index = DecisionIndex(output / "latest.idx", readonly=True)
+        changes = read_changes(output, since_file=index.files - 1)
+        latest = {ticker: index.lookup(ticker)["decision"] for ticker in tickers}
+        result["rows_written"] = sink.rows_written
+        result["poll_rows_read"] = changes.num_rows
+        lookup_start = time.perf_counter()
+        for ticker in tickers:
+            index.lookup(ticker)
+        result["lookup_us"] = (time.perf_counter() - lookup_start) / len(tickers) * 1e6
+    result["poll_seconds"] = time.perf_counter() - start
+    result["tickers_seen"] = len(latest)
+    result["bytes_written"] = output_bytes(output)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--change-rate", type=float, default=0.05, help="fraction of decisions changing per cycle")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("full", "delta"):
+            config = dict(vars(args), name=name, directory=directory)
+            with context.Pool(1, maxtasksperchild=1) as pool:
+                results.append(pool.apply(run_config, (config,)))
+
+    print(f"{'config':>6} {'run s':>7} {'rows written':>13} {'MB written':>11} {'poll rows':>10} {'poll ms':>8}")
+    for r in results:
+        print(
+            f"{r['config']:>6} {r['run_seconds']:>7.2f} {r['rows_written']:>13} {r['bytes_written'] / 1e6:>11.2f} "
+            f"{r['poll_rows_read']:>10} {r['poll_seconds'] * 1000:>8.1f}"
+        )
+    delta = results[-1]
+    print(f"index lookup: {delta['lookup_us']:.1f}us per ticker, {delta['tickers_seen']} tickers")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+End-to-end pipeline benchmark.
+Streams synthetic per-ticker reports through the full agent chain with a
+latency-injecting mock LLM and reports throughput, per-ticker latency, peak RSS
+and LLM call counts for every combination of the swept parameters.
+Each configuration runs in a fresh process so peak RSS is not shared.
+
+With --deep-latency, stages run on a quick/deep model cascade and the
+escalation rate is reported as well.
+
+Run with: python -m benchmarks.bench_pipeline --tickers 10,50 --rounds 1,2 --concurrency 1,10 --prompt-batch 1,8
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import resource
+import threading
+import time
+from typing import Any, Dict, List
+
+import pathway as pw
+
+from benchmarks.mock_llm import MockLLM
+
+
+class ReportSchema(pw.Schema):
+    ticker: str
+    market_report: str
+    news_report: str
+    social_media_report: str
+    fundamentals_report: str
+
+
+class ReportSubject(pw.io.python.ConnectorSubject):
+    """Emits one synthetic report row per ticker, committing every `batch_size` rows."""
+
+    def __init__(self, num_tickers: int, batch_size: int):
+        super().__init__()
+        self.num_tickers = num_tickers
+        self.batch_size = batch_size
+        self.ingested_at: Dict[str, float] = {}
+
+    def run(self) -> None:
+        for i in range(self.num_tickers):
+            ticker = f"T{i:05d}"
+            self.ingested_at[ticker] = time.perf_counter()
+            self.next(
+                ticker=ticker,
+                market_report=f"{ticker} trades above its 50-day average on rising volume.",
+                news_report=f"{ticker} announced a new product line.",
+                social_media_report=f"Sentiment on {ticker} is mildly positive.",
+                fundamentals_report=f"{ticker} revenue grew {i % 20}% year over year.",
+            )
+            if (i + 1) % self.batch_size == 0:
+                self.commit()
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    # Imported here so that each spawned process builds its own graph.
+    from src.llm.cascade import ModelCascade
+    from src.llm.executor import create_llm_executor
+    from src.pipeline import create_investment_pipeline
+
+    llm = MockLLM(
+        latency=config["latency"],
+        distribution=config["distribution"],
+        jitter=config["jitter"],
+        response_tokens=config["response_tokens"],
+        consistency=config["consistency"],
+    )
+    deep_llm = MockLLM(
+        latency=config["deep_latency"],
+        distribution=config["distribution"],
+        jitter=config["jitter"],
+        response_tokens=config["response_tokens"],
+        seed=1,
+        consistency=1.0,
+    ) if config["deep_latency"] else None
+    cascade = ModelCascade(llm, deep_llm)
+    subject = ReportSubject(config["tickers"], config["batch_size"])
+    reports = pw.io.python.read(subject, schema=ReportSchema, autocommit_duration_ms=None)
+    decisions = create_investment_pipeline(
+        reports,
+        quick_llm=cascade,
+        num_rounds=config["rounds"],
+        risk_rounds=config["rounds"],
+        executor=create_llm_executor(max_in_flight=config["concurrency"], max_retries=0),
+        prompt_batch_size=config["prompt_batch"],
+    )
+
+    completed_at: Dict[str, float] = {}
+    lock = threading.Lock()
+    clock = time.perf_counter  # `time` is shadowed by the callback argument below
+
+    def on_change(key, row, time, is_addition):
+        if is_addition:
+            with lock:
+                completed_at.setdefault(row["ticker"], clock())
+
+    pw.io.subscribe(decisions.select(pw.this.ticker, pw.this.final_investment_decision), on_change=on_change)
+
+    start = time.perf_counter()
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+    elapsed = time.perf_counter() - start
+
+    latencies = [completed_at[t] - subject.ingested_at[t] for t in completed_at]
+    cascade_stats = cascade.stats().values()
+    quick_answers = sum(s["calls"] for s in cascade_stats)
+    escalations = sum(s["escalations"] for s in cascade_stats)
+    return {
+        **config,
+        "completed": len(completed_at),
+        "seconds": elapsed,
+        "tickers_per_sec": len(completed_at) / elapsed if elapsed else 0.0,
+        "p50_latency": percentile(latencies, 50),
+        "p99_latency": percentile(latencies, 99),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "llm_calls": llm.calls + (deep_llm.calls if deep_llm else 0),
+        "deep_calls": deep_llm.calls if deep_llm else 0,
+        "escalation_rate": escalations / quick_answers if quick_answers else 0.0,
+        "escalations_by_agent": cascade.stats(),
+        "prompt_tokens": llm.prompt_tokens,
+        "completion_tokens": llm.completion_tokens,
+    }
+
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int_list, default=[10, 50])
+    parser.add_argument("--rounds", type=int_list, default=[1, 2])
+    parser.add_argument("--concurrency", type=int_list, default=[1, 10])
+    parser.add_argument("--prompt-batch", type=int_list, default=[1], help="tickers per judge/trader/PM request")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="mean seconds per LLM call")
+    parser.add_argument("--distribution", choices=["constant", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--response-tokens", type=int, default=200)
+    parser.add_argument("--deep-latency", type=float, default=0.0, help="mean seconds per deep-model call (0 = single model)")
+    parser.add_argument("--consistency", type=float, default=0.9, help="how often the quick model follows the recommendation")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    configs = [
+        {
+            "tickers": tickers,
+            "rounds": rounds,
+            "concurrency": concurrency,
+            "prompt_batch": prompt_batch,
+            "batch_size": args.batch_size,
+            "latency": args.latency,
+            "distribution": args.distribution,
+            "jitter": args.jitter,
+            "response_tokens": args.response_tokens,
+            "deep_latency": args.deep_latency,
+            "consistency": args.consistency,
+        }
+        for tickers, rounds, concurrency, prompt_batch in itertools.product(
+            args.tickers, args.rounds, args.concurrency, args.prompt_batch
+        )
+    ]
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    print(f"{'tickers':>7} {'rounds':>6} {'conc':>5} {'batch':>5} {'tick/s':>8} {'p50 s':>7} {'p99 s':>7} {'rss MB':>7} {'calls':>6} {'deep':>5} {'esc %':>6}")
+    for config in configs:
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            result = pool.apply(run_config, (config,))
+        results.append(result)
+        print(
+            f"{result['tickers']:>7} {result['rounds']:>6} {result['concurrency']:>5} {result['prompt_batch']:>5} "
+            f"{result['tickers_per_sec']:>8.2f} {result['p50_latency']:>7.2f} {result['p99_latency']:>7.2f} "
+            f"{result['peak_rss_mb']:>7.0f} {result['llm_calls']:>6} {result['deep_calls']:>5} "
+            f"{100 * result['escalation_rate']:>6.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Prefix cache benchmark.
+Captures every prompt of one pipeline run (reports -> decision) and replays
+them against a local stand-in for an inference server with KV prefix caching:
+several replicas, each keeping an LRU of 64-character prompt blocks, whose
+time-to-first-token is a fixed overhead plus prefill time for the uncached
+part of the prompt. Requests carrying a prefix cache hint are routed to the
+replica owning that prefix; others are spread round-robin.
+
+The prompts are replayed three ways: in the former layout (role first, the
+per-ticker context after it and the volatile history in the middle), in the
+segmented layout, and in the segmented layout with cache hints. Reports the
+mean and p50 time-to-first-token and the fraction of prompt tokens served
+from the cache.
+
+Run with: python -m benchmarks.bench_prefix_cache --tickers 20 --rounds 2 --replicas 4
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import pathway as pw
+
+from benchmarks.mock_llm import MockLLM, MockLLMResponse
+
+BLOCK_CHARS = 64
+CACHE_KEY_PARAM = "prompt_cache_key"
+
+# Layouts of the debate prompts before they were split into segments.
+LEGACY_TEMPLATES = {
+    "bull_bear_debate": """
+{role_prompt}
+
+Here is the analysis:
+{analysis_summary}
+
+Conversation history:
+{debate_history}
+
+Your opponent's last argument:
+{opponent_arg}
+
+Reflections:
+{past_memory_str}
+
+Present your argument:
+""",
+    "risk_debate": """
+{role_prompt}
+
+Here is the investment plan to be debated:
+{trader_plan}
+
+Here is the debate so far:
+{debate_history}
+
+Your opponents' arguments are the most recent entries in the history above.
+Critique or support the plan from your unique perspective and respond to your colleagues.
+""",
+}
+
+
+class ReportSchema(pw.Schema):
+    ticker: str
+    market_report: str
+    news_report: str
+    social_media_report: str
+    fundamentals_report: str
+
+
+class Replica:
+    """KV cache of one server replica: an LRU of prompt block hashes."""
+
+    def __init__(self, capacity_blocks: int):
+        self.capacity = capacity_blocks
+        self.blocks: "OrderedDict[bytes, None]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def prefill(self, prompt: str) -> int:
+        """Caches every block of `prompt`; returns the number of leading characters already cached."""
+        digest = b""
+        cached = 0
+        hit = True
+        with self.lock:
+            for start in range(0, len(prompt), BLOCK_CHARS):
+                block = prompt[start:start + BLOCK_CHARS]
+                digest = hashlib.sha1(digest + block.encode("utf-8")).digest()
+                # Only whole blocks are cached, and only a cached chain counts as a hit.
+                if len(block) < BLOCK_CHARS:
+                    break
+                if hit and digest in self.blocks:
+                    self.blocks.move_to_end(digest)
+                    cached += BLOCK_CHARS
+                    continue
+                hit = False
+                self.blocks[digest] = None
+                if len(self.blocks) > self.capacity:
+                    self.blocks.popitem(last=False)
+        return cached
+
+
+class StandInServer:
+    """Local HTTP server answering `{"prompt": ..., "prompt_cache_key": ...}` like a prefix-caching LLM server."""
+
+    def __init__(self, replicas: int, capacity_blocks: int, base_ms: float, prefill_ms_per_1k: float):
+        self.replicas = [Replica(capacity_blocks) for _ in range(replicas)]
+        self.base = base_ms / 1000
+        self.prefill_per_token = prefill_ms_per_1k / 1000 / 1000
+        self.answers = MockLLM(latency=0.0)
+        self._round_robin = itertools.count()
+        self.prompt_chars = 0
+        self.cached_chars = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                content = server.handle(request["prompt"], request.get(CACHE_KEY_PARAM)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def handle(self, prompt: str, cache_key: Optional[str]) -> str:
+        if cache_key:
+            replica = self.replicas[int(cache_key[:8], 16) % len(self.replicas)]
+        else:
+            replica = self.replicas[next(self._round_robin) % len(self.replicas)]
+        cached = replica.prefill(prompt)
+        with self._lock:
+            self.prompt_chars += len(prompt)
+            self.cached_chars += cached
+        # Headers are sent once prefill is done, so the client sees them at time-to-first-token.
+        time.sleep(self.base + (len(prompt) - cached) / 4 * self.prefill_per_token)
+        return self.answers.invoke(prompt).content
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StandInClient:
+    """LLM client for StandInServer; records the time-to-first-token of every call."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.ttft: List[float] = []
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: str, **kwargs: Any) -> MockLLMResponse:
+        body = json.dumps({"prompt": str(prompt), **kwargs}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            first_token = time.perf_counter() - start
+            content = response.read().decode("utf-8")
+        with self._lock:
+            self.ttft.append(first_token)
+        return MockLLMResponse(content)
+
+
+class RecordingLLM(MockLLM):
+    """MockLLM keeping every prompt it is sent, in order."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.prompts: List[str] = []
+
+    def invoke(self, prompt: str, **kwargs: Any) -> MockLLMResponse:
+        with self._lock:
+            self.prompts.append(prompt)
+        return super().invoke(prompt)
+
+
+def capture_prompts(num_tickers: int, rounds: int, report_chars: int) -> List[str]:
+    from src.pipeline import create_investment_pipeline
+
+    def report(text: str) -> str:
+        return (text + " ") * max(1, report_chars // (len(text) + 1))
+
+    reports = pw.debug.table_from_rows(ReportSchema, [
+        (
+            f"T{i:05d}",
+            report(f"T{i:05d} trades above its 50-day average on rising volume ({i % 7} sessions)."),
+            report(f"T{i:05d} announced a new product line in segment {i % 5}."),
+            report(f"Sentiment on T{i:05d} is mildly positive, mentions up {i % 30}%."),
+            report(f"T{i:05d} revenue grew {i % 20}% year over year."),
+        )
+        for i in range(num_tickers)
+    ])
+    llm = RecordingLLM(latency=0.0, consistency=0.8)
+    decisions = create_investment_pipeline(reports, llm, num_rounds=rounds, risk_rounds=rounds)
+    pw.debug.table_to_pandas(decisions.select(pw.this.ticker, pw.this.final_investment_decision))
+    return llm.prompts
+
+
+def legacy_layout(prompt: Any) -> str:
+    template = LEGACY_TEMPLATES.get(getattr(prompt, "name", ""))
+    return template.format(**prompt.values) if template else str(prompt)
+
+
+def replay(prompts: List[Any], args: argparse.Namespace, layout: str) -> Dict[str, Any]:
+    from src.llm.prompts import prefix_cache_hints
+    from config.settings import settings
+
+    settings.PROMPT_CACHE_KEY_PARAM = CACHE_KEY_PARAM if layout == "segmented+hints" else ""
+    server = StandInServer(args.replicas, args.capacity_blocks, args.base_ms, args.prefill_ms)
+    client = StandInClient(server.url)
+    if layout == "legacy":
+        prompts = [legacy_layout(prompt) for prompt in prompts]
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            list(pool.map(lambda prompt: client.invoke(prompt, **prefix_cache_hints(prompt)), prompts))
+    finally:
+        server.close()
+
+    ttft = sorted(client.ttft)
+    return {
+        "layout": layout,
+        "requests": len(ttft),
+        "mean_ttft_ms": sum(ttft) / len(ttft) * 1000,
+        "p50_ttft_ms": ttft[len(ttft) // 2] * 1000,
+        "p95_ttft_ms": ttft[int(0.95 * (len(ttft) - 1))] * 1000,
+        "cached_fraction": server.cached_chars / server.prompt_chars,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=2, help="rounds of both debates")
+    parser.add_argument("--report-chars", type=int, default=2000, help="length of each analyst report")
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--capacity-blocks", type=int, default=20000, help="KV cache size of a replica")
+    parser.add_argument("--base-ms", type=float, default=5.0, help="fixed time-to-first-token")
+    parser.add_argument("--prefill-ms", type=float, default=50.0, help="prefill time per 1k uncached tokens")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent requests")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    prompts = capture_prompts(args.tickers, args.rounds, args.report_chars)
+    print(f"captured {len(prompts)} prompts, {sum(map(len, prompts)) // 4} tokens")
+
+    results = [replay(prompts, args, layout) for layout in ("legacy", "segmented", "segmented+hints")]
+    print(f"{'layout':>16} {'mean TTFT':>10} {'p50 TTFT':>9} {'p95 TTFT':>9} {'cached':>7}")
+    for result in results:
+        print(
+            f"{result['layout']:>16} {result['mean_ttft_ms']:>8.1f}ms {result['p50_ttft_ms']:>7.1f}ms "
+            f"{result['p95_ttft_ms']:>7.1f}ms {result['cached_fraction']:>7.1%}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
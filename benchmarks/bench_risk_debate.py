@@ -0,0 +1,52 @@
+"""
+Risk debate benchmark: sequential vs simultaneous rounds.
+Run with: python -m benchmarks.bench_risk_debate --tickers 20 --rounds 2 --latency 0.1
+"""
+
+import argparse
+import time
+
+import pathway as pw
+
+from benchmarks.mock_llm import MockLLM
+from src.agents.risk_debate import create_risk_debate_pipeline
+from src.llm.executor import create_llm_executor
+
+
+def run(num_tickers: int, num_rounds: int, latency: float, simultaneous_rounds: bool) -> dict:
+    rows = "\n".join(f"T{i} | Buy on dips, stop-loss at 90" for i in range(num_tickers))
+    input_table = pw.debug.table_from_markdown(f"ticker | trader_investment_plan\n{rows}")
+    llm = MockLLM(latency=latency)
+
+    risk_table = create_risk_debate_pipeline(
+        input_stream=input_table,
+        llm=llm,
+        num_rounds=num_rounds,
+        executor=create_llm_executor(),
+        simultaneous_rounds=simultaneous_rounds,
+    )
+
+    start = time.perf_counter()
+    pw.debug.table_to_pandas(risk_table.select(pw.this.ticker, pw.this.risk_debate_history))
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "llm_calls": llm.calls}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = {
+        mode: run(args.tickers, args.rounds, args.latency, simultaneous_rounds=mode == "simultaneous")
+        for mode in ("sequential", "simultaneous")
+    }
+    for mode, result in results.items():
+        print(f"{mode:>12}: {result['seconds']:.2f}s wall, {result['llm_calls']} LLM calls")
+    print(f"     speedup: {results['sequential']['seconds'] / results['simultaneous']['seconds']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
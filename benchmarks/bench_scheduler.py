@@ -0,0 +1,108 @@
+"""
+LLM scheduler benchmark.
+Runs the agent chain of many tickers against a mock provider that answers
+429 beyond its request rate, with every call going through invoke_llm and
+failed calls retried after an exponential backoff (like the UDF executor).
+Compares no admission control, AIMD concurrency alone, and AIMD plus an RPM
+budget matching the provider limit, and reports completed calls per second,
+429s, the final concurrency limit and the mean queue wait per stage.
+
+Run with: python -m benchmarks.bench_scheduler --tickers 30 --provider-rpm 2400 --clients 32
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks.mock_llm import MockLLM
+from src.llm.metrics import MetricsRegistry, invoke_llm
+from src.llm.scheduler import LLMScheduler
+
+# One ticker's calls in pipeline order.
+CHAIN = (
+    "Market Analyst", "News Analyst", "Social Media Analyst", "Fundamentals Analyst",
+    "Bull Analyst", "Bear Analyst", "Research Manager", "Trader",
+    "Risky Analyst", "Safe Analyst", "Neutral Analyst", "Portfolio Manager",
+)
+
+
+class Unscheduled(LLMScheduler):
+    """Baseline: admits every request immediately and never backs off."""
+
+    def _decrease(self, ticket, now) -> None:
+        pass
+
+
+def run_ticker(llm: MockLLM, scheduler: LLMScheduler, registry: MetricsRegistry, ticker: str, retries: int) -> None:
+    for agent in CHAIN:
+        for attempt in range(retries + 1):
+            try:
+                invoke_llm(llm, f"{agent} for {ticker}", agent, ticker, registry, scheduler)
+                break
+            except Exception:
+                if attempt == retries:
+                    raise
+                time.sleep(0.1 * 2**attempt)
+
+
+def run_config(name: str, scheduler: LLMScheduler, args: argparse.Namespace) -> Dict[str, Any]:
+    llm = MockLLM(latency=args.latency, requests_per_minute=args.provider_rpm)
+    registry = MetricsRegistry()
+    tickers = [f"T{i:05d}" for i in range(args.tickers)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        list(pool.map(lambda t: run_ticker(llm, scheduler, registry, t, args.retries), tickers))
+    elapsed = time.perf_counter() - start
+
+    stats = scheduler.stats()
+    completed = len(tickers) * len(CHAIN)
+    return {
+        "config": name,
+        "seconds": elapsed,
+        "calls_per_sec": completed / elapsed,
+        "provider_429s": llm.rate_limited,
+        "concurrency_limit": stats["concurrency_limit"],
+        "mean_queue_wait": stats["mean_queue_wait"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=30)
+    parser.add_argument("--clients", type=int, default=32, help="tickers processed concurrently")
+    parser.add_argument("--provider-rpm", type=int, default=2400)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per LLM call")
+    parser.add_argument("--retries", type=int, default=20)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    configs = {
+        "unscheduled": Unscheduled(requests_per_minute=0, tokens_per_minute=0, max_concurrency=10**6,
+                                   initial_concurrency=10**6, backoff=0),
+        "aimd": LLMScheduler(requests_per_minute=0, tokens_per_minute=0, max_concurrency=args.clients,
+                             initial_concurrency=args.clients),
+        "aimd+rpm": LLMScheduler(requests_per_minute=args.provider_rpm, tokens_per_minute=0,
+                                 max_concurrency=args.clients, initial_concurrency=args.clients),
+    }
+
+    results: List[Dict[str, Any]] = []
+    print(f"{'config':>12} {'seconds':>8} {'calls/s':>8} {'429s':>6} {'limit':>6}  PM wait / analyst wait")
+    for name, scheduler in configs.items():
+        result = run_config(name, scheduler, args)
+        results.append(result)
+        waits = result["mean_queue_wait"]
+        print(
+            f"{name:>12} {result['seconds']:>8.2f} {result['calls_per_sec']:>8.1f} {result['provider_429s']:>6} "
+            f"{result['concurrency_limit']:>6.1f}  {waits.get('Portfolio Manager', 0.0) * 1000:.0f} ms / "
+            f"{waits.get('Market Analyst', 0.0) * 1000:.0f} ms"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
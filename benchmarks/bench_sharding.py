@@ -0,0 +1,148 @@
+"""
+Sharded runner benchmark.
+Runs the full agent chain over synthetic tickers with 1..N worker processes
+(src.runner.run_sharded) and reports wall time, throughput and speedup, and
+checks that every stage of a ticker ran on a single worker.
+
+Run with: python -m benchmarks.bench_sharding --tickers 200 --processes 1,2,4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import pathway as pw
+
+from benchmarks.bench_pipeline import ReportSchema, int_list
+from benchmarks.mock_llm import MockLLM
+
+
+def synthetic_reports(num_tickers: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "ticker": f"T{i:05d}",
+            "market_report": f"T{i:05d} trades above its 50-day average on rising volume.",
+            "news_report": f"T{i:05d} announced a new product line.",
+            "social_media_report": f"Sentiment on T{i:05d} is mildly positive.",
+            "fundamentals_report": f"T{i:05d} revenue grew {i % 20}% year over year.",
+        }
+        for i in range(num_tickers)
+    ]
+
+
+def run_worker(config: Dict[str, Any]) -> int:
+    """Entry point of one benchmark run; relaunched once per worker process by run_sharded."""
+    from src.llm.executor import create_llm_executor
+    from src.llm.metrics import metrics
+    from src.pipeline import create_investment_pipeline
+    from src.runner import read_batched, run_sharded
+
+    completed = []
+
+    def on_change(key, row, time, is_addition):
+        if is_addition:
+            completed.append(row["ticker"])
+
+    def build():
+        llm = MockLLM(latency=config["latency"])
+        reports = read_batched(synthetic_reports(config["tickers"]), ReportSchema, config["batch_size"])
+        decisions = create_investment_pipeline(
+            reports,
+            quick_llm=llm,
+            num_rounds=config["rounds"],
+            risk_rounds=config["rounds"],
+            executor=create_llm_executor(max_in_flight=config["concurrency"], max_retries=0),
+        )
+        pw.io.subscribe(decisions.select(pw.this.ticker, pw.this.final_investment_decision), on_change=on_change)
+
+    exit_code = run_sharded(build, processes=config["processes"], monitoring_level=pw.MonitoringLevel.NONE)
+
+    # Every process logs the tickers it made LLM calls for; outputs are gathered on one process.
+    process_id = os.getenv("PATHWAY_PROCESS_ID", "0")
+    with open(config["log_path"], "a") as f:
+        for (agent, ticker), stats in metrics.snapshot().items():
+            f.write(f"{ticker}\t{process_id}\t{stats['calls']}\n")
+    if completed:
+        with open(config["done_path"], "a") as f:
+            f.write(f"{len(completed)}\n")
+    return exit_code
+
+
+def run_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {**config, "log_path": os.path.join(tmp, "calls.tsv"), "done_path": os.path.join(tmp, "done")}
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_sharding", "--worker", json.dumps(config)],
+            check=True, stderr=subprocess.DEVNULL,
+        )
+        elapsed = time.perf_counter() - start
+
+        workers_per_ticker = defaultdict(set)
+        calls = 0
+        with open(config["log_path"]) as f:
+            for line in f:
+                ticker, process_id, ticker_calls = line.rstrip("\n").split("\t")
+                workers_per_ticker[ticker].add(process_id)
+                calls += int(ticker_calls)
+        with open(config["done_path"]) as f:
+            completed = sum(int(line) for line in f)
+
+    return {
+        **{k: v for k, v in config.items() if k not in ("log_path", "done_path")},
+        "completed": completed,
+        "seconds": elapsed,
+        "tickers_per_sec": completed / elapsed if elapsed else 0.0,
+        "llm_calls": calls,
+        "tickers_split_across_workers": sum(len(w) > 1 for w in workers_per_ticker.values()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--processes", type=int_list, default=[1, 2, 4])
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4, help="in-flight LLM calls per process")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per LLM call")
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.exit(run_worker(json.loads(args.worker)))
+
+    results = []
+    baseline = None
+    print(f"{'procs':>5} {'tickers':>7} {'seconds':>8} {'tick/s':>8} {'speedup':>8} {'calls':>6} {'split':>5}")
+    for processes in args.processes:
+        result = run_config({
+            "processes": processes,
+            "tickers": args.tickers,
+            "rounds": args.rounds,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+            "latency": args.latency,
+        })
+        baseline = baseline or result["tickers_per_sec"]
+        result["speedup"] = result["tickers_per_sec"] / baseline if baseline else 0.0
+        results.append(result)
+        print(
+            f"{processes:>5} {result['completed']:>7} {result['seconds']:>8.2f} {result['tickers_per_sec']:>8.2f} "
+            f"{result['speedup']:>8.2f} {result['llm_calls']:>6} {result['tickers_split_across_workers']:>5}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Startup benchmark.
+Times cold starts in fresh interpreters (median of --repeats): loading the
+config, `python -m src --help`, importing the pipeline, building the whole
+graph (`python -m src --check`) and a complete static run on a small reports
+file. Also checks which heavy modules light imports pull in, and compares
+repeated config lookups against re-parsing the YAML on every call.
+
+Exits with status 1 when a guard fails: a light import loads a heavy module,
+or building the graph takes longer than --max-build-seconds.
+
+Run with: python -m benchmarks.bench_startup --repeats 5 --max-build-seconds 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("pathway", "pandas", "numpy", "requests", "yaml")
+
+# Modules that should start without any heavy dependency.
+LIGHT_IMPORTS = {
+    "config.settings": (),
+    "src.__main__": (),
+    "src.llm.prompts": (),
+    "src.llm.scheduler": (),
+    "src.llm.cache": (),
+    # Needs pathway and numpy, but not requests until a session is created.
+    "src.connectors.news_connector": ("pathway", "pandas", "numpy", "yaml"),
+}
+
+
+def timed(argv: List[str], env: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(argv, cwd=ROOT, env=env, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def median_time(argv: List[str], env: Dict[str, str], repeats: int) -> float:
+    return statistics.median(timed(argv, env) for _ in range(repeats))
+
+
+def heavy_imports(module: str, env: Dict[str, str]) -> List[str]:
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, check=True, stdout=subprocess.PIPE, text=True
+    ).stdout.strip()
+    return [m for m in output.split(",") if m]
+
+
+def config_lookups(calls: int) -> Dict[str, float]:
+    """Seconds per config lookup, memoized vs. re-reading and re-parsing the YAML."""
+    import yaml
+
+    from config.settings import settings
+
+    settings.api_config()
+    start = time.perf_counter()
+    for _ in range(calls):
+        settings.api_config().news_sources["newsapi"].dedup
+    memoized = (time.perf_counter() - start) / calls
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        with open(settings.API_CONFIG_PATH) as f:
+            yaml.safe_load(f)["news_sources"]["newsapi"].get("dedup", {})
+    reparsed = (time.perf_counter() - start) / calls
+    return {"memoized_us": memoized * 1e6, "reparsed_us": reparsed * 1e6}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tickers", type=int, default=10, help="tickers in the full run")
+    parser.add_argument("--max-build-seconds", type=float, default=5.0, help="guard on `python -m src --check`")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=str(ROOT), PIPELINE_PROCESSES="1")
+    python = sys.executable
+    results: Dict[str, Any] = {}
+    failures: List[str] = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        reports = Path(directory) / "reports.jsonl"
+        with open(reports, "w") as f:
+            for i in range(args.tickers):
+                ticker = f"T{i:04d}"
+                f.write(json.dumps({
+                    "ticker": ticker,
+                    "market_report": f"{ticker} trades above its 50-day average.",
+                    "news_report": f"{ticker} announced a new product line.",
+                    "social_media_report": f"Sentiment on {ticker} is mixed.",
+                    "fundamentals_report": f"{ticker} revenue grew {i % 20}% year over year.",
+                }) + "\n")
+        pipeline_args = ["--reports", str(reports), "--quick-llm", "benchmarks.mock_llm:MockLLM"]
+
+        commands = {
+            "interpreter": [python, "-c", "pass"],
+            "config": [python, "-c", "from config.settings import settings; settings.api_config()"],
+            "cli --help": [python, "-m", "src", "--help"],
+            "import pipeline": [python, "-c", "import src.pipeline"],
+            "build graph": [python, "-m", "src", "--check", *pipeline_args],
+            "full run": [python, "-m", "src", "--static", "--output", str(Path(directory) / "out.jsonl"), *pipeline_args],
+        }
+        print(f"{'cold start':>16} {'median':>8}")
+        for name, argv in commands.items():
+            results[name] = median_time(argv, env, args.repeats)
+            print(f"{name:>16} {results[name] * 1000:>6.0f}ms")
+
+        phases = json.loads(subprocess.run(
+            commands["build graph"], cwd=ROOT, env=env, check=True, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True,
+        ).stdout.strip().splitlines()[-1])
+        results["build phases"] = phases
+        print("  build phases: " + ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in phases.items()))
+
+    results["heavy imports"] = {}
+    for module, allowed in LIGHT_IMPORTS.items():
+        loaded = heavy_imports(module, env)
+        results["heavy imports"][module] = loaded
+        unexpected = [m for m in loaded if m not in allowed]
+        print(f"{module:>30}: {', '.join(loaded) or 'no heavy imports'}")
+        if unexpected:
+            failures.append(f"{module} imports {', '.join(unexpected)}")
+
+    results["config lookups"] = config_lookups(1000)
+    print(
+        f"config lookup: {results['config lookups']['memoized_us']:.2f}us memoized, "
+        f"{results['config lookups']['reparsed_us']:.0f}us re-parsing api.yaml"
+    )
+
+    if results["build graph"] > args.max_build_seconds:
+        failures.append(f"building the graph took {results['build graph']:.2f}s > {args.max_build_seconds}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Mock LLM for benchmarks
+Deterministic stand-in for a chat model. Latency is drawn from a configurable
+distribution seeded by the prompt, so a given prompt always takes the same
+time and gets the same role-aware answer.
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from typing import Iterator
+
+from src.agents.decisions import find_decision
+from src.llm.batching import REQUEST_PATTERN
+
+DECISIONS = ("BUY", "SELL", "HOLD")
+
+
+class MockLLMResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class MockRateLimitError(Exception):
+    """Raised like a provider's HTTP 429."""
+
+    status_code = 429
+
+
+class MockLLM:
+    """
+    `latency` is the mean seconds per call. `distribution` is one of
+    "constant", "uniform" (latency * [1 - jitter, 1 + jitter]) or "lognormal"
+    (median `latency`, sigma `jitter`). Responses are padded to about
+    `response_tokens` tokens. With probability `consistency` the trader and
+    portfolio manager follow the recommendation found in their prompt; otherwise
+    every decision is random. With `requests_per_minute` > 0, calls beyond that
+    rate (one second of burst) fail with MockRateLimitError, like a provider 429.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        distribution: str = "constant",
+        jitter: float = 0.0,
+        response_tokens: int = 0,
+        seed: int = 0,
+        consistency: float = 0.0,
+        requests_per_minute: int = 0,
+    ):
+        if distribution not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency = latency
+        self.distribution = distribution
+        self.jitter = jitter
+        self.response_tokens = response_tokens
+        self.seed = seed
+        self.consistency = consistency
+        self.requests_per_minute = requests_per_minute
+        self.rate_limited = 0
+        self._allowance = requests_per_minute / 60
+        self._allowance_at = time.monotonic()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha1(f"{self.seed}\x00{prompt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "little"))
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.distribution == "uniform":
+            return max(0.0, self.latency * rng.uniform(1 - self.jitter, 1 + self.jitter))
+        if self.distribution == "lognormal":
+            return self.latency * rng.lognormvariate(0.0, self.jitter)
+        return self.latency
+
+    def _check_rate_limit(self) -> None:
+        if self.requests_per_minute <= 0:
+            return
+        rate = self.requests_per_minute / 60
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(rate, self._allowance + (now - self._allowance_at) * rate)
+            self._allowance_at = now
+            if self._allowance < 1:
+                self.rate_limited += 1
+                raise MockRateLimitError("429 Too Many Requests")
+            self._allowance -= 1
+
+    def respond(self, prompt: str, rng: random.Random) -> str:
+        first_line = next((l.strip() for l in prompt.splitlines() if l.strip()), "")
+        sections = REQUEST_PATTERN.split(prompt)
+        if len(sections) > 1:
+            # Batched request: one answer per request section, same role for all.
+            numbered = zip(sections[1::2], sections[2::2])
+            return "\n\n".join(f"### ANSWER {n}\n{self.answer(first_line, body, rng)}" for n, body in numbered)
+        return self.answer(first_line, prompt, rng)
+
+    def answer(self, first_line: str, body: str, rng: random.Random) -> str:
+        decision = rng.choice(DECISIONS)
+        if "Trading Agent" in first_line or "Portfolio Manager" in first_line:
+            recommended = find_decision(body, "Recommendation")
+            if recommended != "UNKNOWN" and rng.random() < self.consistency:
+                decision = recommended
+        # Vary answers per prompt so that downstream prompts differ per ticker.
+        reference = f"(ref #{rng.randrange(10**6)})"
+        if "Research Manager" in first_line:
+            content = f"**Recommendation:** {decision}. {reference}"
+        elif "Trading Agent" in first_line:
+            content = f"Position sizing per plan {reference}.\nFINAL TRANSACTION PROPOSAL: **{decision}**"
+        elif "Portfolio Manager" in first_line:
+            content = f"**DECISION: {decision}**\n\n**Justification:** Weighed plan against risks {reference}."
+        else:
+            content = f"Response to '{first_line}' {reference}."
+        padding = max(0, self.response_tokens - len(content) // 4)
+        if padding:
+            content = f"{content}\n{'lorem ' * (padding * 4 // 6)}".rstrip()
+        return content
+
+    def stream(self, prompt: str) -> Iterator[MockLLMResponse]:
+        """Yields the answer word by word, spreading the call latency evenly over the words."""
+        self._check_rate_limit()
+        rng = self._rng(prompt)
+        latency = self.sample_latency(rng)
+        words = re.findall(r"\S+\s*", self.respond(prompt, rng))
+        emitted = 0
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += len(prompt) // 4
+        try:
+            for word in words:
+                time.sleep(latency / len(words))
+                emitted += len(word)
+                yield MockLLMResponse(word)
+        finally:
+            with self._lock:
+                self.completion_tokens += emitted // 4
+
+    def invoke(self, prompt: str) -> MockLLMResponse:
+        self._check_rate_limit()
+        rng = self._rng(prompt)
+        latency = self.sample_latency(rng)
+        content = self.respond(prompt, rng)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += len(prompt) // 4
+            self.completion_tokens += len(content) // 4
+        time.sleep(latency)
+        return MockLLMResponse(content)
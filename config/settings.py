@@ -1,23 +1,132 @@
 """
 Global Settings Manager
-Loads configuration from environment variables and YAML files
+Loads configuration from environment variables and YAML files.
+The YAML config is parsed and validated once, on first use.
 """
 
 import os
+import threading
 from pathlib import Path
-from typing import Dict, Any
-import yaml
+from typing import Any, Dict, NamedTuple, Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+
+class ConfigError(ValueError):
+    """Invalid value in a YAML config file."""
+
+
+class RateLimitConfig(NamedTuple):
+    requests_per_second: float = 1.0
+    requests_per_day: Optional[int] = None
+
+
+class DedupConfig(NamedTuple):
+    enabled: bool = True
+    threshold: float = 0.6
+    num_perm: int = 128
+    bands: int = 32
+    max_clusters: int = 50_000
+
+
+class NewsSourceConfig(NamedTuple):
+    base_url: str
+    name: str = ""
+    enabled: bool = True
+    rate_limits: RateLimitConfig = RateLimitConfig()
+    timeout: float = 10.0
+    poll_interval: float = 60.0
+    page_size: int = 100
+    dedup: DedupConfig = DedupConfig()
+
+
+class APIConfig(NamedTuple):
+    news_sources: Dict[str, NewsSourceConfig]
+
+
+def _check_type(value: Any, expected: Any, path: str) -> Any:
+    allowed = getattr(expected, "__args__", (expected,))  # Optional[int] -> (int, NoneType)
+    if float in allowed and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if (isinstance(value, bool) and bool not in allowed) or not isinstance(value, allowed):
+        raise ConfigError(f"{path}: expected {' or '.join(t.__name__ for t in allowed)}, got {value!r}")
+    return value
+
+
+def _parse_section(record: type, raw: Any, path: str, **nested: Any) -> Any:
+    """`record` built from the mapping `raw`, checking every field's type; `nested` parses sub-records."""
+    if raw is None:
+        raw = {}
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{path}: expected a mapping, got {type(raw).__name__}")
+    unknown = set(raw) - set(record._fields)
+    if unknown:
+        raise ConfigError(f"{path}: unknown keys {sorted(unknown)}")
+    missing = [f for f in record._fields if f not in raw and f not in record._field_defaults]
+    if missing:
+        raise ConfigError(f"{path}: missing keys {missing}")
+
+    values = {}
+    for field, value in raw.items():
+        if field in nested:
+            values[field] = nested[field](value, f"{path}.{field}")
+        else:
+            values[field] = _check_type(value, record.__annotations__[field], f"{path}.{field}")
+    return record(**values)
+
+
+def _parse_dedup(raw: Any, path: str) -> DedupConfig:
+    dedup = _parse_section(DedupConfig, raw, path)
+    if not 0 < dedup.threshold <= 1:
+        raise ConfigError(f"{path}.threshold: must be in (0, 1], got {dedup.threshold}")
+    if dedup.bands < 1 or dedup.num_perm % dedup.bands:
+        raise ConfigError(f"{path}: num_perm ({dedup.num_perm}) must be a multiple of bands ({dedup.bands})")
+    return dedup
+
+
+def parse_news_source(raw: Any, path: str = "news_source") -> NewsSourceConfig:
+    source = _parse_section(
+        NewsSourceConfig, raw, path,
+        rate_limits=lambda value, p: _parse_section(RateLimitConfig, value, p),
+        dedup=_parse_dedup,
+    )
+    if source.rate_limits.requests_per_second <= 0:
+        raise ConfigError(f"{path}.rate_limits.requests_per_second: must be positive")
+    if source.page_size < 1 or source.timeout <= 0 or source.poll_interval <= 0:
+        raise ConfigError(f"{path}: page_size, timeout and poll_interval must be positive")
+    return source
+
+
+def parse_api_config(raw: Any, path: str = "api.yaml") -> APIConfig:
+    """Validated APIConfig from the parsed YAML; raises ConfigError naming the offending key."""
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{path}: expected a mapping")
+    sources = raw.get("news_sources") or {}
+    if not isinstance(sources, dict):
+        raise ConfigError(f"{path}.news_sources: expected a mapping")
+    return APIConfig(news_sources={
+        name: parse_news_source(source, f"{path}.news_sources.{name}") for name, source in sources.items()
+    })
+
+
+def as_dict(config: Any) -> Any:
+    """Plain dicts of a config record, recursively."""
+    if isinstance(config, tuple) and hasattr(config, "_asdict"):
+        return {field: as_dict(value) for field, value in config._asdict().items()}
+    if isinstance(config, dict):
+        return {key: as_dict(value) for key, value in config.items()}
+    return config
+
+
 class Settings:
     """Global application settings"""
     
     # Project paths
     BASE_DIR = Path(__file__).parent.parent
     CONFIG_DIR = BASE_DIR / "config"
+    API_CONFIG_PATH = Path(os.getenv("API_CONFIG_PATH", str(CONFIG_DIR / "api.yaml")))
 
     
     # API Keys
@@ -26,13 +135,120 @@ class Settings:
     # Performance
     MAX_WORKERS = int(os.getenv("MAX_WORKERS", "10"))
     BATCH_SIZE = int(os.getenv("BATCH_SIZE", "100"))
+    PIPELINE_PROCESSES = int(os.getenv("PIPELINE_PROCESSES", "0"))  # 0 = one per core, up to MAX_WORKERS
+
+    # LLM calls
+    ASYNC_LLM = os.getenv("ASYNC_LLM", "true").lower() in ("1", "true", "yes")
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RETRY_DELAY_MS = int(os.getenv("LLM_RETRY_DELAY_MS", "1000"))
+    LLM_FULLY_ASYNC = os.getenv("LLM_FULLY_ASYNC", "false").lower() in ("1", "true", "yes")
+
+    # LLM scheduler: provider budgets (0 = unlimited) and adaptive concurrency
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+    LLM_EXPECTED_RESPONSE_TOKENS = int(os.getenv("LLM_EXPECTED_RESPONSE_TOKENS", "500"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+    LLM_TARGET_LATENCY = float(os.getenv("LLM_TARGET_LATENCY", "0"))  # seconds, 0 = back off on 429s only
+    LLM_RATE_LIMIT_BACKOFF = float(os.getenv("LLM_RATE_LIMIT_BACKOFF", "1"))
+    # Request kwarg carrying the prompt prefix cache key, e.g. "prompt_cache_key" (unset = no hint)
+    PROMPT_CACHE_KEY_PARAM = os.getenv("PROMPT_CACHE_KEY_PARAM", "")
+    # Tickers with an open position; their LLM calls are scheduled first
+    HELD_TICKERS = tuple(t.strip() for t in os.getenv("HELD_TICKERS", "").split(",") if t.strip())
+
+    # Streaming decisions for the trader and portfolio manager
+    STREAM_DECISIONS = os.getenv("STREAM_DECISIONS", "false").lower() in ("1", "true", "yes")
+    # Characters generated after the decision before stopping (-1 = full completion)
+    TRADER_STOP_AFTER = int(os.getenv("TRADER_STOP_AFTER", "-1"))
+    PORTFOLIO_MANAGER_STOP_AFTER = int(os.getenv("PORTFOLIO_MANAGER_STOP_AFTER", "-1"))
+
+    # Model cascade: agents that always use the deep model
+    DEEP_PINNED_AGENTS = tuple(
+        name.strip()
+        for name in os.getenv("DEEP_PINNED_AGENTS", "Research Manager,Portfolio Manager").split(",")
+        if name.strip()
+    )
+
+    # Multi-ticker prompt batching for the judge, trader and portfolio manager (1 = off)
+    PROMPT_BATCH_SIZE = int(os.getenv("PROMPT_BATCH_SIZE", "1"))
+    PROMPT_BATCH_WAIT_MS = int(os.getenv("PROMPT_BATCH_WAIT_MS", "50"))
+
+    # Data analyst team
+    DATA_CACHE_TTL = float(os.getenv("DATA_CACHE_TTL", "900"))
+    # Story summaries per ticker in the news report built from the NewsAPI stream
+    NEWS_REPORT_STORIES = int(os.getenv("NEWS_REPORT_STORIES", "10"))
+
+    # Debate prompts
+    DEBATE_HISTORY_TOKENS = int(os.getenv("DEBATE_HISTORY_TOKENS", "1500"))
+    DEBATE_KEEP_TURNS = int(os.getenv("DEBATE_KEEP_TURNS", "4"))
+
+    # Analyst memory
+    MEMORY_EMBEDDING_DIM = int(os.getenv("MEMORY_EMBEDDING_DIM", "512"))
+    MEMORY_TOP_K = int(os.getenv("MEMORY_TOP_K", "2"))
+
+    # Incremental re-evaluation
+    CHANGE_THRESHOLD = float(os.getenv("CHANGE_THRESHOLD", "0.0"))
+
+    # Persistence (disabled unless PERSISTENCE_DIR is set)
+    PERSISTENCE_DIR = Path(os.environ["PERSISTENCE_DIR"]) if os.getenv("PERSISTENCE_DIR") else None
+    PERSISTENCE_SNAPSHOT_MS = int(os.getenv("PERSISTENCE_SNAPSHOT_MS", "1000"))
+    # NewsAPI watermarks and daily quota usage (default: newsapi_state.json in PERSISTENCE_DIR)
+    NEWS_STATE_PATH = Path(os.environ["NEWS_STATE_PATH"]) if os.getenv("NEWS_STATE_PATH") else None
+
+    # Metrics export (disabled unless set)
+    METRICS_FILE = Path(os.environ["METRICS_FILE"]) if os.getenv("METRICS_FILE") else None
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "15"))
+
+    # LLM response cache
+    LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", str(BASE_DIR / ".cache" / "llm")))
+    LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+    LLM_CACHE_DISK_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "100000"))
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+    # Decision sink: changed decisions per Parquet file, flush interval and index size (power of two)
+    DECISION_BATCH_SIZE = int(os.getenv("DECISION_BATCH_SIZE", "1000"))
+    DECISION_FLUSH_MS = int(os.getenv("DECISION_FLUSH_MS", "1000"))
+    DECISION_INDEX_SLOTS = int(os.getenv("DECISION_INDEX_SLOTS", "65536"))
+
+    # Backtest record/replay store of LLM answers
+    BACKTEST_CACHE_DIR = Path(os.getenv("BACKTEST_CACHE_DIR", str(BASE_DIR / ".cache" / "backtest")))
     
+    _api_config: Optional[APIConfig] = None
+    _api_config_lock = threading.Lock()
+
+    @classmethod
+    def api_config(cls) -> APIConfig:
+        """Validated API configuration, read from API_CONFIG_PATH on first use"""
+        if cls._api_config is None:
+            with cls._api_config_lock:
+                if cls._api_config is None:
+                    import yaml
+
+                    with open(cls.API_CONFIG_PATH, 'r') as f:
+                        cls._api_config = parse_api_config(yaml.safe_load(f), cls.API_CONFIG_PATH.name)
+        return cls._api_config
+
     @classmethod
     def load_api_config(cls) -> Dict[str, Any]:
-        """Load API configuration from YAML"""
-        config_path = cls.CONFIG_DIR / "api.yaml"
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+        """API configuration as plain dicts, with defaults filled in"""
+        return as_dict(cls.api_config())
+
+    @classmethod
+    def reload(cls) -> None:
+        """Forget the parsed YAML config; the next access reads it again"""
+        with cls._api_config_lock:
+            cls._api_config = None
+
+    @staticmethod
+    def process_count() -> int:
+        """Number of Pathway processes in the current run (1 outside a sharded run)"""
+        return int(os.getenv("PATHWAY_PROCESSES", "1"))
+
+    @staticmethod
+    def process_id() -> int:
+        """Index of the current Pathway process (0 outside a sharded run)"""
+        return int(os.getenv("PATHWAY_PROCESS_ID", "0"))
 
 
 
@@ -0,0 +1,162 @@
+"""
+Pipeline Entry Point
+Builds the whole agent pipeline on a reports file and runs it, sharded over
+worker processes (see src.runner), writing the decisions as JSON lines and,
+with --decisions-dir, the changed decisions to a DecisionSink (Parquet files
+plus a latest-decision index, see src.decision_sink). With --news-queries,
+the news reports are built from the NewsAPI stream instead (see
+src.agents.news_analyst).
+
+Models are given as `module:attribute` specs naming a model object or a
+zero-argument factory (e.g. a class), imported only when the pipeline is built.
+Arguments and config/api.yaml are validated before Pathway is imported, so
+mistakes fail fast and `--help` / `--print-config` return immediately.
+
+Run with:
+    python -m src --reports reports.jsonl --output decisions.jsonl --quick-llm mymodels:quick --deep-llm mymodels:deep
+"""
+
+import argparse
+import csv
+import importlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+from config.settings import ConfigError, as_dict, settings
+
+
+def load_object(spec: str) -> Any:
+    """The object named by `module:attribute`, called first if it is a class or a model factory."""
+    module_name, _, attribute = spec.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Expected module:attribute, got {spec!r}")
+    obj = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        obj = getattr(obj, part)
+    if isinstance(obj, type) or (callable(obj) and not hasattr(obj, "invoke")):
+        obj = obj()
+    return obj
+
+
+def parse_queries(spec: str) -> Dict[str, str]:
+    """{ticker: query} of `AAPL=Apple,MSFT=Microsoft`; a bare ticker is its own query."""
+    queries = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        ticker, _, query = item.partition("=")
+        queries[ticker.strip()] = query.strip() or ticker.strip()
+    if not queries:
+        raise argparse.ArgumentTypeError("expected TICKER=query,...")
+    return queries
+
+
+def report_rows(path: Path, columns: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    """`columns` of each row of a CSV or JSON lines file, or of every file in a directory."""
+    paths = sorted(p for p in path.iterdir() if p.is_file()) if path.is_dir() else [path]
+    for file_path in paths:
+        with open(file_path, newline="") as f:
+            rows = csv.DictReader(f) if path.suffix == ".csv" else map(json.loads, filter(str.strip, f))
+            for row in rows:
+                yield {column: row[column] for column in columns}
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--reports", type=Path, help="CSV or JSON lines file (or directory) of per-ticker reports")
+    parser.add_argument("--output", type=Path, default=Path("decisions.jsonl"))
+    parser.add_argument("--decisions-dir", type=Path, help="also write changed decisions and the latest-decision index here")
+    parser.add_argument(
+        "--news-queries", type=parse_queries, help="TICKER=query,... to build the news reports from NewsAPI"
+    )
+    parser.add_argument("--quick-llm", help="module:attribute of the quick model")
+    parser.add_argument("--deep-llm", help="module:attribute of the deep model (default: the quick model)")
+    parser.add_argument(
+        "--static", action="store_true",
+        help="read the reports once, in Settings.BATCH_SIZE batches, and stop instead of watching",
+    )
+    parser.add_argument("--rounds", type=int, default=1, help="bull/bear debate rounds")
+    parser.add_argument("--risk-rounds", type=int, default=1)
+    parser.add_argument("--processes", type=int, help="worker processes (default: Settings.PIPELINE_PROCESSES)")
+    parser.add_argument("--prompt-batch", type=int, help="tickers per judge/trader/PM request")
+    parser.add_argument("--stream-decisions", action="store_true", default=None)
+    parser.add_argument("--check", action="store_true", help="build the pipeline, report startup timings and exit")
+    parser.add_argument("--print-config", action="store_true", help="print the validated config and exit")
+    args = parser.parse_args(argv)
+    if not args.print_config and (args.reports is None or args.quick_llm is None):
+        parser.error("--reports and --quick-llm are required")
+    return args
+
+
+def build(args: argparse.Namespace, timings: Dict[str, float]) -> None:
+    """Builds the graph: reports -> agent chain -> JSON lines sink."""
+    start = time.perf_counter()
+    import pathway as pw
+
+    from src.connectors.news_connector import read_news
+    from src.decision_sink import write_decisions
+    from src.llm.executor import create_llm_executor
+    from src.llm.metrics import start_exporters
+    from src.pipeline import ReportSchema, create_investment_pipeline
+    from src.runner import read_batched
+    timings["import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    quick_llm = load_object(args.quick_llm)
+    deep_llm = load_object(args.deep_llm) if args.deep_llm else None
+    timings["models"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if args.static:
+        # Ingested in Settings.BATCH_SIZE batches (see src.runner).
+        reports = read_batched(report_rows(args.reports, ReportSchema.column_names()), ReportSchema, name="reports")
+    else:
+        reader = pw.io.csv.read if args.reports.suffix == ".csv" else pw.io.jsonlines.read
+        reports = reader(args.reports, schema=ReportSchema, mode="streaming", name="reports")
+    decisions = create_investment_pipeline(
+        reports, quick_llm, deep_llm,
+        num_rounds=args.rounds, risk_rounds=args.risk_rounds, executor=create_llm_executor(),
+        prompt_batch_size=args.prompt_batch, stream_decisions=args.stream_decisions,
+        news=read_news(args.news_queries) if args.news_queries else None,
+    )
+    pw.io.jsonlines.write(
+        decisions.select(pw.this.ticker, pw.this.final_proposal, pw.this.final_investment_decision), args.output
+    )
+    if args.decisions_dir:
+        write_decisions(decisions, args.decisions_dir)
+    start_exporters()
+    timings["build"] = time.perf_counter() - start
+
+
+def main(argv: Optional[list] = None) -> int:
+    started = time.perf_counter()
+    args = parse_args(argv)
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    try:
+        config = settings.api_config()
+    except (OSError, ConfigError) as e:
+        print(f"Invalid configuration: {e}", file=sys.stderr)
+        return 2
+    timings["config"] = time.perf_counter() - start
+    if args.print_config:
+        print(json.dumps(as_dict(config), indent=2))
+        return 0
+
+    if args.check:
+        build(args, timings)
+        timings["total"] = time.perf_counter() - started
+        print(json.dumps(timings))
+        return 0
+
+    from src.runner import run_sharded
+
+    return run_sharded(lambda: build(args, timings), processes=args.processes)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
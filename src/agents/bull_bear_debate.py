@@ -1,6 +1,11 @@
 import pathway as pw
-from typing import Any, Callable
-import pandas as pd
+from typing import Any, Optional, Sequence, Tuple
+
+from src.agents.change_detection import ChangeDetector
+from src.agents.debate_context import DebateContext, render_transcript
+from src.agents.debate_engine import Participant, create_debate_udf
+from src.llm.cascade import as_cascade, is_empty
+from src.llm.prompts import PromptTemplate
 
 BULL_PROMPT = """
 ROLE: Bull Analyst.
@@ -23,11 +28,20 @@ Social Media Sentiment: {social_media_report}
 Fundamentals Report: {fundamentals_report}
 """
 
-PROMPT_TEMPLATE = """
+# Static heading, then the per-ticker analysis, then the speaker's role and the
+# volatile debate state, so every turn on a ticker shares the prefix up to the analysis.
+PROMPT_TEMPLATE = PromptTemplate(
+    name="bull_bear_debate",
+    prefix="""
+Here is the analysis:
+""",
+    context="""{analysis_summary}
+""",
+    suffix="""
 {role_prompt}
 
-Here is the analysis:
-{analysis_summary}
+Reflections: 
+{past_memory_str}
 
 Conversation history:
 {debate_history}
@@ -35,11 +49,9 @@ Conversation history:
 Your opponent's last argument: 
 {opponent_arg}
 
-Reflections: 
-{past_memory_str}
-
 Present your argument:
-"""
+""",
+)
 
 
 def create_bull_bear_debate_pipeline(
@@ -48,54 +60,91 @@ def create_bull_bear_debate_pipeline(
     bull_memory: Any,
     bear_memory: Any,
     num_rounds: int = 1,
+    executor: Any = None,
+    debate_context: Optional[DebateContext] = None,
+    change_detector: Optional[ChangeDetector] = None,
+    participants: Optional[Sequence[Tuple[str, str, Any]]] = None,
+    emit_turns: bool = False,
 ) -> pw.Table:
     """
     Constructs a multi-round debate pipeline. 
     Its dependencies are pre-configured.
+    All rounds run in one debate node (see src.agents.debate_engine) that adds
+    `debate_history`; with `emit_turns`, the individual turns are kept in `debate_turns`.
+    `participants` are (name, role prompt, memory) triples, by default the bull
+    and the bear. Each prompt only sees the history that `debate_context` renders
+    under its token budget. A memory's `version` (see VectorMemory) joins the keys
+    of its stored turns, so they are asked again once the memory learns more.
+    With a `change_detector`, turns whose inputs did not materially change
+    since the ticker's last run are re-emitted without an LLM call.
+    `llm` may be a ModelCascade; empty turns are then re-asked on the deep model.
     """
 
-    def create_analyst_udf(agent_name: str, role_prompt: str, memory_system: Any):
-        @pw.udf
-        def run_analyst(analysis_summary: str, debate_history: str) -> str:
+    debate_context = debate_context or DebateContext()
+    cascade = as_cascade(llm)
+    if participants is None:
+        participants = [("Bull Analyst", BULL_PROMPT, bull_memory), ("Bear Analyst", BEAR_PROMPT, bear_memory)]
+
+    def create_analyst(agent_name: str, role_prompt: str, memory_system: Any) -> Participant:
+        template = PROMPT_TEMPLATE.bind(role_prompt=role_prompt)
+
+        def argue(ticker: str, analysis_summary: str, debate_turns: Tuple[str, ...]) -> str:
             past_memories = memory_system.get_memories(analysis_summary)
             past_memory_str = "\n".join([mem.get("recommendation", "") for mem in past_memories])
 
-            history_lines = debate_history.strip().split('\n')
-            opponent_arg = history_lines[-1] if history_lines else None
+            opponent_arg = debate_turns[-1] if debate_turns else None
 
-            prompt = PROMPT_TEMPLATE.format(
-                role_prompt=role_prompt,
+            prompt = template.render(
                 analysis_summary=analysis_summary,
-                debate_history=debate_history or "(EMPTY)",
+                debate_history=debate_context.render(debate_turns[:-1]) or "(EMPTY)",
                 opponent_arg=opponent_arg or "(NONE)",
                 past_memory_str=past_memory_str or "(NONE)",
             )
-
-            response = llm.invoke(prompt).content.strip()
-            new_argument = f"{agent_name}: {response}"
-            new_debate_history = f"{debate_history}\n{new_argument}".strip()
-            return new_debate_history
-        return run_analyst
+            return cascade.run(agent_name, ticker, prompt, escalate=is_empty)
+
+        cache_key = (cascade.cache_key(agent_name), PROMPT_TEMPLATE.source, role_prompt, debate_context.cache_key())
+        # Memories without a `version` are assumed not to change while the pipeline runs.
+        version = None if getattr(memory_system, "version", None) is None else (lambda: memory_system.version)
+        return Participant(agent_name, argue, cache_key, version)
+
+    @pw.udf(deterministic=True)
+    def build_analysis_summary(
+        market_report: str, news_report: str, social_media_report: str, fundamentals_report: str
+    ) -> str:
+        return ANALYSIS_SUMMARY.format(
+            market_report=market_report,
+            news_report=news_report,
+            social_media_report=social_media_report,
+            fundamentals_report=fundamentals_report,
+        )
+
+    debate = create_debate_udf(
+        "Bull/Bear",
+        [create_analyst(*participant) for participant in participants],
+        num_rounds=num_rounds,
+        executor=executor,
+        change_detector=change_detector,
+        emit_turns=emit_turns,
+    )
 
     bull_bear_table = input_stream.with_columns(
-        analysis_summary=ANALYSIS_SUMMARY.format(
-            market_report=pw.this.market_report,
-            news_report=pw.this.news_report,
-            social_media_report=pw.this.social_media_report,
-            fundamentals_report=pw.this.fundamentals_report,
+        analysis_summary=build_analysis_summary(
+            pw.this.market_report,
+            pw.this.news_report,
+            pw.this.social_media_report,
+            pw.this.fundamentals_report,
         ),
-        debate_history="",
     )
-    
-    bull_udf = create_analyst_udf("Bull Analyst", BULL_PROMPT, bull_memory)
-    bear_udf = create_analyst_udf("Bear Analyst", BEAR_PROMPT, bear_memory)
 
-    debated_data = bull_bear_table
-    for _ in range(num_rounds):
-        debated_data = debated_data.with_columns(debate_history=bull_udf(pw.this.analysis_summary, pw.this.debate_history))
-        debated_data = debated_data.with_columns(debate_history=bear_udf(pw.this.analysis_summary, pw.this.debate_history))
+    if not emit_turns:
+        return bull_bear_table.with_columns(
+            debate_history=debate(pw.this.ticker, pw.this.analysis_summary)
+        ).await_futures()
 
-    return debated_data
+    debated_data = bull_bear_table.with_columns(
+        debate_turns=debate(pw.this.ticker, pw.this.analysis_summary)
+    ).await_futures()
+    return debated_data.with_columns(debate_history=pw.apply(render_transcript, pw.this.debate_turns))
 
 
 
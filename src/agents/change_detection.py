@@ -0,0 +1,100 @@
+import hashlib
+import re
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from config.settings import settings
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a stage input."""
+    return " ".join(WORD_PATTERN.findall((text or "").lower()))
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ChangeRule:
+    """
+    Decides whether a stage input changed materially.
+    The change is 1 - Jaccard similarity of the normalized word sets; inputs whose
+    change is at or below `min_change` count as unchanged. With the default of 0.0
+    only inputs that normalize to the same text are treated as unchanged.
+    """
+
+    def __init__(self, min_change: Optional[float] = None, normalize: Callable[[str], str] = normalize_text):
+        self.min_change = settings.CHANGE_THRESHOLD if min_change is None else min_change
+        self.normalize = normalize
+
+    def change(self, previous_words: FrozenSet[str], words: FrozenSet[str]) -> float:
+        union = previous_words | words
+        if not union:
+            return 0.0
+        return 1.0 - len(previous_words & words) / len(union)
+
+    def is_material(self, previous_words: FrozenSet[str], words: FrozenSet[str]) -> bool:
+        return self.change(previous_words, words) > self.min_change
+
+
+class ChangeDetector:
+    """
+    Remembers, per (stage, ticker), the inputs a stage last ran on and what it produced.
+
+    `context` is the stage's main input (analysis summary, debate history, plan) and is
+    compared with the ChangeRule; `state` (e.g. the debate turns so far) must match
+    exactly. When neither changed, the previous output is re-emitted without an LLM call.
+    """
+
+    def __init__(self, rule: Optional[ChangeRule] = None):
+        self.rule = rule or ChangeRule()
+        self.skipped = 0
+        self.evaluated = 0
+        self._entries: Dict[Tuple[str, str], Tuple[str, FrozenSet[str], str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def run(self, stage: str, ticker: str, context: str, compute: Callable[[], Any], state: str = "") -> Any:
+        normalized = self.rule.normalize(context)
+        context_fp = fingerprint(normalized)
+        state_fp = fingerprint(state)
+        words = frozenset(normalized.split()) if self.rule.min_change > 0 else frozenset()
+        key = (stage, ticker)
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            previous_fp, previous_words, previous_state_fp, output = entry
+            if previous_state_fp == state_fp and (
+                previous_fp == context_fp
+                or (self.rule.min_change > 0 and not self.rule.is_material(previous_words, words))
+            ):
+                with self._lock:
+                    self.skipped += 1
+                return output
+
+        output = compute()
+        with self._lock:
+            self.evaluated += 1
+            self._entries[key] = (context_fp, words, state_fp, output)
+        return output
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"evaluated": self.evaluated, "skipped": self.skipped, "entries": len(self._entries)}
+
+
+def run_stage(
+    change_detector: Optional[ChangeDetector],
+    stage: str,
+    ticker: str,
+    context: str,
+    compute: Callable[[], Any],
+    state: str = "",
+) -> Any:
+    """Runs `compute`, or re-emits its previous result when a detector says nothing changed."""
+    if change_detector is None:
+        return compute()
+    return change_detector.run(stage, ticker, context, compute, state=state)
@@ -0,0 +1,170 @@
+import pathway as pw
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from config.settings import settings
+from src.llm.executor import create_llm_executor, executor_capacity, llm_udf
+from src.llm.metrics import invoke_llm
+from src.llm.prompts import PromptTemplate
+
+
+MARKET_PROMPT = """
+ROLE: Market Analyst.
+GOAL: Summarize the price action and technical picture of a stock.
+FOCUS: trend, momentum, volatility, volume and key support/resistance levels.
+"""
+
+NEWS_PROMPT = """
+ROLE: News Analyst.
+GOAL: Summarize recent news relevant to a stock.
+FOCUS: company events, macro and sector news, and their likely impact on the price.
+"""
+
+SOCIAL_MEDIA_PROMPT = """
+ROLE: Social Media Analyst.
+GOAL: Gauge public sentiment around a stock.
+FOCUS: overall sentiment, shifts in tone, and notable discussions or influencers.
+"""
+
+FUNDAMENTALS_PROMPT = """
+ROLE: Fundamentals Analyst.
+GOAL: Assess the financial health and valuation of a company.
+FOCUS: revenue and earnings trends, margins, balance sheet, cash flow and valuation multiples.
+"""
+
+# (prefix, context, suffix) of the analyst prompts. The role is bound when each
+# analyst's template is built (see analyst_template), so its prompts share a static prefix.
+PROMPT_SEGMENTS = (
+    """
+{role_prompt}
+""",
+    """
+Ticker: {ticker}
+
+Raw data:
+{raw_data}
+""",
+    """
+Write a concise report for the research team:
+""",
+)
+
+# report column -> (agent name, role prompt, data sources it reads)
+ANALYSTS: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "market_report": ("Market Analyst", MARKET_PROMPT, ("market_data",)),
+    "news_report": ("News Analyst", NEWS_PROMPT, ("news",)),
+    "social_media_report": ("Social Media Analyst", SOCIAL_MEDIA_PROMPT, ("social_media",)),
+    "fundamentals_report": ("Fundamentals Analyst", FUNDAMENTALS_PROMPT, ("fundamentals", "market_data")),
+}
+
+
+def analyst_template(role_prompt: str) -> PromptTemplate:
+    return PromptTemplate(*PROMPT_SEGMENTS, name="data_analyst", role_prompt=role_prompt)
+
+
+class DataSource:
+    """
+    A raw data fetcher, `fetch(ticker) -> str`.
+    Sources with `per_ticker=False` (e.g. a macro overview) are fetched once for all tickers.
+    """
+
+    def __init__(self, fetch: Callable[[str], str], per_ticker: bool = True, ttl: Optional[float] = None):
+        self.fetch = fetch
+        self.per_ticker = per_ticker
+        self.ttl = settings.DATA_CACHE_TTL if ttl is None else ttl
+
+
+class SourceCache:
+    """
+    Per-source fetch cache shared by all analysts and tickers.
+    Concurrent requests for the same (source, ticker) wait for a single fetch.
+    """
+
+    def __init__(self, sources: Dict[str, DataSource]):
+        self.sources = sources
+        self.fetches = 0
+        self.hits = 0
+        self._entries: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        self._in_flight: Dict[Tuple[str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source_name: str, ticker: str) -> str:
+        source = self.sources.get(source_name)
+        if source is None:
+            return "(NO DATA)"
+        key = (source_name, ticker if source.per_ticker else "")
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() - entry[0] < source.ttl:
+                    self.hits += 1
+                    return entry[1]
+                waiter = self._in_flight.get(key)
+                if waiter is None:
+                    self._in_flight[key] = threading.Event()
+                    self.fetches += 1
+                    break
+            waiter.wait()
+
+        try:
+            data = source.fetch(ticker)
+            with self._lock:
+                self._entries[key] = (time.monotonic(), data)
+            return data
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"fetches": self.fetches, "hits": self.hits, "entries": len(self._entries)}
+
+
+def create_data_analyst_team_pipeline(
+    input_stream: pw.Table,
+    llm: Any,
+    data_sources: Union[Dict[str, DataSource], SourceCache],
+    executor: Any = None,
+) -> pw.Table:
+    """
+    Constructs a Pathway pipeline where the Market, News, Social Media and
+    Fundamentals analysts write their reports for each ticker in parallel.
+    Produces the report columns consumed by create_bull_bear_debate_pipeline.
+    """
+
+    if executor is None:
+        executor = create_llm_executor()
+    source_cache = data_sources if isinstance(data_sources, SourceCache) else SourceCache(data_sources)
+    # Every in-flight team call runs all its analysts at once.
+    pool = ThreadPoolExecutor(
+        max_workers=len(ANALYSTS) * executor_capacity(executor), thread_name_prefix="run_data_analyst"
+    )
+    templates = {
+        agent_name: analyst_template(role_prompt) for agent_name, role_prompt, _ in ANALYSTS.values()
+    }
+
+    def run_analyst(agent_name: str, role_prompt: str, source_names: Tuple[str, ...], ticker: str) -> str:
+        raw_data = "\n\n".join(
+            f"[{source_name}]\n{source_cache.get(source_name, ticker)}" for source_name in source_names
+        )
+        prompt = templates[agent_name].render(ticker=ticker, raw_data=raw_data)
+        return invoke_llm(llm, prompt, agent_name, ticker)
+
+    # Not cached across restarts: the reports depend on data fetched inside the call, not only on the ticker.
+    @llm_udf(executor)
+    def run_analyst_team(ticker: str) -> tuple[str, ...]:
+        futures = [
+            pool.submit(run_analyst, agent_name, role_prompt, source_names, ticker)
+            for agent_name, role_prompt, source_names in ANALYSTS.values()
+        ]
+        return tuple(future.result() for future in futures)
+
+    reports_table = input_stream.with_columns(analyst_reports=run_analyst_team(pw.this.ticker)).await_futures()
+    reports_table = reports_table.with_columns(
+        **{column: pw.this.analyst_reports[i] for i, column in enumerate(ANALYSTS)}
+    ).without(pw.this.analyst_reports)
+
+    return reports_table
@@ -0,0 +1,140 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Sequence, Tuple
+
+from config.settings import settings
+from src.llm.cache import model_name
+from src.llm.metrics import invoke_llm
+
+
+SUMMARY_PROMPT = """
+ROLE: Debate Scribe.
+GOAL: Keep a compact running summary of an investment debate.
+TASK: Merge the new turns into the existing summary. Keep each participant's strongest points and any figures they cite. Answer with the updated summary only, in at most {max_words} words.
+
+Existing summary:
+{summary}
+
+New turns:
+{new_turns}
+"""
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def clip_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[: max(max_chars - 3, 0)].rstrip() + "..."
+
+
+def append_turn(turns: Sequence[str], agent_name: str, response: str) -> Tuple[str, ...]:
+    return tuple(turns) + (f"{agent_name}: {response}",)
+
+
+def render_transcript(turns: Sequence[str]) -> str:
+    """Full transcript, as consumed by the judge and portfolio manager."""
+    return "\n".join(turns)
+
+
+class DebateContext:
+    """
+    Renders the debate history shown to the next speaker under a token budget.
+
+    The last `keep_last_turns` turns are kept verbatim; everything older is folded
+    into a rolling summary of at most `summary_tokens`. Summaries are cached by a
+    hash chain over the turns, so each new turn only folds the turns that aged out
+    since the previous render instead of re-summarizing the whole debate. The
+    summary is clipped to the budget left by the recent turns only when rendered,
+    so the cached summaries do not depend on the length of the recent turns.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        keep_last_turns: Optional[int] = None,
+        summary_llm: Any = None,
+        cache_size: int = 4096,
+        summary_tokens: Optional[int] = None,
+    ):
+        self.token_budget = token_budget or settings.DEBATE_HISTORY_TOKENS
+        self.summary_tokens = summary_tokens or self.token_budget // 2
+        self.keep_last_turns = max(1, keep_last_turns or settings.DEBATE_KEEP_TURNS)
+        self.summary_llm = summary_llm
+        self.cache_size = cache_size
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cache_key(self) -> Tuple[Any, ...]:
+        """Settings that shape the rendered history, for UDF cache keys."""
+        summarizer = model_name(self.summary_llm) if self.summary_llm is not None else None
+        return self.token_budget, self.keep_last_turns, self.summary_tokens, summarizer
+
+    def render(self, turns: Sequence[str]) -> str:
+        if not turns:
+            return ""
+
+        recent = list(turns[-self.keep_last_turns:])
+        while len(recent) > 1 and estimate_tokens("\n".join(recent)) > self.token_budget:
+            recent.pop(0)
+        older = turns[: len(turns) - len(recent)]
+
+        recent_text = clip_to_tokens("\n".join(recent), self.token_budget)
+        if not older:
+            return recent_text
+
+        summary_budget = max(self.token_budget - estimate_tokens(recent_text), self.token_budget // 4)
+        summary = clip_to_tokens(self.summarize(older), summary_budget)
+        return f"[Summary of earlier turns]\n{summary}\n[Most recent turns]\n{recent_text}"
+
+    def summarize(self, turns: Sequence[str]) -> str:
+        chain = []
+        digest = b""
+        for turn in turns:
+            digest = hashlib.sha1(digest + turn.encode("utf-8")).digest()
+            chain.append(digest.hex())
+
+        # Resume from the longest prefix we already summarized.
+        with self._lock:
+            done, summary = 0, ""
+            for i in range(len(chain), 0, -1):
+                cached = self._summaries.get(chain[i - 1])
+                if cached is not None:
+                    self._summaries.move_to_end(chain[i - 1])
+                    done, summary = i, cached
+                    break
+        if done == len(turns):
+            return summary
+
+        summary = self.fold(summary, turns[done:], self.summary_tokens)
+        with self._lock:
+            self._summaries[chain[-1]] = summary
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def fold(self, summary: str, new_turns: Sequence[str], max_tokens: int) -> str:
+        """Merges `new_turns` into `summary`; uses the LLM when one is configured."""
+        if self.summary_llm is not None:
+            prompt = SUMMARY_PROMPT.format(
+                max_words=max_tokens * 3 // 4,
+                summary=summary or "(EMPTY)",
+                new_turns="\n".join(new_turns),
+            )
+            return invoke_llm(self.summary_llm, prompt, "Debate Scribe")
+
+        # Extractive fallback: the opening sentence of each turn, oldest lines dropped first.
+        lines = summary.splitlines() if summary else []
+        for turn in new_turns:
+            first_sentence = turn.split(". ")[0].splitlines()[0]
+            lines.append(clip_to_tokens(first_sentence, max(max_tokens // 8, 16)))
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
@@ -0,0 +1,124 @@
+"""
+Debate Engine
+Runs all rounds of a multi-agent debate for a row inside a single UDF, so a
+debate adds one graph node and one output column whatever the number of
+rounds. The bull/bear and risk debates are lists of participants on top of it.
+
+With persistence (see src.persistence), every completed turn is stored keyed
+by its inputs (participant, ticker, topic and the turns before it), so a
+debate interrupted by a crash resumes from its last completed turn. Participants
+whose answers depend on state that changes while running (e.g. a memory) give a
+`version`, which joins the turn's key; their whole debate is not stored.
+The executor's timeout and retries apply to each turn's LLM call, not to the
+whole debate (see split_call_limits).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, NamedTuple, Optional, Sequence, Tuple
+
+from src.agents.change_detection import ChangeDetector, run_stage
+from src.agents.debate_context import append_turn, render_transcript
+from src.llm.executor import create_llm_executor, executor_capacity, llm_udf, split_call_limits, udf_cache
+
+
+class Participant(NamedTuple):
+    """
+    A debater: `respond(ticker, topic, turns)` returns its next argument.
+    `cache_key` holds what else shapes the argument (models, prompt template, role),
+    and `version()` the current version of mutable state it reads, such as a memory.
+    """
+
+    name: str
+    respond: Callable[[str, str, Tuple[str, ...]], str]
+    cache_key: Tuple[Any, ...] = ()
+    version: Optional[Callable[[], Any]] = None
+
+
+def create_debate_udf(
+    name: str,
+    participants: Sequence[Participant],
+    num_rounds: int = 1,
+    executor: Any = None,
+    change_detector: Optional[ChangeDetector] = None,
+    simultaneous: bool = False,
+    emit_turns: bool = False,
+) -> Any:
+    """
+    UDF `(ticker, topic)` running `num_rounds` rounds in which every participant speaks once.
+    Returns the rendered transcript, or the tuple of turns with `emit_turns`.
+
+    Participants speak in order, each seeing the turns before it. With `simultaneous`,
+    they answer the history as of the previous round concurrently and their turns are
+    appended in participant order. With a `change_detector`, turns (or rounds) whose
+    inputs did not materially change since the ticker's last run are re-emitted
+    without an LLM call.
+    """
+    participants = tuple(participants)
+    by_name = {participant.name: participant for participant in participants}
+    cache_name = name.lower().replace(" ", "_").replace("/", "_") + "_debate"
+    participant_keys = tuple((participant.name, participant.cache_key) for participant in participants)
+    if executor is None:
+        executor = create_llm_executor()
+    workers = len(participants) * executor_capacity(executor)
+    executor, limit_call = split_call_limits(executor, workers)
+    pool = None
+    if simultaneous:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}_round")
+
+    def respond_versioned(
+        participant_name: str, version: Any, ticker: str, topic: str, turns: Tuple[str, ...]
+    ) -> str:
+        return limit_call(lambda: by_name[participant_name].respond(ticker, topic, turns))
+
+    # Completed turns are stored by their inputs, so a rerun after a crash skips them.
+    respond_versioned = udf_cache(cache_name + "_turns", participant_keys).wrap_sync(respond_versioned)
+
+    def respond(participant_name: str, ticker: str, topic: str, turns: Tuple[str, ...]) -> str:
+        version = by_name[participant_name].version
+        return respond_versioned(participant_name, version and version(), ticker, topic, turns)
+
+    def speak(participant: Participant, ticker: str, topic: str, turns: Tuple[str, ...]) -> Tuple[str, ...]:
+        return run_stage(
+            change_detector, f"{participant.name} turn {len(turns)}", ticker, topic,
+            lambda: append_turn(turns, participant.name, respond(participant.name, ticker, topic, turns)),
+            state=render_transcript(turns),
+        )
+
+    def debate_round(ticker: str, topic: str, turns: Tuple[str, ...]) -> Tuple[str, ...]:
+        def run_round() -> Tuple[str, ...]:
+            futures = [pool.submit(respond, p.name, ticker, topic, turns) for p in participants]
+            round_turns = turns
+            for participant, future in zip(participants, futures):
+                round_turns = append_turn(round_turns, participant.name, future.result())
+            return round_turns
+
+        return run_stage(
+            change_detector, f"{name} round turn {len(turns)}", ticker, topic, run_round,
+            state=render_transcript(turns),
+        )
+
+    def run_debate(ticker: str, topic: str) -> Tuple[str, ...]:
+        turns: Tuple[str, ...] = ()
+        for _ in range(num_rounds):
+            if simultaneous:
+                turns = debate_round(ticker, topic, turns)
+            else:
+                for participant in participants:
+                    turns = speak(participant, ticker, topic, turns)
+        return turns
+
+    debate_key = (num_rounds, simultaneous, emit_turns, participant_keys)
+    if any(participant.version for participant in participants):
+        cache_name = None  # (ticker, topic) does not determine the debate; turns are still stored
+    if emit_turns:
+        @llm_udf(executor, cache_name=cache_name, cache_key=debate_key)
+        def debate_turns(ticker: str, topic: str) -> tuple[str, ...]:
+            return run_debate(ticker, topic)
+
+        return debate_turns
+
+    @llm_udf(executor, cache_name=cache_name, cache_key=debate_key)
+    def debate_transcript(ticker: str, topic: str) -> str:
+        return render_transcript(run_debate(ticker, topic))
+
+    return debate_transcript
@@ -0,0 +1,18 @@
+import re
+
+
+DECISION_PATTERN = re.compile(r"\b(BUY|SELL|HOLD)\b")
+
+
+def find_decision(text: str, label: str) -> str:
+    """
+    BUY, SELL or HOLD from the first line mentioning `label` (e.g. "Recommendation"),
+    else the only decision word in the text, else UNKNOWN.
+    """
+    for line in text.splitlines():
+        if label.lower() in line.lower():
+            match = DECISION_PATTERN.search(line.upper())
+            if match:
+                return match.group(1)
+    decisions = set(DECISION_PATTERN.findall(text))
+    return decisions.pop() if len(decisions) == 1 else "UNKNOWN"
@@ -1,9 +1,17 @@
 import pathway as pw
-from typing import Any, Callable
-import pandas as pd
+from typing import Any, Callable, Optional
 
+from src.agents.change_detection import ChangeDetector, run_stage
+from src.agents.decisions import find_decision
+from src.llm.batching import PromptBatcher
+from src.llm.cascade import as_cascade
+from src.llm.executor import llm_udf
+from src.llm.prompts import PromptTemplate
 
-JUDGE_PROMPT = """
+
+JUDGE_PROMPT = PromptTemplate(
+    name="research_manager",
+    prefix="""
 ROLE: Research Manager.
 GOAL: Overseeing the debate between Bull and Bear Analysts and critically evaluating them before making a definitive decision.
 TASK: 
@@ -12,24 +20,54 @@ TASK:
 3.  **Develop a Detailed Investment Plan**: Provide a detailed investment plan for a trader. Include your rationale, specific price targets (if applicable), stop-loss levels, and strategic actions based on the debate and your final recommendation.
 
 Here is the full debate history:
-{debate_history}
-"""
+""",
+    context="""{debate_history}
+""",
+)
+
+
+def parse_recommendation(judge_plan: str) -> str:
+    return find_decision(judge_plan, "Recommendation")
 
 
 def create_judge_pipeline(
     input_stream: pw.Table,
     llm: Any,
+    executor: Any = None,
+    change_detector: Optional[ChangeDetector] = None,
+    prompt_batch_size: Optional[int] = None,
 ) -> pw.Table:
-    """Constructs the judgment pipeline using its pre-configured LLM."""
+    """
+    Constructs the judgment pipeline using its pre-configured LLM.
+    With `prompt_batch_size` > 1 (default Settings.PROMPT_BATCH_SIZE), concurrent
+    judgments for different tickers are packed into one LLM request.
+    `llm` may be a ModelCascade; unless the Research Manager is pinned to the deep
+    model, verdicts without a clear recommendation are re-asked on it.
+    """
 
-    @pw.udf
-    def run_judge(debate_history: str) -> str:
-        prompt = JUDGE_PROMPT.format(debate_history=debate_history)
-        response = llm.invoke(prompt).content.strip()
-        return response
+    cascade = as_cascade(llm)
+    batcher = PromptBatcher(
+        cascade.llm_for("Research Manager"), "Research Manager", JUDGE_PROMPT.prefix,
+        max_batch=prompt_batch_size,
+    )
+
+    @llm_udf(
+        executor, cache_name="research_manager",
+        cache_key=(cascade.cache_key("Research Manager"), JUDGE_PROMPT.source, batcher.max_batch),
+    )
+    def run_judge(ticker: str, debate_history: str) -> str:
+        def judge() -> str:
+            prompt = JUDGE_PROMPT.render(debate_history=debate_history)
+            response = cascade.run(
+                "Research Manager", ticker, prompt,
+                escalate=lambda answer: parse_recommendation(answer) == "UNKNOWN",
+                first_call=lambda: batcher.invoke(ticker, prompt),
+            )
+            return response
+        return run_stage(change_detector, "Research Manager", ticker, debate_history, judge)
     
     judge_table = input_stream.with_columns(
-        judge_investment_plan=run_judge(pw.this.debate_history)
-    )
+        judge_investment_plan=run_judge(pw.this.ticker, pw.this.debate_history)
+    ).await_futures()
     
     return judge_table
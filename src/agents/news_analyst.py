@@ -0,0 +1,82 @@
+"""
+News Analyst
+Turns the NewsAPI stream (see src.connectors.news_connector.read_news) into a
+per-ticker `news_report`. Each story cluster is summarized once, however many
+syndicated copies and tickers it has, and the summary is fanned out to every
+ticker the story is mapped to.
+"""
+
+from typing import Any, Optional, Tuple
+
+import pathway as pw
+
+from config.settings import settings
+from src.connectors.news_connector import fan_out_stories, group_stories
+from src.llm.cascade import as_cascade, is_empty
+from src.llm.executor import llm_udf
+from src.llm.prompts import PromptTemplate
+
+
+STORY_PROMPT = PromptTemplate(
+    name="news_story",
+    prefix="""
+ROLE: News Analyst.
+GOAL: Summarize one news story for the research team.
+TASK: In at most three sentences, state what happened and its likely impact on the companies involved.
+""",
+    context="""
+Headline: {title}
+{description}
+{content}
+""",
+)
+
+
+def render_news_report(stories: Tuple[Tuple[str, str, str], ...], max_stories: int) -> str:
+    """The latest `max_stories` of the (published_at, title, summary) entries, newest first."""
+    latest = sorted(stories, reverse=True)[:max_stories]
+    return "\n\n".join(f"[{published_at}] {title}\n{summary}" for published_at, title, summary in latest)
+
+
+def create_news_report_pipeline(
+    news: pw.Table,
+    llm: Any,
+    executor: Any = None,
+    max_stories: Optional[int] = None,
+) -> pw.Table:
+    """
+    (`ticker`, `news_report`) from a read_news table: the summaries of the latest
+    `max_stories` stories (default Settings.NEWS_REPORT_STORIES) mapped to each ticker.
+    `llm` may be a ModelCascade; empty summaries are then re-asked on the deep model.
+    """
+    cascade = as_cascade(llm)
+    max_stories = max_stories or settings.NEWS_REPORT_STORIES
+
+    @llm_udf(executor, cache_name="news_story", cache_key=(cascade.cache_key("News Analyst"), STORY_PROMPT.source))
+    def summarize_story(title: str, description: str, content: str) -> str:
+        prompt = STORY_PROMPT.render(title=title, description=description, content=content)
+        return cascade.run("News Analyst", "", prompt, escalate=is_empty)
+
+    summaries = group_stories(news).select(
+        pw.this.cluster_id,
+        pw.this.title,
+        pw.this.published_at,
+        story_summary=summarize_story(pw.this.title, pw.this.description, pw.this.content),
+    ).await_futures()
+    per_ticker = fan_out_stories(summaries, news).select(
+        pw.this.ticker, story=pw.make_tuple(pw.this.published_at, pw.this.title, pw.this.story_summary)
+    )
+    return per_ticker.groupby(pw.this.ticker).reduce(
+        pw.this.ticker,
+        news_report=pw.apply_with_type(
+            lambda stories: render_news_report(stories, max_stories), str, pw.reducers.sorted_tuple(pw.this.story)
+        ),
+    )
+
+
+def with_news_reports(reports: pw.Table, news_reports: pw.Table) -> pw.Table:
+    """`reports` with `news_report` replaced by the ticker's report from `news_reports`, where it has one."""
+    return reports.join_left(news_reports, pw.left.ticker == pw.right.ticker, id=pw.left.id).select(
+        *pw.left.without("news_report"),
+        news_report=pw.coalesce(pw.right.news_report, pw.left.news_report),
+    )
@@ -1,8 +1,19 @@
 import pathway as pw
-from typing import Any
+from typing import Any, Optional
 
+from config.settings import settings
+from src.agents.change_detection import ChangeDetector, run_stage
+from src.agents.decisions import find_decision
+from src.llm.batching import PromptBatcher
+from src.llm.cascade import as_cascade
+from src.llm.executor import llm_udf
+from src.llm.prompts import PromptTemplate
+from src.llm.streaming import DIRECTIVE_MARKER, stream_decision
 
-PORTFOLIO_MANAGER_PROMPT = """
+
+PORTFOLIO_MANAGER_PROMPT = PromptTemplate(
+    name="portfolio_manager",
+    prefix="""
 ROLE: Portfolio Manager
 GOAL: Your decision is final. You are accountable for the profit and loss.
 TASK:
@@ -12,37 +23,83 @@ TASK:
 4.  **Justify the Decision**: Provide a concise, clear justification for your decision, explaining how you weighed the investment plan against the identified risks.
 ---
 Trader's Investment Plan:
-{trader_plan}
-
+""",
+    context="""{trader_plan}
+""",
+    suffix="""
 Risk Debate History:
 {risk_debate}
-"""
+""",
+)
+
+
+def parse_decision(final_decision: str) -> str:
+    return find_decision(final_decision, "Decision")
 
 
 def create_portfolio_manager_pipeline(
     input_stream: pw.Table,
     llm: Any,
+    executor: Any = None,
+    change_detector: Optional[ChangeDetector] = None,
+    prompt_batch_size: Optional[int] = None,
+    stream: Optional[bool] = None,
+    stop_after: Optional[int] = None,
 ) -> pw.Table:
     """
     Constructs a Pathway pipeline where a Portfolio Manager makes a final
     trade decision based on a proposed trader's plan and a risk debate.
+    With `prompt_batch_size` > 1, concurrent decisions are packed into one LLM request;
+    batched answers without a BUY/SELL/HOLD directive are retried individually.
+    `llm` may be a ModelCascade; unless the Portfolio Manager is pinned to the deep
+    model, answers without a clear directive are re-asked on it.
+    With `stream` (default Settings.STREAM_DECISIONS), individual requests are streamed
+    and the directive is published to src.llm.streaming.decisions as soon as it appears;
+    generation stops `stop_after` characters later, enough for the justification
+    (Settings.PORTFOLIO_MANAGER_STOP_AFTER, -1 = never).
     """
 
-    @pw.udf
-    def run_portfolio_manager(trader_plan: str, risk_debate: str) -> str:
-        prompt = PORTFOLIO_MANAGER_PROMPT.format(
-            trader_plan=trader_plan,
-            risk_debate=risk_debate
-        )
-        response = llm.invoke(prompt).content.strip()
-        return response
+    cascade = as_cascade(llm)
+    manager_llm = cascade.llm_for("Portfolio Manager")
+    stream = settings.STREAM_DECISIONS if stream is None else stream
+    stop_after = settings.PORTFOLIO_MANAGER_STOP_AFTER if stop_after is None else stop_after
+    batcher = PromptBatcher(
+        manager_llm, "Portfolio Manager", PORTFOLIO_MANAGER_PROMPT.prefix,
+        max_batch=prompt_batch_size, validate=lambda answer: parse_decision(answer) != "UNKNOWN",
+        single_call=(
+            lambda ticker, prompt: stream_decision(
+                manager_llm, prompt, "Portfolio Manager", ticker, DIRECTIVE_MARKER, stop_after
+            )
+        ) if stream else None,
+    )
+
+    @llm_udf(
+        executor, cache_name="portfolio_manager",
+        cache_key=(
+            cascade.cache_key("Portfolio Manager"), PORTFOLIO_MANAGER_PROMPT.source, batcher.max_batch, stream, stop_after
+        ),
+    )
+    def run_portfolio_manager(ticker: str, trader_plan: str, risk_debate: str) -> str:
+        def decide() -> str:
+            prompt = PORTFOLIO_MANAGER_PROMPT.render(
+                trader_plan=trader_plan,
+                risk_debate=risk_debate
+            )
+            response = cascade.run(
+                "Portfolio Manager", ticker, prompt,
+                escalate=lambda answer: parse_decision(answer) == "UNKNOWN",
+                first_call=lambda: batcher.invoke(ticker, prompt),
+            )
+            return response
+        return run_stage(change_detector, "Portfolio Manager", ticker, trader_plan, decide, state=risk_debate)
 
     portfolio_manager_table = input_stream.with_columns(
         final_investment_decision=run_portfolio_manager(
+            pw.this.ticker,
             pw.this.trader_plan,
             pw.this.risk_debate
         )
-    )
+    ).await_futures()
 
     return portfolio_manager_table
 
@@ -1,5 +1,11 @@
 import pathway as pw
-from typing import Any
+from typing import Any, Optional, Sequence, Tuple
+
+from src.agents.change_detection import ChangeDetector
+from src.agents.debate_context import DebateContext, render_transcript
+from src.agents.debate_engine import Participant, create_debate_udf
+from src.llm.cascade import as_cascade, is_empty
+from src.llm.prompts import PromptTemplate
 
 
 RISKY_PROMPT = """
@@ -20,69 +26,98 @@ GOAL: Provide a balanced, data-driven perspective.
 FOCUS: Objectively weigh the potential rewards presented by the Risky Analyst against the potential downsides raised by the Safe Analyst. Act as a mediator and seek a logical middle ground.
 """
 
-PROMPT_TEMPLATE = """
-{role_prompt}
-
+# Static heading, then the per-ticker plan, then the speaker's role and the debate,
+# so every turn on a ticker shares the prefix up to the plan.
+PROMPT_TEMPLATE = PromptTemplate(
+    name="risk_debate",
+    prefix="""
 Here is the investment plan to be debated:
-{trader_plan}
+""",
+    context="""{trader_plan}
+""",
+    suffix="""
+{role_prompt}
 
 Here is the debate so far:
 {debate_history}
 
 Your opponents' arguments are the most recent entries in the history above.
 Critique or support the plan from your unique perspective and respond to your colleagues.
-"""
+""",
+)
+
+
+ANALYSTS = (
+    ("Risky Analyst", RISKY_PROMPT),
+    ("Safe Analyst", SAFE_PROMPT),
+    ("Neutral Analyst", NEUTRAL_PROMPT),
+)
 
 
 def create_risk_debate_pipeline(
     input_stream: pw.Table,
     llm: Any,
     num_rounds: int = 1,
+    executor: Any = None,
+    debate_context: Optional[DebateContext] = None,
+    simultaneous_rounds: bool = False,
+    change_detector: Optional[ChangeDetector] = None,
+    participants: Optional[Sequence[Tuple[str, str]]] = None,
+    emit_turns: bool = False,
 ) -> pw.Table:
     """
     Constructs a Pathway pipeline that simulates a multi-round risk debate
-    between Risky, Safe, and Neutral analysts.
+    between Risky, Safe, and Neutral analysts (or the (name, role prompt) pairs
+    in `participants`).
+    All rounds run in one debate node (see src.agents.debate_engine) that adds
+    `risk_debate_history`; with `emit_turns`, the individual turns are kept in
+    `risk_debate_turns`. Each prompt only sees the history that `debate_context`
+    renders under its token budget.
+    With `simultaneous_rounds`, the analysts answer the history as of the
+    previous round concurrently and their turns are appended in a fixed order.
+    With a `change_detector`, turns whose inputs did not materially change
+    since the ticker's last run are re-emitted without an LLM call.
+    `llm` may be a ModelCascade; empty turns are then re-asked on the deep model.
     """
 
-    def create_risk_analyst_udf(agent_name: str, role_prompt: str, llm_client: Any):
-        @pw.udf
-        def run_risk_analyst(trader_plan: str, debate_history: str) -> str:
-            """Generates an argument for one analyst and appends it to the history."""
+    debate_context = debate_context or DebateContext()
+    cascade = as_cascade(llm)
+
+    def create_risk_analyst(agent_name: str, role_prompt: str) -> Participant:
+        template = PROMPT_TEMPLATE.bind(role_prompt=role_prompt)
 
-            prompt = PROMPT_TEMPLATE.format(
-                role_prompt=role_prompt,
+        def respond(ticker: str, trader_plan: str, debate_turns: Tuple[str, ...]) -> str:
+            prompt = template.render(
                 trader_plan=trader_plan,
-                debate_history=debate_history or "(EMPTY)",
+                debate_history=debate_context.render(debate_turns) or "(EMPTY)",
             )
+            return cascade.run(agent_name, ticker, prompt, escalate=is_empty)
+
+        cache_key = (cascade.cache_key(agent_name), PROMPT_TEMPLATE.source, role_prompt, debate_context.cache_key())
+        return Participant(agent_name, respond, cache_key)
+
+    debate = create_debate_udf(
+        "Risk",
+        [create_risk_analyst(*participant) for participant in (participants or ANALYSTS)],
+        num_rounds=num_rounds,
+        executor=executor,
+        change_detector=change_detector,
+        simultaneous=simultaneous_rounds,
+        emit_turns=emit_turns,
+    )
 
-            response = llm_client.invoke(prompt).content.strip()
-            new_argument = f"{agent_name}: {response}"
-            new_debate_history = f"{debate_history}\n{new_argument}".strip()
-            return new_debate_history
-        
-        return run_risk_analyst
+    if not emit_turns:
+        return input_stream.with_columns(
+            risk_debate_history=debate(pw.this.ticker, pw.this.trader_investment_plan)
+        ).await_futures()
 
     risk_debate_data = input_stream.with_columns(
-        risk_debate_history="",
+        risk_debate_turns=debate(pw.this.ticker, pw.this.trader_investment_plan)
+    ).await_futures()
+    return risk_debate_data.with_columns(
+        risk_debate_history=pw.apply(render_transcript, pw.this.risk_debate_turns)
     )
 
-    risky_udf = create_risk_analyst_udf("Risky Analyst", RISKY_PROMPT, llm)
-    safe_udf = create_risk_analyst_udf("Safe Analyst", SAFE_PROMPT, llm)
-    neutral_udf = create_risk_analyst_udf("Neutral Analyst", NEUTRAL_PROMPT, llm)
-
-    for _ in range(num_rounds):
-        risk_debate_data = risk_debate_data.with_columns(
-            risk_debate_history=risky_udf(pw.this.trader_investment_plan, pw.this.risk_debate_history)
-        )
-        risk_debate_data = risk_debate_data.with_columns(
-            risk_debate_history=safe_udf(pw.this.trader_investment_plan, pw.this.risk_debate_history)
-        )
-        risk_debate_data = risk_debate_data.with_columns(
-            risk_debate_history=neutral_udf(pw.this.trader_investment_plan, pw.this.risk_debate_history)
-        )
-
-    return risk_debate_data
-
 
 # # --- Example Usage Block ---
 # if __name__ == "__main__":
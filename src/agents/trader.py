@@ -1,7 +1,18 @@
 import pathway as pw
-from typing import Any
-
-TRADER_PROMPT = """
+from typing import Any, Optional
+
+from config.settings import settings
+from src.agents.change_detection import ChangeDetector, run_stage
+from src.agents.judge import parse_recommendation
+from src.llm.batching import PromptBatcher
+from src.llm.cascade import as_cascade
+from src.llm.executor import llm_udf
+from src.llm.prompts import PromptTemplate
+from src.llm.streaming import PROPOSAL_MARKER, stream_decision
+
+TRADER_PROMPT = PromptTemplate(
+    name="trader",
+    prefix="""
 ROLE: A decisive and action-oriented Trading Agent.
 GOAL: Translate a high-level investment plan into a concrete, actionable trading proposal.
 
@@ -12,42 +23,75 @@ TASK:
     FINAL TRANSACTION PROPOSAL: **BUY**, **SELL**, or **HOLD**.
 ---
 Proposed Investment Plan:
-{investment_plan}
-"""
+""",
+    context="""{investment_plan}
+""",
+)
+
+
+def parse_final_proposal(trader_plan: str) -> str:
+    """BUY, SELL or HOLD after "FINAL TRANSACTION PROPOSAL:", the same marker streaming stops on."""
+    match = PROPOSAL_MARKER.search(trader_plan)
+    return match.group(1) if match else "UNKNOWN"
+
 
 def create_trader_pipeline(
     input_stream: pw.Table,
     llm: Any,
+    executor: Any = None,
+    change_detector: Optional[ChangeDetector] = None,
+    prompt_batch_size: Optional[int] = None,
+    stream: Optional[bool] = None,
+    stop_after: Optional[int] = None,
 ) -> pw.Table:
     """
     Constructs a Pathway pipeline where a Trader Agent creates a specific
     trading plan and extracts a final BUY/SELL/HOLD proposal.
+    With `prompt_batch_size` > 1, concurrent plans are packed into one LLM request;
+    batched answers without a proposal line are retried individually.
+    `llm` may be a ModelCascade; a quick-model plan is then re-asked on the deep
+    model when its proposal is UNKNOWN or contradicts the research manager's verdict.
+    With `stream` (default Settings.STREAM_DECISIONS), individual requests are streamed
+    and the proposal is published to src.llm.streaming.decisions as soon as it appears;
+    generation stops `stop_after` characters later (Settings.TRADER_STOP_AFTER, -1 = never).
     """
 
-    @pw.udf
-    def run_trader_agent(plan: str) -> str:
-        prompt = TRADER_PROMPT.format(investment_plan=plan)
-        response = llm.invoke(prompt).content.strip()
-        return response
-
-    @pw.udf
-    def extract_final_proposal(trader_plan: str) -> str:
-        marker = "FINAL TRANSACTION PROPOSAL:"
-        try:
-            proposal_line = next(line for line in trader_plan.splitlines() if marker in line)
-            if "**BUY**" in proposal_line:
-                return "BUY"
-            if "**SELL**" in proposal_line:
-                return "SELL"
-            if "**HOLD**" in proposal_line:
-                return "HOLD"
-        except StopIteration:
-            pass
-        return "UNKNOWN"
+    cascade = as_cascade(llm)
+    trader_llm = cascade.llm_for("Trader")
+    stream = settings.STREAM_DECISIONS if stream is None else stream
+    stop_after = settings.TRADER_STOP_AFTER if stop_after is None else stop_after
+    batcher = PromptBatcher(
+        trader_llm, "Trader", TRADER_PROMPT.prefix, max_batch=prompt_batch_size,
+        validate=lambda answer: parse_final_proposal(answer) != "UNKNOWN",
+        single_call=(
+            lambda ticker, prompt: stream_decision(trader_llm, prompt, "Trader", ticker, PROPOSAL_MARKER, stop_after)
+        ) if stream else None,
+    )
+
+    @llm_udf(
+        executor, cache_name="trader",
+        cache_key=(cascade.cache_key("Trader"), TRADER_PROMPT.source, batcher.max_batch, stream, stop_after),
+    )
+    def run_trader_agent(ticker: str, plan: str) -> str:
+        def trade() -> str:
+            prompt = TRADER_PROMPT.render(investment_plan=plan)
+            verdict = parse_recommendation(plan)
+
+            def ambiguous(answer: str) -> bool:
+                proposal = parse_final_proposal(answer)
+                return proposal == "UNKNOWN" or (verdict != "UNKNOWN" and proposal != verdict)
+
+            response = cascade.run(
+                "Trader", ticker, prompt, escalate=ambiguous, first_call=lambda: batcher.invoke(ticker, prompt),
+            )
+            return response
+        return run_stage(change_detector, "Trader", ticker, plan, trade)
 
     trader_table = input_stream.with_columns(
-        trader_investment_plan=run_trader_agent(pw.this.research_team_plan),
-        final_proposal=extract_final_proposal(pw.this.trader_investment_plan)
+        trader_investment_plan=run_trader_agent(pw.this.ticker, pw.this.research_team_plan),
+    ).await_futures()
+    trader_table = trader_table.with_columns(
+        final_proposal=pw.apply(parse_final_proposal, pw.this.trader_investment_plan)
     )
 
     return trader_table
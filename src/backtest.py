@@ -0,0 +1,254 @@
+"""
+Backtest / Replay
+Replays timestamped historical reports through the agent chain as one static
+batch and scores the decisions against a local price file.
+
+LLM answers come from a record/replay store (a CachedLLM that never expires):
+a `record` run calls the live models once and stores every answer, and a
+`replay` run answers from the store only (cache-only, no model calls), so
+repeated evaluations of thousands of ticker-days take minutes.
+
+Reports are CSV or JSON lines with `date`, `ticker` and the four analyst
+reports; prices are CSV with `date`, `ticker`, `close`. Dates are ISO strings.
+
+Run a replay with:
+    python -m src.backtest --reports reports.jsonl --prices prices.csv --quick-model gpt-4o-mini --deep-model o1
+"""
+
+import argparse
+import csv
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pathway as pw
+
+from config.settings import settings
+from src.agents.portfolio_manager import parse_decision
+from src.llm.cache import CachedLLM, model_name
+from src.llm.executor import create_llm_executor
+from src.pipeline import create_investment_pipeline
+
+MODES = ("live", "record", "replay")
+POSITIONS = {"BUY": 1.0, "SELL": -1.0}
+
+
+class HistoricalReportSchema(pw.Schema):
+    date: str
+    ticker: str
+    market_report: str
+    news_report: str
+    social_media_report: str
+    fundamentals_report: str
+
+
+class ReplayMiss:
+    """Answer for a prompt that was not recorded."""
+
+    content = ""
+
+
+class OfflineModel:
+    """Placeholder for the recorded model in replay mode; only its name is used (cache key)."""
+
+    def __init__(self, name: str):
+        self.model_name = name
+
+    def invoke(self, prompt: str, *args, **kwargs) -> Any:
+        raise RuntimeError(f"{self.model_name} is not available in replay mode")
+
+
+class ReplayLLM(CachedLLM):
+    """Cache-only CachedLLM: recorded prompts are answered, others get an empty answer and are counted."""
+
+    def __init__(self, name: str, cache_dir: Optional[Path] = None):
+        super().__init__(OfflineModel(name), cache_dir=cache_dir, max_disk_entries=2**62, ttl=0)
+
+    def invoke(self, prompt: str, *args, **kwargs) -> Any:
+        response = self.peek(prompt)
+        if response is not None:
+            return response
+        with self._lock:
+            self.misses += 1
+        return ReplayMiss()
+
+
+def replay_store(llm: Union[str, Any], mode: str, cache_dir: Optional[Path] = None) -> Any:
+    """
+    `llm` for `mode`: unchanged for "live", recorded for "record", or replayed
+    from the store for "replay" (where `llm` may be just the model name).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown backtest mode: {mode}")
+    cache_dir = Path(cache_dir or settings.BACKTEST_CACHE_DIR)
+    if mode == "record":
+        return CachedLLM(llm, cache_dir=cache_dir, max_disk_entries=2**62, ttl=0)
+    if mode == "replay":
+        return ReplayLLM(llm if isinstance(llm, str) else model_name(llm), cache_dir)
+    return llm
+
+
+def read_reports(path: Path) -> pw.Table:
+    """Historical reports as a static table, read in one go."""
+    path = Path(path)
+    if path.suffix == ".csv":
+        return pw.io.csv.read(path, schema=HistoricalReportSchema, mode="static", name="backtest_reports")
+    return pw.io.jsonlines.read(path, schema=HistoricalReportSchema, mode="static", name="backtest_reports")
+
+
+def load_prices(path: Path) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(tickers, dates, closes) sorted by ticker, then date."""
+    with open(path, newline="") as f:
+        rows = [(row["ticker"], row["date"], float(row["close"])) for row in csv.DictReader(f)]
+    tickers = np.array([r[0] for r in rows], dtype=str)
+    dates = np.array([r[1] for r in rows], dtype=str)
+    closes = np.array([r[2] for r in rows], dtype=np.float64)
+    order = np.lexsort((dates, tickers))
+    return tickers[order], dates[order], closes[order]
+
+
+def score_decisions(
+    tickers: np.ndarray,
+    dates: np.ndarray,
+    decisions: np.ndarray,
+    prices: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    horizon: int = 1,
+) -> Dict[str, float]:
+    """
+    Scores BUY (+1) / SELL (-1) / other (flat) decisions taken at the close of their
+    date over the next `horizon` trading days of the same ticker.
+    The portfolio return of a date is the mean return of the positions opened on it;
+    drawdown is measured on the compounded equity curve of those returns.
+    """
+    price_tickers, price_dates, closes = prices
+    # A space sorts below every ticker character, so the joined keys keep (ticker, date) order.
+    keys = np.char.add(np.char.add(price_tickers, " "), price_dates)
+    wanted = np.char.add(np.char.add(tickers.astype(str), " "), dates.astype(str))
+
+    if len(keys) == 0:
+        priced = np.zeros(len(wanted), dtype=bool)
+        returns = np.zeros(len(wanted))
+    else:
+        index = np.clip(np.searchsorted(keys, wanted), 0, len(keys) - 1)
+        future = np.clip(index + horizon, 0, len(keys) - 1)
+        priced = (keys[index] == wanted) & (index + horizon < len(keys)) & (price_tickers[future] == tickers)
+        returns = np.where(priced, closes[future] / closes[index] - 1.0, 0.0)
+
+    positions = np.select([decisions == "BUY", decisions == "SELL"], [POSITIONS["BUY"], POSITIONS["SELL"]], 0.0)
+    active = priced & (positions != 0)
+    pnl = np.where(active, positions * returns, 0.0)
+    trades = int(active.sum())
+    hits = int((active & (pnl > 0)).sum())
+
+    trade_dates, day = np.unique(dates[active], return_inverse=True)
+    daily = np.bincount(day, weights=pnl[active]) / np.maximum(np.bincount(day), 1) if trades else np.zeros(0)
+    equity = np.cumprod(1.0 + daily)
+    drawdown = 1.0 - equity / np.maximum.accumulate(equity) if equity.size else np.zeros(1)
+
+    return {
+        "decisions": int(len(decisions)),
+        "priced": int(priced.sum()),
+        "trades": trades,
+        "hit_rate": hits / trades if trades else 0.0,
+        "mean_trade_return": float(pnl[active].mean()) if trades else 0.0,
+        "total_return": float(equity[-1] - 1.0) if equity.size else 0.0,
+        "max_drawdown": float(drawdown.max()),
+        "trading_days": int(len(trade_dates)),
+    }
+
+
+def run_backtest(
+    reports_path: Path,
+    quick_llm: Union[str, Any],
+    deep_llm: Union[str, Any, None] = None,
+    prices_path: Optional[Path] = None,
+    mode: str = "replay",
+    cache_dir: Optional[Path] = None,
+    horizon: int = 1,
+    max_in_flight: Optional[int] = None,
+    **pipeline_kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Runs the pipeline over every report and returns the decisions per (ticker, date),
+    their scores against `prices_path` for the trader (`final_proposal`) and the
+    portfolio manager (`final_investment_decision`), and the replay misses.
+    Prompt batching and streamed decisions are turned off: batches depend on which
+    tickers arrive together and a stream may stop early, so neither replays byte for byte.
+    """
+    pipeline_kwargs.update(prompt_batch_size=1, stream_decisions=False)
+    quick = replay_store(quick_llm, mode, cache_dir)
+    deep = replay_store(deep_llm, mode, cache_dir) if deep_llm is not None else None
+    executor = create_llm_executor(max_in_flight=max_in_flight or settings.LLM_MAX_CONCURRENCY, max_retries=0)
+
+    decisions = create_investment_pipeline(read_reports(reports_path), quick, deep, executor=executor, **pipeline_kwargs)
+    latest: Dict[Tuple[str, str], Dict[str, str]] = {}
+    lock = threading.Lock()
+
+    def on_change(key, row, time, is_addition):
+        if is_addition:
+            with lock:
+                latest[(row["ticker"], row["date"])] = {
+                    "ticker": row["ticker"],
+                    "date": row["date"],
+                    "final_proposal": row["final_proposal"],
+                    "final_investment_decision": row["final_investment_decision"],
+                    "decision": parse_decision(row["final_investment_decision"]),
+                }
+
+    pw.io.subscribe(
+        decisions.select(pw.this.ticker, pw.this.date, pw.this.final_proposal, pw.this.final_investment_decision),
+        on_change=on_change,
+    )
+    start = time.perf_counter()
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+    elapsed = time.perf_counter() - start
+
+    rows = sorted(latest.values(), key=lambda r: (r["date"], r["ticker"]))
+    result: Dict[str, Any] = {
+        "mode": mode,
+        "ticker_days": len(rows),
+        "seconds": elapsed,
+        "replay_misses": sum(llm.misses for llm in (quick, deep) if isinstance(llm, ReplayLLM)),
+        "decisions": rows,
+    }
+    if prices_path is not None:
+        prices = load_prices(prices_path)
+        tickers = np.array([r["ticker"] for r in rows], dtype=str)
+        dates = np.array([r["date"] for r in rows], dtype=str)
+        result["scores"] = {
+            "trader": score_decisions(tickers, dates, np.array([r["final_proposal"] for r in rows], dtype=str), prices, horizon),
+            "portfolio_manager": score_decisions(tickers, dates, np.array([r["decision"] for r in rows], dtype=str), prices, horizon),
+        }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=Path, required=True)
+    parser.add_argument("--prices", type=Path)
+    parser.add_argument("--quick-model", required=True, help="name of the recorded quick model")
+    parser.add_argument("--deep-model", help="name of the recorded deep model")
+    parser.add_argument("--cache-dir", type=Path)
+    parser.add_argument("--horizon", type=int, default=1, help="trading days each decision is held")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--decisions", type=Path, help="also write the decisions as JSON lines")
+    args = parser.parse_args()
+
+    result = run_backtest(
+        args.reports, args.quick_model, args.deep_model, args.prices, mode="replay", cache_dir=args.cache_dir,
+        horizon=args.horizon, num_rounds=args.rounds, risk_rounds=args.rounds,
+    )
+    if args.decisions:
+        with open(args.decisions, "w") as f:
+            for row in result["decisions"]:
+                f.write(json.dumps(row) + "\n")
+    print(f"{result['ticker_days']} ticker-days in {result['seconds']:.1f}s, {result['replay_misses']} replay misses")
+    for agent, scores in result.get("scores", {}).items():
+        print(f"{agent}: " + ", ".join(f"{name}={value:.4g}" for name, value in scores.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,531 @@
-from config.settings import settings
+"""
+NewsAPI Connector
+Streams articles from NewsAPI.org into Pathway, configured by the
+`news_sources.newsapi` block in config/api.yaml.
+Syndicated copies of a story are folded into one cluster by MinHash/LSH
+near-duplicate detection, and each cluster is mapped to every ticker it
+mentions, so a story is analyzed once and its result fanned out.
+"""
 
-api_conf = settings.load_api_config()
-news_key = settings.NEWS_API_KEY
+import hashlib
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 
-print(f"News API Key: {news_key}")
-print(f"API Config: {api_conf}")
+import numpy as np
+import pathway as pw
 
-# try running python -m src.connectors.news_connector to see output
+from config.settings import DedupConfig, NewsSourceConfig, parse_news_source, settings
+
+if TYPE_CHECKING:
+    # requests is only imported once a session is created.
+    import requests
+
+logger = logging.getLogger(__name__)
+
+
+class NewsSchema(pw.Schema):
+    article_id: str
+    cluster_id: str
+    ticker: str
+    source: str
+    title: str
+    description: str
+    content: str
+    url: str
+    published_at: str
+
+
+class RateLimiter:
+    """
+    Token bucket for `requests_per_second` plus a daily quota that resets at
+    midnight UTC. Thread-safe. `usage` / `restore_usage` carry the quota spent
+    today across restarts.
+    """
+
+    def __init__(self, requests_per_second: float, requests_per_day: Optional[int] = None):
+        self.rate = float(requests_per_second)
+        self.capacity = max(1.0, self.rate)
+        self.requests_per_day = requests_per_day
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._day = self._today()
+        self._used_today = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def remaining_today(self) -> Optional[int]:
+        with self._lock:
+            self._roll_day()
+            if self.requests_per_day is None:
+                return None
+            return self.requests_per_day - self._used_today
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            self._roll_day()
+            return {"day": self._day, "used": self._used_today}
+
+    def restore_usage(self, usage: Dict[str, Any]) -> None:
+        """Counts requests recorded by `usage` against today's quota; other days are ignored."""
+        with self._lock:
+            self._roll_day()
+            if usage.get("day") == self._day:
+                self._used_today = max(self._used_today, int(usage.get("used", 0)))
+
+    def _roll_day(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._used_today = 0
+
+    def acquire(self, block: bool = True) -> bool:
+        """Takes one request slot. Returns False once the daily quota is spent."""
+        while True:
+            with self._lock:
+                self._roll_day()
+                if self.requests_per_day is not None and self._used_today >= self.requests_per_day:
+                    return False
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self._used_today += 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if not block:
+                return False
+            time.sleep(wait)
+
+
+def create_session(pool_size: int = 4) -> "requests.Session":
+    """Pooled keep-alive HTTP session."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def error_code(response: "requests.Response") -> Optional[str]:
+    """NewsAPI error code of a response (e.g. "maximumResultsReached"), if any."""
+    try:
+        return response.json().get("code")
+    except ValueError:
+        return None
+
+
+def article_id(article: Dict[str, Any]) -> str:
+    key = article.get("url") or f"{article.get('title')}|{article.get('publishedAt')}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+QUALIFIED_SYMBOL_PATTERN = re.compile(
+    r"(?:\$|\b(?:NASDAQ|NYSE|NYSEARCA|AMEX|OTC|TSX|LSE)\s*:\s*)([A-Z][A-Z0-9]*(?:\.[A-Z])?)\b"
+)
+BARE_SYMBOL_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]*\b")
+MIN_BARE_SYMBOL_LENGTH = 3
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    return " ".join(article.get(field) or "" for field in ("title", "description", "content"))
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Word `size`-grams of the lowercased text (the whole text if it is shorter)."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from `num_perm` universal hash permutations of 32-bit shingle hashes."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set), dtype=np.uint64
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1)
+
+
+class NearDuplicateIndex:
+    """
+    Bounded LSH index of story clusters. A new article joins the most similar
+    cluster whose estimated Jaccard similarity is at least `threshold`, otherwise
+    it starts a cluster named after its article id. Signatures are split into
+    `bands` buckets; only clusters sharing a bucket are compared. The
+    `max_clusters` least recently matched clusters are kept. Not thread-safe.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        num_perm: int = 128,
+        bands: int = 32,
+        max_clusters: int = 50_000,
+        shingle_size: int = 3,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_clusters = max_clusters
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self.duplicates = 0
+        self._clusters: "OrderedDict[str, Tuple[np.ndarray, Set[str]]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, article_id: str, text: str, tickers: Iterable[str]) -> Tuple[str, Set[str]]:
+        """Assigns the article to a cluster; returns its id and the tickers newly mapped to it."""
+        shingle_set = shingles(text, self.shingle_size)
+        if not shingle_set:
+            return article_id, set(tickers)
+        signature = self.hasher.signature(shingle_set)
+        keys = self._band_keys(signature)
+
+        best_id, best_similarity = None, self.threshold
+        for candidate in set().union(*(self._buckets.get(key, ()) for key in keys)):
+            similarity = float(np.mean(self._clusters[candidate][0] == signature))
+            if similarity >= best_similarity:
+                best_id, best_similarity = candidate, similarity
+
+        if best_id is not None:
+            self.duplicates += 1
+            self._clusters.move_to_end(best_id)
+            cluster_tickers = self._clusters[best_id][1]
+            new_tickers = set(tickers) - cluster_tickers
+            cluster_tickers |= new_tickers
+            return best_id, new_tickers
+
+        if article_id in self._clusters:
+            self._evict(article_id)
+        self._clusters[article_id] = (signature, set(tickers))
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(article_id)
+        while len(self._clusters) > self.max_clusters:
+            self._evict(next(iter(self._clusters)))
+        return article_id, set(tickers)
+
+    def _evict(self, cluster_id: str) -> None:
+        signature, _ = self._clusters.pop(cluster_id)
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(cluster_id)
+                if not bucket:
+                    del self._buckets[key]
+
+
+def mentioned_tickers(text: str, queries: Dict[str, str]) -> Set[str]:
+    """
+    Tickers mentioned in `text`: by cashtag (`$AAPL`), exchange-qualified symbol
+    (`NASDAQ:AAPL`), company-name query as a whole phrase (case-insensitive), or
+    bare uppercase symbol of at least MIN_BARE_SYMBOL_LENGTH characters. Short
+    symbols such as ON, IT or A read as ordinary words, so they need a qualifier.
+    """
+    symbols = set(QUALIFIED_SYMBOL_PATTERN.findall(text))
+    bare_symbols = set(BARE_SYMBOL_PATTERN.findall(text))
+    lowered = f" {' '.join(WORD_PATTERN.findall(text.lower()))} "
+    mentioned = set()
+    for ticker, query in queries.items():
+        if ticker in symbols or (len(ticker) >= MIN_BARE_SYMBOL_LENGTH and ticker in bare_symbols):
+            mentioned.add(ticker)
+            continue
+        name = " ".join(WORD_PATTERN.findall(query.lower()))
+        if name and name != ticker.lower() and f" {name} " in lowered:
+            mentioned.add(ticker)
+    return mentioned
+
+
+def create_dedup_index(config: Union[DedupConfig, Dict[str, Any], None] = None) -> Optional[NearDuplicateIndex]:
+    """Index configured by the `dedup` block of the newsapi config, or None when disabled."""
+    if config is None:
+        config = settings.api_config().news_sources["newsapi"].dedup
+    elif isinstance(config, dict):
+        config = DedupConfig(**config)
+    if not config.enabled:
+        return None
+    return NearDuplicateIndex(
+        threshold=config.threshold,
+        num_perm=config.num_perm,
+        bands=config.bands,
+        max_clusters=config.max_clusters,
+    )
+
+
+class NewsAPIClient:
+    """Thin NewsAPI `/everything` client with rate limiting and incremental polling."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        config: Union[NewsSourceConfig, Dict[str, Any], None] = None,
+        session: Optional["requests.Session"] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        if isinstance(config, dict):
+            config = parse_news_source(config, "newsapi")
+        config = config or settings.api_config().news_sources["newsapi"]
+        self.api_key = api_key or settings.NEWS_API_KEY
+        self.base_url = config.base_url.rstrip("/")
+        self.timeout = config.timeout
+        self.page_size = config.page_size
+        self.poll_interval = config.poll_interval
+        self.session = session or create_session()
+        self.rate_limiter = rate_limiter or RateLimiter(
+            config.rate_limits.requests_per_second,
+            config.rate_limits.requests_per_day,
+        )
+
+    def fetch(self, query: str, since: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Articles for `query` published at or after `since`, oldest first.
+        Results come newest first, so pages are read until `totalResults` articles
+        are in or a page reaches back past `since` (or the plan's result cap is hit).
+        Returns None when the daily quota is exhausted or the provider rate-limits us
+        before the last page, so the caller's watermark cannot skip unread pages.
+        """
+        params = {"q": query, "sortBy": "publishedAt", "pageSize": self.page_size, "language": "en"}
+        if since:
+            params["from"] = since
+        articles: List[Dict[str, Any]] = []
+        for page in itertools.count(1):
+            if not self.rate_limiter.acquire():
+                return None
+            response = self.session.get(
+                f"{self.base_url}/everything",
+                params={**params, "page": page},
+                headers={"X-Api-Key": self.api_key or ""},
+                timeout=self.timeout,
+            )
+            if response.status_code == 429:
+                logger.warning("NewsAPI rate limit hit for query %r", query)
+                return None
+            if page > 1 and not response.ok and error_code(response) == "maximumResultsReached":
+                logger.warning("NewsAPI result cap reached for query %r after %d articles", query, len(articles))
+                break
+            response.raise_for_status()
+            payload = response.json()
+            if payload.get("status") != "ok":
+                raise RuntimeError(f"NewsAPI error: {payload.get('code')}: {payload.get('message')}")
+            page_articles = payload.get("articles", [])
+            articles.extend(page_articles)
+            if (
+                len(page_articles) < self.page_size
+                or len(articles) >= payload.get("totalResults", 0)
+                or (since and (page_articles[-1].get("publishedAt") or "") < since)
+            ):
+                break
+        return sorted(articles, key=lambda a: a.get("publishedAt") or "")
+
+
+class NewsAPISubject(pw.io.python.ConnectorSubject):
+    """
+    Polls NewsAPI for each ticker's query. Each poll only asks for articles
+    newer than the ticker's publish-time watermark, and articles whose id was
+    already emitted are dropped.
+
+    With `dedup` (index configured from api.yaml unless `dedup_index` is given), near-duplicates
+    of an earlier story are folded into its cluster: a row is only emitted for
+    tickers the cluster was not mapped to yet, including other tracked tickers
+    the article mentions. `cluster_id` is the id of the story's first article.
+
+    With a `state_path` (default Settings.NEWS_STATE_PATH, or newsapi_state.json in
+    Settings.PERSISTENCE_DIR), the watermarks, the ids of the articles at each
+    watermark and the daily quota spent are saved after every fetch and restored
+    on start, so a restart neither re-reads old articles nor overspends the quota.
+    """
+
+    def __init__(
+        self,
+        queries: Dict[str, str],
+        client: Optional[NewsAPIClient] = None,
+        poll_interval: Optional[float] = None,
+        max_seen: int = 100_000,
+        max_polls: Optional[int] = None,
+        dedup: bool = True,
+        dedup_index: Optional[NearDuplicateIndex] = None,
+        state_path: Union[str, Path, None] = None,
+    ):
+        super().__init__(datasource_name="newsapi")
+        self.queries = queries
+        self.client = client or NewsAPIClient()
+        self.poll_interval = poll_interval or self.client.poll_interval
+        self.max_seen = max_seen
+        self.max_polls = max_polls
+        if dedup_index is None and dedup:
+            dedup_index = create_dedup_index()
+        self.dedup_index = dedup_index
+        self.watermarks: Dict[str, str] = {}
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        # Seen keys of the articles published exactly at each ticker's watermark.
+        self._at_watermark: Dict[str, Set[str]] = {}
+        self._stop = threading.Event()
+        if state_path is None and settings.NEWS_STATE_PATH is not None:
+            state_path = settings.NEWS_STATE_PATH
+        elif state_path is None and settings.PERSISTENCE_DIR is not None:
+            state_path = settings.PERSISTENCE_DIR / "newsapi_state.json"
+        self.state_path = Path(state_path) if state_path is not None else None
+        self.load_state()
+
+    def load_state(self) -> None:
+        if self.state_path is None or not self.state_path.exists():
+            return
+        with open(self.state_path) as f:
+            state = json.load(f)
+        self.watermarks.update(state.get("watermarks", {}))
+        for ticker, seen_keys in state.get("at_watermark", {}).items():
+            self._at_watermark[ticker] = set(seen_keys)
+            self._seen.update(dict.fromkeys(seen_keys))
+        self.client.rate_limiter.restore_usage(state.get("quota", {}))
+
+    def save_state(self) -> None:
+        if self.state_path is None:
+            return
+        state = {
+            "watermarks": self.watermarks,
+            "at_watermark": {ticker: sorted(keys) for ticker, keys in self._at_watermark.items()},
+            "quota": self.client.rate_limiter.usage(),
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.state_path.with_suffix(".tmp")
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, self.state_path)
+
+    def run(self) -> None:
+        from requests import RequestException
+
+        polls = 0
+        while not self._stop.is_set() and (self.max_polls is None or polls < self.max_polls):
+            polls += 1
+            for ticker, query in self.queries.items():
+                try:
+                    articles = self.client.fetch(query, since=self.watermarks.get(ticker))
+                except (RequestException, RuntimeError) as e:
+                    logger.warning("NewsAPI fetch failed for %s: %s", ticker, e)
+                    articles = []
+                if articles is not None:
+                    self.emit(ticker, articles)
+                self.save_state()
+                if articles is None:
+                    break
+            if self.max_polls is None or polls < self.max_polls:
+                self._stop.wait(self.poll_interval)
+
+    def emit(self, ticker: str, articles: List[Dict[str, Any]]) -> int:
+        emitted = 0
+        for article in articles:
+            published_at = article.get("publishedAt") or ""
+            seen_key = f"{ticker}:{article_id(article)}"
+            if published_at > self.watermarks.get(ticker, ""):
+                self.watermarks[ticker] = published_at
+                self._at_watermark[ticker] = set()
+            if published_at == self.watermarks.get(ticker):
+                self._at_watermark.setdefault(ticker, set()).add(seen_key)
+
+            if seen_key in self._seen:
+                continue
+            self._seen[seen_key] = None
+            if len(self._seen) > self.max_seen:
+                self._seen.popitem(last=False)
+
+            cluster_id, tickers = article_id(article), {ticker}
+            if self.dedup_index is not None:
+                text = article_text(article)
+                tickers |= mentioned_tickers(text, self.queries)
+                cluster_id, tickers = self.dedup_index.add(cluster_id, text, tickers)
+
+            for mapped_ticker in sorted(tickers):
+                self.next(
+                    article_id=article_id(article),
+                    cluster_id=cluster_id,
+                    ticker=mapped_ticker,
+                    source=(article.get("source") or {}).get("name") or "",
+                    title=article.get("title") or "",
+                    description=article.get("description") or "",
+                    content=article.get("content") or "",
+                    url=article.get("url") or "",
+                    published_at=published_at,
+                )
+                emitted += 1
+        return emitted
+
+    def on_stop(self) -> None:
+        self._stop.set()
+        self.client.session.close()
+
+
+def read_news(
+    queries: Dict[str, str],
+    client: Optional[NewsAPIClient] = None,
+    poll_interval: Optional[float] = None,
+    **kwargs,
+) -> pw.Table:
+    """Pathway table of news articles, one row per (ticker, article)."""
+    subject = NewsAPISubject(queries, client=client, poll_interval=poll_interval, **kwargs)
+    return pw.io.python.read(subject, schema=NewsSchema, name="newsapi")
+
+
+def group_stories(news: pw.Table) -> pw.Table:
+    """One row per story cluster, with every ticker it is mapped to; analyze this instead of `news`."""
+    return news.groupby(pw.this.cluster_id).reduce(
+        pw.this.cluster_id,
+        title=pw.reducers.any(pw.this.title),
+        description=pw.reducers.any(pw.this.description),
+        content=pw.reducers.any(pw.this.content),
+        url=pw.reducers.any(pw.this.url),
+        published_at=pw.reducers.min(pw.this.published_at),
+        tickers=pw.reducers.sorted_tuple(pw.this.ticker),
+    )
+
+
+def fan_out_stories(story_results: pw.Table, news: pw.Table) -> pw.Table:
+    """Per-ticker rows of results computed once per story; `story_results` is keyed by `cluster_id`."""
+    mapping = news.groupby(pw.this.cluster_id, pw.this.ticker).reduce(pw.this.cluster_id, pw.this.ticker)
+    return mapping.join(story_results, pw.left.cluster_id == pw.right.cluster_id).select(
+        pw.left.ticker, *pw.right.without(pw.this.cluster_id), cluster_id=pw.left.cluster_id
+    )
+
+
+if __name__ == "__main__":
+    # try running python -m src.connectors.news_connector to see output
+    print(f"News API Key: {settings.NEWS_API_KEY}")
+    print(f"API Config: {settings.load_api_config()}")
@@ -0,0 +1,311 @@
+"""
+Decision Sink
+Output stage after create_portfolio_manager_pipeline. Only decisions that
+changed for their ticker are emitted (the previous decision is kept per
+ticker inside the engine), buffered, and flushed in bulk as numbered Parquet
+files. A memory-mapped index holds the latest decision of every ticker, so
+external readers look a ticker up in O(1) without reading any output file.
+
+Readers poll the index header: `changes` grows with every change and `files`
+is the number of Parquet files written, so a poller reads only the files
+added since its last poll (see read_changes). Output writes and reads scale
+with decision changes, not with the ticker universe.
+
+Typical use:
+
+    decisions = create_investment_pipeline(reports, llm)
+    write_decisions(decisions, "out/decisions")
+
+    # in another process
+    index = DecisionIndex("out/decisions/latest.idx", readonly=True)
+    index.lookup("AAPL")  # {"decision": "BUY", "updated_at": ..., "file": 3, "row": 17}
+"""
+
+import operator
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pathway as pw
+
+from config.settings import settings
+from src.agents.portfolio_manager import parse_decision
+
+INDEX_FILE = "latest.idx"
+FILE_PATTERN = "decisions-{:08d}.parquet"
+
+# 0 marks an empty index slot.
+DECISION_CODES = {"BUY": 1, "SELL": 2, "HOLD": 3, "UNKNOWN": 4}
+DECISION_NAMES = {code: name for name, code in DECISION_CODES.items()}
+
+INDEX_MAGIC = b"DECIDX01"
+# Reads of a slot a writer is updating are retried this many times (yielding, then
+# sleeping 1ms) before giving up, so a writer that died mid-update cannot hang readers.
+LOOKUP_RETRIES = 100
+INDEX_HEADER = np.dtype([("magic", "S8"), ("slots", "<u8"), ("changes", "<u8"), ("files", "<u8")])
+# `seq` is a per-slot seqlock: odd while the writer updates the slot.
+INDEX_SLOT = np.dtype([
+    ("seq", "<u8"),
+    ("ticker", "S16"),
+    ("decision", "u1"),
+    ("pad", "V7"),
+    ("updated_at", "<i8"),
+    ("file", "<u8"),
+    ("row", "<u8"),
+])
+
+
+class DecisionIndex:
+    """
+    Memory-mapped latest decision per ticker: an open-addressing hash table of
+    `slots` fixed-size records (crc32 of the ticker, linear probing) behind a
+    small header. One process writes; any number of processes read with
+    `readonly=True`. Readers retry a slot while its seqlock shows a write in
+    progress, so they never see a half-written record.
+    """
+
+    def __init__(self, path: Union[str, Path], slots: Optional[int] = None, readonly: bool = False):
+        self.path = Path(path)
+        self.readonly = readonly
+        if not self.path.exists():
+            if readonly:
+                raise FileNotFoundError(self.path)
+            slots = slots or settings.DECISION_INDEX_SLOTS
+            if slots & (slots - 1):
+                raise ValueError(f"Index slots must be a power of two, got {slots}")
+            with open(self.path, "wb") as f:
+                header = np.zeros(1, dtype=INDEX_HEADER)
+                header["magic"], header["slots"] = INDEX_MAGIC, slots
+                f.write(header.tobytes())
+                f.truncate(INDEX_HEADER.itemsize + slots * INDEX_SLOT.itemsize)
+
+        self._map = np.memmap(self.path, dtype=np.uint8, mode="r" if readonly else "r+")
+        self._header = self._map[:INDEX_HEADER.itemsize].view(INDEX_HEADER)
+        if self._header["magic"][0] != INDEX_MAGIC:
+            raise ValueError(f"{self.path} is not a decision index")
+        self.slots = int(self._header["slots"][0])
+        self._slots = self._map[INDEX_HEADER.itemsize:].view(INDEX_SLOT)
+        self._seq = self._slots["seq"]
+        self._tickers = self._slots["ticker"]
+        self._mask = self.slots - 1
+
+    @property
+    def changes(self) -> int:
+        """Number of updates so far; unchanged means nothing to read."""
+        return int(self._header["changes"][0])
+
+    @property
+    def files(self) -> int:
+        """Number of Parquet files written so far."""
+        return int(self._header["files"][0])
+
+    def _find(self, ticker: bytes) -> int:
+        """Slot holding `ticker`, the empty slot where it would go, or -1 if the index is full."""
+        slot = zlib.crc32(ticker) & self._mask
+        for _ in range(self.slots):
+            stored = self._tickers[slot]
+            if stored == ticker or not stored:
+                return slot
+            slot = (slot + 1) & self._mask
+        return -1
+
+    @staticmethod
+    def _key(ticker: str) -> bytes:
+        key = ticker.encode("utf-8")
+        if not key or len(key) > INDEX_SLOT["ticker"].itemsize:
+            raise ValueError(f"Ticker must be 1 to {INDEX_SLOT['ticker'].itemsize} bytes: {ticker!r}")
+        return key
+
+    def update(self, ticker: str, decision: str, updated_at: int, file: int, row: int) -> None:
+        key = self._key(ticker)
+        index = self._find(key)
+        if index < 0:
+            raise RuntimeError(f"Decision index {self.path} is full ({self.slots} slots)")
+        slots = self._slots
+        seq = int(self._seq[index])
+        slots["seq"][index] = seq + 1
+        slots["ticker"][index] = key
+        slots["decision"][index] = DECISION_CODES.get(decision, DECISION_CODES["UNKNOWN"])
+        slots["updated_at"][index] = updated_at
+        slots["file"][index] = file
+        slots["row"][index] = row
+        slots["seq"][index] = seq + 2
+        self._header["changes"] += 1
+
+    def set_files(self, files: int) -> None:
+        self._header["files"] = files
+
+    def flush(self) -> None:
+        self._map.flush()
+
+    def lookup(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        Latest decision of `ticker` and where its full row is stored, or None if it has none yet.
+        Raises RuntimeError if the slot stays mid-update (its writer died while updating it).
+        """
+        try:
+            key = self._key(ticker)
+        except ValueError:
+            return None
+        index = self._find(key)
+        if index < 0:
+            return None
+        for attempt in range(LOOKUP_RETRIES):
+            seq = self._seq[index]
+            if not seq % 2:
+                record = self._slots[index].item()
+                if self._seq[index] == seq:
+                    break
+            time.sleep(0 if attempt < 10 else 0.001)
+        else:
+            raise RuntimeError(f"Slot of {ticker} in {self.path} is stuck mid-update")
+        _, stored, decision, _, updated_at, file, row = record
+        if stored != key:
+            return None
+        return {"decision": DECISION_NAMES.get(decision, "UNKNOWN"), "updated_at": updated_at, "file": file, "row": row}
+
+    def items(self) -> Iterator[tuple]:
+        """(ticker, decision) of every ticker in the index."""
+        used = self._slots[self._slots["ticker"] != b""]
+        for record in used:
+            yield record["ticker"].decode("utf-8"), DECISION_NAMES.get(int(record["decision"]), "UNKNOWN")
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._slots["ticker"] != b""))
+
+
+def changed_decisions(decisions: pw.Table, name: Optional[str] = None) -> pw.Table:
+    """
+    One row per ticker holding its latest decision, updated only when the parsed
+    portfolio manager decision changes. With persistence, `name` keeps the previous
+    decisions across restarts, so unchanged decisions are not re-emitted.
+    """
+    parsed = decisions.select(
+        pw.this.ticker,
+        decision=pw.apply_with_type(parse_decision, str, pw.this.final_investment_decision),
+        final_proposal=pw.this.final_proposal,
+        final_investment_decision=pw.this.final_investment_decision,
+    )
+    return parsed.deduplicate(
+        value=pw.this.decision, instance=pw.this.ticker, acceptor=operator.ne, name=name
+    )
+
+
+class DecisionSink:
+    """
+    Buffers changed decisions and writes them to `directory` as numbered Parquet files
+    once `batch_size` rows are pending or `flush_interval_ms` has passed at the end of
+    a Pathway time, then records them in the index. A file is renamed into place
+    before the index points at it.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        index_slots: Optional[int] = None,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size or settings.DECISION_BATCH_SIZE
+        self.flush_interval = (settings.DECISION_FLUSH_MS if flush_interval_ms is None else flush_interval_ms) / 1000
+        self.index_slots = index_slots
+        self._index: Optional[DecisionIndex] = None
+        self.rows_written = 0
+        self.files_written = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> DecisionIndex:
+        # Opened on first use, so only the worker that receives the output (see src.runner) writes it.
+        if self._index is None:
+            self._index = DecisionIndex(self.directory / INDEX_FILE, slots=self.index_slots)
+        return self._index
+
+    def on_change(self, key: Any, row: Dict[str, Any], time: int, is_addition: bool) -> None:
+        if not is_addition:
+            return
+        with self._lock:
+            self._pending.append({
+                "ticker": row["ticker"],
+                "decision": row["decision"],
+                "final_proposal": row["final_proposal"],
+                "final_investment_decision": row["final_investment_decision"],
+                "time": time,
+            })
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def on_time_end(self, time: int) -> None:
+        if self._pending and self._flush_due():
+            self.flush()
+
+    def _flush_due(self) -> bool:
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def on_end(self) -> None:
+        self.flush()
+
+    def flush(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return
+            file = self.index.files
+            updated_at = time.time_ns() // 1_000_000
+            for row in rows:
+                row["updated_at"] = updated_at
+
+            path = self.directory / FILE_PATTERN.format(file)
+            temporary = path.with_suffix(".tmp")
+            pq.write_table(pa.Table.from_pylist(rows), temporary)
+            os.replace(temporary, path)
+
+            for number, row in enumerate(rows):
+                self.index.update(row["ticker"], row["decision"], updated_at, file, number)
+            self.index.set_files(file + 1)
+            self.index.flush()
+            self.rows_written += len(rows)
+            self.files_written += 1
+
+
+def write_decisions(
+    decisions: pw.Table,
+    directory: Union[str, Path],
+    batch_size: Optional[int] = None,
+    flush_interval_ms: Optional[int] = None,
+    index_slots: Optional[int] = None,
+    name: Optional[str] = "decision_changes",
+) -> DecisionSink:
+    """Sends the changed decisions of `decisions` (output of the portfolio manager) to a DecisionSink."""
+    sink = DecisionSink(directory, batch_size, flush_interval_ms, index_slots)
+    pw.io.subscribe(
+        changed_decisions(decisions, name=name),
+        on_change=sink.on_change,
+        on_time_end=sink.on_time_end,
+        on_end=sink.on_end,
+    )
+    return sink
+
+
+def read_changes(directory: Union[str, Path], since_file: int = 0) -> Any:
+    """pyarrow Table of the changes in files `since_file` onwards (poll with the index's `files`)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = Path(directory)
+    files = DecisionIndex(directory / INDEX_FILE, readonly=True).files
+    tables = [pq.read_table(directory / FILE_PATTERN.format(file)) for file in range(since_file, files)]
+    return pa.concat_tables(tables) if tables else pa.table({})
@@ -0,0 +1 @@
+__all__ = ['batching', 'cache', 'cascade', 'events', 'executor', 'metrics', 'prompts', 'scheduler', 'streaming']
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Prompt Batching
+Packs concurrent requests of one agent for different tickers into a single LLM
+request. The shared instructions are sent once, followed by one delimited
+section per ticker; the answer is split back per ticker. Tickers whose answer
+is missing or invalid fall back to an individual call.
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from src.llm.metrics import invoke_llm
+
+
+BATCH_PROMPT = """{instructions}
+---
+BATCH MODE: The task above applies to each of the {count} requests below independently.
+Answer every request in full, exactly as if it had been sent on its own.
+Start each answer with a header line "### ANSWER <n>" (the request number) and write nothing outside the answers.
+
+{requests}
+"""
+
+REQUEST_HEADER = "### REQUEST {number} (ticker: {ticker})"
+REQUEST_PATTERN = re.compile(r"^### REQUEST (\d+)\b", re.MULTILINE)
+ANSWER_PATTERN = re.compile(r"^#+\s*ANSWER\s+(\d+)\s*:?\s*$", re.MULTILINE)
+
+
+def render_batch(instructions: str, sections: List[Tuple[str, str]]) -> str:
+    requests = "\n\n".join(
+        f"{REQUEST_HEADER.format(number=i, ticker=ticker)}\n{section.strip()}"
+        for i, (ticker, section) in enumerate(sections, start=1)
+    )
+    return BATCH_PROMPT.format(instructions=instructions.strip(), count=len(sections), requests=requests)
+
+
+def parse_batch_response(response: str, count: int) -> Dict[int, str]:
+    """Answers by request number (1-based); numbers that are missing, repeated or empty are left out."""
+    matches = list(ANSWER_PATTERN.finditer(response))
+    answers: Dict[int, str] = {}
+    repeated = set()
+    for match, following in zip(matches, matches[1:] + [None]):
+        number = int(match.group(1))
+        end = following.start() if following is not None else len(response)
+        answer = response[match.end():end].strip()
+        if number in answers:
+            repeated.add(number)
+        if 1 <= number <= count and answer:
+            answers[number] = answer
+    for number in repeated:
+        answers.pop(number, None)
+    return answers
+
+
+class _Batch:
+    __slots__ = ("requests", "closed")
+
+    def __init__(self):
+        self.requests: List[Tuple[str, str, Future]] = []
+        self.closed = False
+
+
+class PromptBatcher:
+    """
+    Collects requests of one agent for up to `max_wait_ms` or until `max_batch` are
+    waiting, then sends them as one LLM call. `invoke` blocks until its answer is in,
+    so batches only form when several UDF calls are in flight (async executor).
+    With `max_batch` <= 1 every request is sent on its own.
+
+    Prompts must start with `instructions`; only the remainder is sent per ticker.
+    `validate` rejects answers that would be unusable (e.g. missing a decision marker).
+    `single_call(ticker, prompt)` answers requests sent on their own (default: invoke_llm).
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        agent: str,
+        instructions: str,
+        max_batch: Optional[int] = None,
+        max_wait_ms: Optional[int] = None,
+        validate: Optional[Callable[[str], bool]] = None,
+        single_call: Optional[Callable[[str, str], str]] = None,
+    ):
+        self.llm = llm
+        self.agent = agent
+        self.instructions = instructions
+        self.max_batch = settings.PROMPT_BATCH_SIZE if max_batch is None else max_batch
+        self.max_wait = (settings.PROMPT_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.validate = validate or bool
+        self.single_call = single_call or (lambda ticker, prompt: invoke_llm(self.llm, prompt, self.agent, ticker))
+        self.batches = 0
+        self.batched_requests = 0
+        self.fallbacks = 0
+        self._open: Optional[_Batch] = None
+        self._cond = threading.Condition()
+
+    def invoke(self, ticker: str, prompt: str) -> str:
+        if self.max_batch <= 1 or not prompt.startswith(self.instructions):
+            return self.single_call(ticker, prompt)
+
+        future: Future = Future()
+        with self._cond:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            batch.requests.append((ticker, prompt, future))
+            if len(batch.requests) >= self.max_batch:
+                self._close(batch)
+
+            if leader:
+                deadline = time.monotonic() + self.max_wait
+                while not batch.closed and (remaining := deadline - time.monotonic()) > 0:
+                    self._cond.wait(remaining)
+                if not batch.closed:
+                    self._close(batch)
+
+        if leader:
+            if len(batch.requests) == 1:
+                return self.single_call(ticker, prompt)
+            self._send(batch.requests)
+        answer = future.result()
+        if answer is None:
+            with self._cond:
+                self.fallbacks += 1
+            return self.single_call(ticker, prompt)
+        return answer
+
+    def _close(self, batch: _Batch) -> None:
+        batch.closed = True
+        if self._open is batch:
+            self._open = None
+        self._cond.notify_all()
+
+    def _send(self, requests: List[Tuple[str, str, Future]]) -> None:
+        """Resolves every request with its answer, or None to make the caller retry it alone."""
+        sections = [(ticker, prompt[len(self.instructions):]) for ticker, prompt, _ in requests]
+        try:
+            response = invoke_llm(self.llm, render_batch(self.instructions, sections), f"{self.agent} (batched)")
+            answers = parse_batch_response(response, len(requests))
+        except Exception:
+            answers = {}
+
+        with self._cond:
+            self.batches += 1
+            self.batched_requests += len(requests)
+        for number, (_, _, future) in enumerate(requests, start=1):
+            answer = answers.get(number)
+            future.set_result(answer if answer and self.validate(answer) else None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"batches": self.batches, "batched_requests": self.batched_requests, "fallbacks": self.fallbacks}
@@ -0,0 +1,223 @@
+"""
+LLM Response Cache
+Content-addressed cache around an LLM client: an in-memory LRU in front of a
+SQLite store on disk, so repeated prompts are answered without an LLM call,
+also across process restarts.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from config.settings import settings
+
+
+class CachedResponse:
+    """Minimal stand-in for an LLM message, exposing `.content` like the real one."""
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+def model_name(llm: Any) -> str:
+    """Best-effort model identifier used as part of the cache key."""
+    for attr in ("model_name", "model", "model_id"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    return type(llm).__name__
+
+
+class CachedLLM:
+    """
+    Wraps any object with an `invoke(prompt)` method.
+    Keys are sha256(model + prompt); entries expire after `ttl` seconds and the
+    disk store is trimmed to `max_disk_entries` least recently used rows.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        cache_dir: Optional[Path] = None,
+        max_memory_entries: Optional[int] = None,
+        max_disk_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.llm = llm
+        self.model = model_name(llm)
+        self.max_memory_entries = max_memory_entries or settings.LLM_CACHE_MEMORY_ENTRIES
+        self.max_disk_entries = max_disk_entries or settings.LLM_CACHE_DISK_ENTRIES
+        self.ttl = settings.LLM_CACHE_TTL if ttl is None else ttl
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+
+        cache_dir = Path(cache_dir or settings.LLM_CACHE_DIR)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(cache_dir / "responses.sqlite3", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def invoke(self, prompt: str, *args, **kwargs) -> Any:
+        key = self.key(prompt)
+        while True:
+            with self._lock:
+                content = self._lookup(key)
+                if content is not None:
+                    return CachedResponse(content)
+                waiter = self._in_flight.get(key)
+                if waiter is None:
+                    # This thread computes the value; identical concurrent prompts wait on it.
+                    self._in_flight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            waiter.wait()
+
+        try:
+            response = self.llm.invoke(prompt, *args, **kwargs)
+            with self._lock:
+                self._store(key, response.content)
+            return response
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+    def peek(self, prompt: str) -> Optional[CachedResponse]:
+        """The cached response for `prompt`, without calling the model on a miss."""
+        with self._lock:
+            content = self._lookup(self.key(prompt))
+        return None if content is None else CachedResponse(content)
+
+    def stream(self, prompt: str, *args, **kwargs) -> Iterator[Any]:
+        """
+        Yields a hit as a single chunk and streams a miss from the wrapped model.
+        Only completions streamed to the end are stored.
+        """
+        if not hasattr(self.llm, "stream"):
+            yield self.invoke(prompt, *args, **kwargs)
+            return
+
+        key = self.key(prompt)
+        with self._lock:
+            content = self._lookup(key)
+            if content is None:
+                self.misses += 1
+        if content is not None:
+            yield CachedResponse(content)
+            return
+
+        parts = []
+        for chunk in self.llm.stream(prompt, *args, **kwargs):
+            parts.append(chunk.content)
+            yield chunk
+        with self._lock:
+            self._store(key, "".join(parts))
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - created_at > self.ttl
+
+    def _lookup(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            content, created_at = entry
+            if not self._expired(created_at, now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return content
+            del self._memory[key]
+
+        row = self._db.execute(
+            "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        content, created_at = row
+        if self._expired(created_at, now):
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        self._remember(key, content, created_at)
+        self.hits += 1
+        self.disk_hits += 1
+        return content
+
+    def _remember(self, key: str, content: str, created_at: float) -> None:
+        self._memory[key] = (content, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _store(self, key: str, content: str) -> None:
+        now = time.time()
+        self._remember(key, content, now)
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, content, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, content, now, now),
+        )
+        self._writes_since_trim += 1
+        if self._writes_since_trim >= max(1, self.max_disk_entries // 10):
+            self._trim(now)
+        self._db.commit()
+
+    def _trim(self, now: float) -> None:
+        self._writes_since_trim = 0
+        if self.ttl > 0:
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0],
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def cached_response(llm: Any, prompt: str) -> Optional[CachedResponse]:
+    """Cache hit for `prompt` if `llm` is a CachedLLM, so callers can skip rate limiting."""
+    return llm.peek(prompt) if isinstance(llm, CachedLLM) else None
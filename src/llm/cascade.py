@@ -0,0 +1,86 @@
+"""
+Model Cascade
+Routes each agent stage to a quick or a deep model. Stages run on the quick
+model and are re-asked on the deep model only when their answer is ambiguous;
+agents pinned to the deep model (by default the research manager and the
+portfolio manager) always use it. Escalation rates are tracked per agent.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from config.settings import settings
+from src.llm.cache import model_name
+from src.llm.metrics import invoke_llm
+
+
+class ModelCascade:
+    """
+    `quick_llm` / `deep_llm` pair shared by the agent factories.
+    Without a `deep_llm` every stage uses `quick_llm` and nothing escalates.
+    """
+
+    def __init__(self, quick_llm: Any, deep_llm: Any = None, pinned: Optional[Iterable[str]] = None):
+        self.quick_llm = quick_llm
+        self.deep_llm = deep_llm or quick_llm
+        self.pinned = frozenset(settings.DEEP_PINNED_AGENTS if pinned is None else pinned)
+        self._calls: Dict[str, int] = {}
+        self._escalations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def llm_for(self, agent: str) -> Any:
+        """The model that answers `agent` first."""
+        return self.deep_llm if agent in self.pinned else self.quick_llm
+
+    def cache_key(self, agent: str) -> Tuple[str, str]:
+        """Names of the models that may answer `agent`, for UDF cache keys."""
+        return model_name(self.llm_for(agent)), model_name(self.deep_llm)
+
+    def run(
+        self,
+        agent: str,
+        ticker: str,
+        prompt: str,
+        escalate: Optional[Callable[[str], bool]] = None,
+        first_call: Optional[Callable[[], str]] = None,
+    ) -> str:
+        """
+        Answers `prompt` with `llm_for(agent)` and re-asks the deep model when
+        `escalate(answer)` is true. `first_call` replaces the first model call
+        (e.g. to go through a PromptBatcher built on `llm_for(agent)`).
+        """
+        llm = self.llm_for(agent)
+        answer = first_call() if first_call is not None else invoke_llm(llm, prompt, agent, ticker)
+        if llm is self.deep_llm:
+            return answer
+
+        escalated = escalate is not None and escalate(answer)
+        with self._lock:
+            self._calls[agent] = self._calls.get(agent, 0) + 1
+            if escalated:
+                self._escalations[agent] = self._escalations.get(agent, 0) + 1
+        if escalated:
+            answer = invoke_llm(self.deep_llm, prompt, agent, ticker)
+        return answer
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per cascaded agent: quick-model answers, escalations and escalation rate."""
+        with self._lock:
+            return {
+                agent: {
+                    "calls": calls,
+                    "escalations": self._escalations.get(agent, 0),
+                    "escalation_rate": self._escalations.get(agent, 0) / calls,
+                }
+                for agent, calls in self._calls.items()
+            }
+
+
+def as_cascade(llm: Any) -> ModelCascade:
+    """Accepts either a ModelCascade or a single model, which then answers every stage."""
+    return llm if isinstance(llm, ModelCascade) else ModelCascade(llm, pinned=())
+
+
+def is_empty(answer: str) -> bool:
+    """Default escalation rule for free-form stages such as debate turns."""
+    return not answer.strip()
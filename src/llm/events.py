@@ -0,0 +1,73 @@
+"""
+Event Streams
+Bridges in-process event publishers (LLM metrics, early decisions) into Pathway
+tables through a python connector.
+"""
+
+import queue
+import threading
+from typing import List, Tuple
+
+import pathway as pw
+
+
+class EventHub:
+    """Fans event tuples out to subscriber queues; publishing without subscribers is free."""
+
+    def __init__(self):
+        self._subscribers: List[queue.SimpleQueue] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.SimpleQueue:
+        events: queue.SimpleQueue = queue.SimpleQueue()
+        with self._lock:
+            self._subscribers = self._subscribers + [events]
+        return events
+
+    def unsubscribe(self, events: queue.SimpleQueue) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not events]
+
+    def publish(self, event: Tuple) -> None:
+        for subscriber in self._subscribers:
+            subscriber.put(event)
+
+
+class EventSubject(pw.io.python.ConnectorSubject):
+    """Streams the events of a hub into Pathway until `stop()` is called."""
+
+    def __init__(self, hub: EventHub, schema: type[pw.Schema], name: str, poll_interval: float = 0.5):
+        super().__init__(datasource_name=name)
+        self.hub = hub
+        self.fields = schema.column_names()
+        self.poll_interval = poll_interval
+        self._events = hub.subscribe()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            try:
+                event = self._events.get(timeout=self.poll_interval)
+            except queue.Empty:
+                if self._stopped.is_set():
+                    break
+                continue
+            self.next(**dict(zip(self.fields, event)))
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def on_stop(self) -> None:
+        self.hub.unsubscribe(self._events)
+
+
+def read_events(
+    hub: EventHub,
+    schema: type[pw.Schema],
+    name: str,
+    autocommit_duration_ms: int = 100,
+) -> Tuple[pw.Table, EventSubject]:
+    """Table of the events published to `hub` from now on, plus the subject that stops it."""
+    subject = EventSubject(hub, schema, name)
+    table = pw.io.python.read(subject, schema=schema, name=name, autocommit_duration_ms=autocommit_duration_ms)
+    return table, subject
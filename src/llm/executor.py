@@ -0,0 +1,141 @@
+"""
+LLM Executor
+Builds the Pathway executor shared by every agent UDF so that LLM calls
+run concurrently (bounded by Settings.MAX_WORKERS) with timeouts and retries.
+"""
+
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import pathway as pw
+
+from config.settings import settings
+
+_cache_names: Dict[str, int] = {}
+_cache_names_lock = threading.Lock()
+
+
+def create_llm_executor(
+    async_mode: Optional[bool] = None,
+    max_in_flight: Optional[int] = None,
+    timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    retry_delay_ms: Optional[int] = None,
+    fully_async: Optional[bool] = None,
+) -> Any:
+    """
+    Returns the executor for LLM-backed UDFs.
+    Unset arguments fall back to the values in Settings.
+    With `fully_async`, a batch waiting on the LLM does not hold back later batches or
+    other sources (e.g. the early decision table); the agent factories await the results.
+    """
+    if async_mode is None:
+        async_mode = settings.ASYNC_LLM
+    if not async_mode:
+        return pw.udfs.sync_executor()
+
+    max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+    retry_strategy = pw.udfs.ExponentialBackoffRetryStrategy(
+        max_retries=max_retries,
+        initial_delay=settings.LLM_RETRY_DELAY_MS if retry_delay_ms is None else retry_delay_ms,
+    ) if max_retries > 0 else None
+
+    options = dict(
+        capacity=max_in_flight or settings.MAX_WORKERS,
+        timeout=settings.LLM_TIMEOUT if timeout is None else timeout,
+        retry_strategy=retry_strategy,
+    )
+    if settings.LLM_FULLY_ASYNC if fully_async is None else fully_async:
+        # Finished calls are committed in small batches so that stages do not queue behind the default 1.5 s.
+        return pw.udfs.fully_async_executor(autocommit_duration_ms=50, **options)
+    return pw.udfs.async_executor(**options)
+
+
+def executor_capacity(executor: Any) -> int:
+    """Concurrent calls `executor` runs; Settings.MAX_WORKERS for executors without a capacity."""
+    return getattr(executor, "capacity", None) or settings.MAX_WORKERS
+
+
+def split_call_limits(executor: Any, workers: int) -> Tuple[Any, Callable[[Callable[[], Any]], Any]]:
+    """
+    For UDFs making several LLM calls (e.g. a whole debate): `executor` without its
+    timeout and retry strategy, and a `limit_call(fn)` applying them to each call
+    instead, so a long debate neither times out as a whole nor re-runs every turn.
+    Calls run on a pool of `workers` threads; like the executor's own timeout, a
+    timed-out call is abandoned, not interrupted.
+    """
+    timeout = getattr(executor, "timeout", None)
+    retry_strategy = getattr(executor, "retry_strategy", None)
+    if timeout is None and retry_strategy is None:
+        return executor, lambda fn: fn()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm_call")
+
+    async def attempt(fn: Callable[[], Any]) -> Any:
+        return await asyncio.wait_for(asyncio.wrap_future(pool.submit(fn)), timeout)
+
+    def limit_call(fn: Callable[[], Any]) -> Any:
+        if retry_strategy is None:
+            return asyncio.run(attempt(fn))
+        return asyncio.run(retry_strategy.invoke(attempt, fn))
+
+    return dataclasses.replace(executor, timeout=None, retry_strategy=None), limit_call
+
+
+def cache_version(*parts: Any) -> str:
+    """Short digest of `parts` (model names, prompt template sources, stage options)."""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def udf_cache(cache_name: str, cache_key: Sequence[Any] = ()) -> Any:
+    """
+    Persistent UDF cache named `cache_name` plus the version of `cache_key`, so
+    changing a model, prompt template or stage option starts a fresh cache.
+    A factory called again in the same process gets a numbered name, as Pathway
+    cache names must be unique. Disabled when the pipeline runs without persistence.
+    """
+    name = f"{cache_name}-{cache_version(*cache_key)}"
+    with _cache_names_lock:
+        count = _cache_names.get(name, 0) + 1
+        _cache_names[name] = count
+    return pw.udfs.DefaultCache(name=name if count == 1 else f"{name}-{count}")
+
+
+def llm_udf(
+    executor: Any = None, cache_name: Optional[str] = None, cache_key: Sequence[Any] = ()
+) -> Callable[[Callable], Any]:
+    """
+    Decorator turning a blocking agent function into a Pathway UDF.
+    With an async executor the function runs on a dedicated thread pool sized
+    to the executor capacity, so `llm.invoke` calls overlap instead of queueing.
+
+    With a `cache_name`, results are stored when the pipeline runs with persistence
+    (see src.persistence) and restored on restart instead of re-calling the LLM.
+    Entries are keyed by the UDF arguments, so only name a cache for functions whose
+    arguments fully determine the answer, and pass everything else the answer depends
+    on (models, prompt templates, stage options) as `cache_key`.
+    """
+    if executor is None:
+        executor = create_llm_executor()
+    capacity = getattr(executor, "capacity", None)
+
+    def decorator(func: Callable) -> Any:
+        cache_strategy = udf_cache(cache_name, cache_key) if cache_name is not None else None
+
+        if capacity is None:
+            return pw.udf(func, executor=executor, cache_strategy=cache_strategy)
+
+        pool = ThreadPoolExecutor(max_workers=capacity, thread_name_prefix=func.__name__)
+
+        @functools.wraps(func)
+        async def run_in_pool(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+        return pw.udf(run_in_pool, executor=executor, cache_strategy=cache_strategy)
+
+    return decorator
@@ -0,0 +1,268 @@
+"""
+Agent Metrics
+Per-agent, per-ticker instrumentation of LLM calls: latency histogram,
+prompt/response token counts, errors, retries and cache hits.
+Exposed as Prometheus text (file or local HTTP endpoint) and as a Pathway table.
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pathway as pw
+
+from config.settings import settings
+from src.llm.cache import CachedResponse, cached_response
+from src.llm.events import EventHub, EventSubject, read_events
+from src.llm.prompts import prefix_cache_hints
+from src.llm.scheduler import LLMScheduler, estimate_tokens, llm_scheduler
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class AgentStats:
+    __slots__ = (
+        "calls", "errors", "retries", "cache_hits",
+        "prompt_tokens", "response_tokens", "latency_sum", "latency_buckets",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class MetricEventSchema(pw.Schema):
+    agent: str
+    ticker: str
+    latency: float
+    prompt_tokens: int
+    response_tokens: int
+    cache_hit: bool
+    error: bool
+    retry: bool
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of AgentStats keyed by (agent, ticker).
+    Recording is a lock plus a few integer updates; events are only queued
+    for Pathway when a metrics table has been created.
+    """
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], AgentStats] = {}
+        self._failed: set = set()
+        self.events = EventHub()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        agent: str,
+        ticker: str,
+        latency: float,
+        prompt_tokens: int,
+        response_tokens: int,
+        cache_hit: bool = False,
+        error: bool = False,
+    ) -> None:
+        key = (agent, ticker)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = AgentStats()
+            # A call following a failed one for the same agent and ticker is a retry.
+            retry = key in self._failed
+            if retry:
+                self._failed.discard(key)
+                stats.retries += 1
+            if error:
+                self._failed.add(key)
+                stats.errors += 1
+            stats.calls += 1
+            stats.cache_hits += cache_hit
+            stats.prompt_tokens += prompt_tokens
+            stats.response_tokens += response_tokens
+            stats.latency_sum += latency
+            stats.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+        self.events.publish((agent, ticker, latency, prompt_tokens, response_tokens, cache_hit, error, retry))
+
+    def snapshot(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        with self._lock:
+            return {
+                key: {name: getattr(stats, name) for name in AgentStats.__slots__ if name != "latency_buckets"}
+                | {"latency_buckets": list(stats.latency_buckets)}
+                for key, stats in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._failed.clear()
+
+    def render_prometheus(self) -> str:
+        counters = [
+            ("calls", "LLM calls"),
+            ("errors", "Failed LLM calls"),
+            ("retries", "LLM calls retried after a failure"),
+            ("cache_hits", "LLM calls answered from the response cache"),
+            ("prompt_tokens", "Prompt tokens sent"),
+            ("response_tokens", "Response tokens received"),
+        ]
+        snapshot = self.snapshot()
+        lines = []
+        for name, help_text in counters:
+            lines.append(f"# HELP agent_llm_{name}_total {help_text}")
+            lines.append(f"# TYPE agent_llm_{name}_total counter")
+            for (agent, ticker), stats in snapshot.items():
+                labels = f'agent="{escape_label(agent)}",ticker="{escape_label(ticker)}"'
+                lines.append(f"agent_llm_{name}_total{{{labels}}} {stats[name]}")
+
+        lines.append("# HELP agent_llm_latency_seconds LLM call latency")
+        lines.append("# TYPE agent_llm_latency_seconds histogram")
+        for (agent, ticker), stats in snapshot.items():
+            labels = f'agent="{escape_label(agent)}",ticker="{escape_label(ticker)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), stats["latency_buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'agent_llm_latency_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"agent_llm_latency_seconds_sum{{{labels}}} {stats['latency_sum']:.6f}")
+            lines.append(f"agent_llm_latency_seconds_count{{{labels}}} {stats['calls']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        """Atomically writes the Prometheus text exposition (for node_exporter's textfile collector)."""
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(self.render_prometheus())
+        tmp_path.replace(path)
+
+    def start_file_writer(self, path: Path, interval: float = 15.0) -> threading.Thread:
+        def write_forever():
+            while True:
+                self.write_prometheus(path)
+                time.sleep(interval)
+
+        thread = threading.Thread(target=write_forever, name="metrics-file-writer", daemon=True)
+        thread.start()
+        return thread
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serves /metrics on a background thread."""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+metrics = MetricsRegistry()
+
+
+def start_exporters(registry: Optional[MetricsRegistry] = None) -> None:
+    """
+    Starts the Prometheus file writer and/or HTTP endpoint configured in Settings.
+    Each process of a sharded run has its own registry: process i serves on
+    METRICS_PORT + i and writes METRICS_FILE with an `.i` suffix before the extension.
+    """
+    registry = registry or metrics
+    index = settings.process_id()
+    if settings.METRICS_FILE:
+        path = settings.METRICS_FILE
+        if settings.process_count() > 1:
+            path = path.with_name(f"{path.stem}.{index}{path.suffix}")
+        registry.start_file_writer(path, settings.METRICS_INTERVAL)
+    if settings.METRICS_PORT:
+        registry.serve(settings.METRICS_PORT + index)
+
+
+def invoke_llm(
+    llm: Any,
+    prompt: str,
+    agent: str,
+    ticker: str = "",
+    registry: Optional[MetricsRegistry] = None,
+    scheduler: Optional[LLMScheduler] = None,
+) -> str:
+    """
+    `llm.invoke(prompt).content.strip()`, admitted by the LLM scheduler and recorded
+    in the metrics registry. Cache hits are answered without waiting for the scheduler.
+    Segmented prompts (src.llm.prompts) are sent with their prefix cache hints.
+    """
+    registry = registry or metrics
+    cached = cached_response(llm, prompt)
+    if cached is not None:
+        registry.record(agent, ticker, 0.0, len(prompt) // 4, len(cached.content) // 4, cache_hit=True)
+        return cached.content.strip()
+
+    with (scheduler or llm_scheduler).request(agent, ticker, estimate_tokens(prompt)) as ticket:
+        start = time.perf_counter()
+        try:
+            response = llm.invoke(prompt, **prefix_cache_hints(prompt))
+        except Exception:
+            registry.record(agent, ticker, time.perf_counter() - start, len(prompt) // 4, 0, error=True)
+            raise
+        latency = time.perf_counter() - start
+
+        content = response.content
+        usage = getattr(response, "usage_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens") or len(prompt) // 4
+        response_tokens = usage.get("output_tokens") or len(content) // 4
+        ticket.tokens = prompt_tokens + response_tokens
+
+    registry.record(
+        agent,
+        ticker,
+        latency,
+        prompt_tokens,
+        response_tokens,
+        cache_hit=isinstance(response, CachedResponse),
+    )
+    return content.strip()
+
+
+def create_metrics_table(registry: Optional[MetricsRegistry] = None) -> Tuple[pw.Table, EventSubject]:
+    """
+    Pathway side-table with one row of aggregates per (agent, ticker).
+    The source runs until the returned subject is stopped.
+    """
+    events, subject = read_events((registry or metrics).events, MetricEventSchema, "agent_metrics")
+    table = events.groupby(pw.this.agent, pw.this.ticker).reduce(
+        pw.this.agent,
+        pw.this.ticker,
+        calls=pw.reducers.count(),
+        errors=pw.reducers.sum(pw.cast(int, pw.this.error)),
+        retries=pw.reducers.sum(pw.cast(int, pw.this.retry)),
+        cache_hits=pw.reducers.sum(pw.cast(int, pw.this.cache_hit)),
+        prompt_tokens=pw.reducers.sum(pw.this.prompt_tokens),
+        response_tokens=pw.reducers.sum(pw.this.response_tokens),
+        latency_sum=pw.reducers.sum(pw.this.latency),
+        latency_max=pw.reducers.max(pw.this.latency),
+    )
+    return table, subject
@@ -0,0 +1,114 @@
+"""
+Prompt Templates
+Agent prompts laid out for KV prefix caching (provider-side or a local
+server): a static prefix shared by every call of a factory, then the
+per-ticker context, then the volatile suffix (roles, memories, history).
+Requests about one ticker then share the longest possible prefix.
+
+Templates are compiled once per factory; rendering only joins the
+precompiled literals with the values. Rendered prompts are plain strings
+that remember their segment boundaries, from which the prefix cache hints
+sent with each request are derived.
+"""
+
+import hashlib
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+Segment = List[Tuple[str, Optional[str]]]
+
+
+def compile_segment(text: str, bound: Optional[Dict[str, Any]] = None) -> Segment:
+    """(literal, field) pairs of a `str.format` template, with `bound` fields folded into the literals."""
+    bound = bound or {}
+    compiled: Segment = []
+    literal = ""
+    for text_part, field, spec, conversion in Formatter().parse(text):
+        if spec or conversion:
+            raise ValueError(f"Format specs are not supported in prompt templates: {{{field}}}")
+        literal += text_part
+        if field is None:
+            continue
+        if field in bound:
+            literal += str(bound[field])
+        else:
+            compiled.append((literal, field))
+            literal = ""
+    compiled.append((literal, None))
+    return compiled
+
+
+def render_segment(segment: Segment, values: Dict[str, Any]) -> str:
+    return "".join(literal + (str(values[field]) if field is not None else "") for literal, field in segment)
+
+
+class Prompt(str):
+    """
+    A rendered prompt. `self[:prefix_end]` is the static prefix and
+    `self[:context_end]` the part shared by every request about the same ticker.
+    """
+
+    def __new__(
+        cls, prefix: str, context: str = "", suffix: str = "", name: str = "", values: Optional[Dict[str, Any]] = None
+    ):
+        prompt = super().__new__(cls, prefix + context + suffix)
+        prompt.prefix_end = len(prefix)
+        prompt.context_end = len(prefix) + len(context)
+        prompt.name = name
+        prompt.values = values or {}
+        return prompt
+
+    def __getnewargs__(self) -> Tuple[Any, ...]:
+        # Lets pickle and copy rebuild the segments.
+        prefix, context, suffix = self[: self.prefix_end], self[self.prefix_end : self.context_end], self[self.context_end :]
+        return prefix, context, suffix, self.name, self.values
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the cacheable prefix; requests with the same key can reuse each other's KV cache."""
+        return hashlib.sha256(self[: self.context_end].encode("utf-8")).hexdigest()[:32]
+
+
+class PromptTemplate:
+    """
+    Three-segment prompt template. `prefix` may only use fields bound at
+    construction (e.g. an agent's role); `context` holds the per-ticker material
+    and `suffix` everything that changes from call to call.
+    """
+
+    def __init__(self, prefix: str = "", context: str = "", suffix: str = "", name: str = "", **bound: Any):
+        self.name = name
+        self.bound = bound
+        self.source = (prefix, context, suffix)
+        prefix_segment = compile_segment(prefix, bound)
+        if len(prefix_segment) > 1:
+            raise ValueError(f"Unbound field in the static prefix of {name!r}: {prefix_segment[0][1]}")
+        self.prefix = prefix_segment[0][0]
+        self._context = compile_segment(context, bound)
+        self._suffix = compile_segment(suffix, bound)
+
+    def bind(self, **values: Any) -> "PromptTemplate":
+        """A copy with more fields fixed, compiled once (e.g. one per debate participant)."""
+        return PromptTemplate(*self.source, name=self.name, **{**self.bound, **values})
+
+    def render(self, **values: Any) -> Prompt:
+        return Prompt(
+            self.prefix,
+            render_segment(self._context, values),
+            render_segment(self._suffix, values),
+            name=self.name,
+            values={**self.bound, **values},
+        )
+
+
+def prefix_cache_hints(prompt: str) -> Dict[str, str]:
+    """
+    Request kwargs telling the provider which prefix to cache or route on, e.g.
+    `prompt_cache_key` for OpenAI-compatible APIs (Settings.PROMPT_CACHE_KEY_PARAM; unset = none).
+    """
+    param = settings.PROMPT_CACHE_KEY_PARAM
+    if not param or not isinstance(prompt, Prompt):
+        return {}
+    return {param: prompt.cache_key}
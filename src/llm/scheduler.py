@@ -0,0 +1,272 @@
+"""
+LLM Scheduler
+One scheduler shared by every agent LLM call. Waiting requests are ordered by
+priority class (held positions first, then later pipeline stages) with a
+round-robin queue per ticker inside each class, and are released while the
+requests-per-minute and tokens-per-minute budgets allow. Concurrency adapts
+AIMD-style: it grows by one per window of successful calls and is halved on
+rate-limit errors (429) or, with a target latency, on slow responses.
+
+The scheduler is per process. Under src.runner.run_sharded every process gets an
+equal share of the provider budgets and of LLM_MAX_CONCURRENCY, so the run as a
+whole stays within the configured limits.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+from config.settings import settings
+
+
+# Lower goes first: a request late in the chain finishes a ticker, an early one starts more work.
+STAGE_PRIORITIES = {
+    "Portfolio Manager": 0,
+    "Risky Analyst": 1,
+    "Safe Analyst": 1,
+    "Neutral Analyst": 1,
+    "Trader": 2,
+    "Research Manager": 3,
+    "Bull Analyst": 4,
+    "Bear Analyst": 4,
+    "Debate Scribe": 4,
+}
+DEFAULT_PRIORITY = 5  # data analysts and anything else
+
+RATE_LIMIT_PATTERN = re.compile(r"\b429\b|rate.?limit|too many requests", re.IGNORECASE)
+
+
+def stage_priority(agent: str) -> int:
+    return STAGE_PRIORITIES.get(agent.removesuffix(" (batched)"), DEFAULT_PRIORITY)
+
+
+def estimate_tokens(prompt: str) -> int:
+    """Tokens reserved for a call before its usage is known."""
+    return len(prompt) // 4 + settings.LLM_EXPECTED_RESPONSE_TOKENS
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    for source in (error, getattr(error, "response", None)):
+        if getattr(source, "status_code", None) == 429 or getattr(source, "status", None) == 429:
+            return True
+    return bool(RATE_LIMIT_PATTERN.search(str(error)))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header on the error's response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Per-minute budget refilled continuously, with `burst` seconds' worth of burst
+    (providers enforce per-minute limits over shorter windows too).
+    `per_minute` <= 0 means unlimited. Guarded by the scheduler's lock.
+    """
+
+    def __init__(self, per_minute: float, burst: float = 1.0):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available; requests larger than the bucket wait for a full one."""
+        if self.rate <= 0:
+            return 0.0
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        """Negative amounts give back an over-reservation."""
+        if self.rate > 0:
+            self.level = min(self.capacity, self.level - amount)
+
+
+class Ticket:
+    __slots__ = ("agent", "ticker", "priority", "estimate", "tokens", "enqueued", "started", "ready")
+
+    def __init__(self, agent: str, ticker: str, priority: Tuple[int, int], estimate: int):
+        self.agent = agent
+        self.ticker = ticker
+        self.priority = priority
+        self.estimate = estimate
+        self.tokens: Optional[int] = None  # actual usage, set by the caller when known
+        self.enqueued = time.monotonic()
+        self.started = 0.0
+        self.ready = threading.Event()
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM provider. Callers wrap each call in
+    `with scheduler.request(agent, ticker, tokens) as ticket:` and may set
+    `ticket.tokens` to the actual usage, which corrects the token budget.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        initial_concurrency: Optional[int] = None,
+        target_latency: Optional[float] = None,
+        backoff: Optional[float] = None,
+        held_tickers: Optional[Iterable[str]] = None,
+        processes: Optional[int] = None,
+    ):
+        # Budgets are for the whole run; `processes` schedulers share them.
+        self.processes = max(1, processes or settings.process_count())
+        requests_per_minute = settings.LLM_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        tokens_per_minute = settings.LLM_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute / self.processes)
+        self.tokens = TokenBucket(tokens_per_minute / self.processes)
+        self.max_concurrency = max(1, (max_concurrency or settings.LLM_MAX_CONCURRENCY) // self.processes)
+        self.limit = float(min(self.max_concurrency, initial_concurrency or settings.MAX_WORKERS))
+        self.target_latency = settings.LLM_TARGET_LATENCY if target_latency is None else target_latency
+        self.backoff = settings.LLM_RATE_LIMIT_BACKOFF if backoff is None else backoff
+        self.held_tickers = frozenset(settings.HELD_TICKERS if held_tickers is None else held_tickers)
+
+        self.in_flight = 0
+        self._queues: Dict[Tuple[int, int], "OrderedDict[str, Deque[Ticket]]"] = {}
+        self._queued = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._timer_due = 0.0
+        self._lock = threading.Lock()
+
+        self.dispatched = 0
+        self.rate_limited = 0
+        self.decreases = 0
+        self._waits: Dict[str, Tuple[int, float]] = {}
+
+    def hold(self, tickers: Iterable[str]) -> None:
+        """Replaces the set of tickers with an open position; their requests go first."""
+        with self._lock:
+            self.held_tickers = frozenset(tickers)
+
+    def priority(self, agent: str, ticker: str) -> Tuple[int, int]:
+        return (0 if ticker in self.held_tickers else 1, stage_priority(agent))
+
+    @contextmanager
+    def request(self, agent: str, ticker: str, tokens: int) -> Iterator[Ticket]:
+        ticket = self.acquire(agent, ticker, tokens)
+        try:
+            yield ticket
+        except BaseException as error:
+            self.release(ticket, error)
+            raise
+        self.release(ticket)
+
+    def acquire(self, agent: str, ticker: str, tokens: int) -> Ticket:
+        """Blocks until the request may be sent."""
+        ticket = Ticket(agent, ticker, self.priority(agent, ticker), tokens)
+        with self._lock:
+            self._queues.setdefault(ticket.priority, OrderedDict()).setdefault(ticker, deque()).append(ticket)
+            self._queued += 1
+            self._dispatch()
+        ticket.ready.wait()
+        return ticket
+
+    def release(self, ticket: Ticket, error: Optional[BaseException] = None) -> None:
+        now = time.monotonic()
+        latency = now - ticket.started
+        with self._lock:
+            self.in_flight -= 1
+            if ticket.tokens is not None:
+                self.tokens.take(ticket.tokens - ticket.estimate)
+
+            if error is not None and is_rate_limited(error):
+                self.rate_limited += 1
+                pause = retry_after(error)
+                self._paused_until = max(self._paused_until, now + (self.backoff if pause is None else pause))
+                self._decrease(ticket, now)
+            elif error is None and self.target_latency > 0 and latency > self.target_latency:
+                self._decrease(ticket, now)
+            elif error is None:
+                # +1 per `limit` successes, i.e. about one step per round trip at full load.
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._dispatch()
+
+    def _decrease(self, ticket: Ticket, now: float) -> None:
+        # Calls sent before the last decrease reflect the old limit; cut at most once per round trip.
+        if ticket.started < self._last_decrease:
+            return
+        self.limit = max(1.0, self.limit / 2)
+        self._last_decrease = now
+        self.decreases += 1
+
+    def _dispatch(self) -> None:
+        """Releases queued requests while concurrency and budgets allow. Called with the lock held."""
+        now = time.monotonic()
+        while self._queued and self.in_flight < int(self.limit):
+            priority = min(self._queues)
+            tickers = self._queues[priority]
+            ticker, queue = next(iter(tickers.items()))
+            ticket = queue[0]
+
+            wait = max(
+                self._paused_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(ticket.estimate, now),
+            )
+            if wait > 0:
+                self._wake_in(wait, now)
+                return
+
+            queue.popleft()
+            if queue:
+                tickers.move_to_end(ticker)
+            else:
+                del tickers[ticker]
+            if not tickers:
+                del self._queues[priority]
+            self._queued -= 1
+
+            self.requests.take(1)
+            self.tokens.take(ticket.estimate)
+            self.in_flight += 1
+            self.dispatched += 1
+            count, total = self._waits.get(ticket.agent, (0, 0.0))
+            self._waits[ticket.agent] = (count + 1, total + now - ticket.enqueued)
+            ticket.started = now
+            ticket.ready.set()
+
+    def _wake_in(self, wait: float, now: float) -> None:
+        if self._timer is not None and self._timer_due <= now + wait:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(wait, self._wake)
+        self._timer.daemon = True
+        self._timer_due = now + wait
+        self._timer.start()
+
+    def _wake(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "concurrency_limit": self.limit,
+                "in_flight": self.in_flight,
+                "queued": self._queued,
+                "dispatched": self.dispatched,
+                "rate_limited": self.rate_limited,
+                "decreases": self.decreases,
+                "mean_queue_wait": {agent: total / count for agent, (count, total) in self._waits.items()},
+            }
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,156 @@
+"""
+Streaming Decisions
+Streams agent completions and parses the decision while tokens arrive. The
+decision is published to a DecisionFeed (and from there to a Pathway table) as
+soon as its marker appears, and generation can be stopped a fixed number of
+characters after it, since the narrative that follows matters less than the
+time to decision.
+"""
+
+import re
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, Optional, Pattern, Tuple
+
+import pathway as pw
+
+from src.llm.cache import CachedResponse, cached_response
+from src.llm.events import EventHub, EventSubject, read_events
+from src.llm.metrics import MetricsRegistry, invoke_llm, metrics
+from src.llm.prompts import prefix_cache_hints
+from src.llm.scheduler import LLMScheduler, estimate_tokens, llm_scheduler
+
+
+PROPOSAL_MARKER = re.compile(r"FINAL TRANSACTION PROPOSAL:\W*(BUY|SELL|HOLD)\b")
+DIRECTIVE_MARKER = re.compile(r"DECISION\W{0,8}(BUY|SELL|HOLD)\b", re.IGNORECASE)
+
+
+class DecisionEventSchema(pw.Schema):
+    agent: str
+    ticker: str
+    decision: str
+    seconds_to_decision: float
+
+
+class DecisionFeed:
+    """Latest streamed decision per (agent, ticker), also fanned out as events."""
+
+    def __init__(self):
+        self.events = EventHub()
+        self._latest: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, agent: str, ticker: str, decision: str, seconds_to_decision: float) -> None:
+        with self._lock:
+            self._latest[(agent, ticker)] = decision
+        self.events.publish((agent, ticker, decision, seconds_to_decision))
+
+    def latest(self, agent: str, ticker: str) -> Optional[str]:
+        with self._lock:
+            return self._latest.get((agent, ticker))
+
+
+decisions = DecisionFeed()
+
+
+def stream_decision(
+    llm: Any,
+    prompt: str,
+    agent: str,
+    ticker: str,
+    marker: Pattern[str],
+    stop_after: Optional[int] = None,
+    feed: Optional[DecisionFeed] = None,
+    registry: Optional[MetricsRegistry] = None,
+    scheduler: Optional[LLMScheduler] = None,
+) -> str:
+    """
+    Streams the completion of `prompt` and returns its text, like invoke_llm.
+
+    The first `marker` match (group 1 is the decision) is published to `feed` as soon
+    as it arrives. With `stop_after` >= 0, generation stops once that many characters
+    followed the decision. Models without `stream` are invoked as usual.
+    """
+    feed = feed or decisions
+    registry = registry or metrics
+    if not hasattr(llm, "stream"):
+        text = invoke_llm(llm, prompt, agent, ticker, registry, scheduler)
+        match = marker.search(text)
+        if match:
+            feed.publish(agent, ticker, match.group(1).upper(), 0.0)
+        return text
+
+    # Cache hits skip the scheduler, like in invoke_llm.
+    cached = cached_response(llm, prompt)
+    if cached is None:
+        slot = (scheduler or llm_scheduler).request(agent, ticker, estimate_tokens(prompt))
+    else:
+        slot = nullcontext()
+
+    with slot as ticket:
+        start = time.perf_counter()
+        text = ""
+        scan_from = 0
+        decision_end = None
+        usage: Dict[str, int] = {}
+        cache_hit = False
+        stream = llm.stream(prompt, **prefix_cache_hints(prompt)) if cached is None else iter([cached])
+        try:
+            for chunk in stream:
+                text += chunk.content
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                cache_hit = cache_hit or isinstance(chunk, CachedResponse)
+
+                if decision_end is None:
+                    # Re-scan from the start of the last line, in case the marker spans chunks.
+                    match = marker.search(text, scan_from)
+                    if match:
+                        decision_end = match.end()
+                        feed.publish(agent, ticker, match.group(1).upper(), time.perf_counter() - start)
+                    else:
+                        scan_from = text.rfind("\n") + 1
+                if decision_end is not None and stop_after is not None and stop_after >= 0:
+                    if len(text) - decision_end >= stop_after:
+                        break
+        except Exception:
+            registry.record(agent, ticker, time.perf_counter() - start, len(prompt) // 4, len(text) // 4, error=True)
+            raise
+        finally:
+            # Closing the stream stops generation on the provider side.
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+        prompt_tokens = usage.get("input_tokens") or len(prompt) // 4
+        response_tokens = usage.get("output_tokens") or len(text) // 4
+        if ticket is not None:
+            ticket.tokens = prompt_tokens + response_tokens
+
+    registry.record(
+        agent,
+        ticker,
+        time.perf_counter() - start,
+        prompt_tokens,
+        response_tokens,
+        cache_hit=cache_hit,
+    )
+    if decision_end is not None and stop_after is not None and stop_after >= 0:
+        text = text[: decision_end + stop_after]
+    return text.strip()
+
+
+def create_decision_table(feed: Optional[DecisionFeed] = None) -> Tuple[pw.Table, EventSubject]:
+    """
+    Low-latency table with the latest streamed decision per (agent, ticker), updated as
+    soon as a decision marker arrives rather than when the agent's UDF completes.
+    The source runs until the returned subject is stopped.
+    """
+    events, subject = read_events((feed or decisions).events, DecisionEventSchema, "early_decisions")
+    table = events.groupby(pw.this.agent, pw.this.ticker).reduce(
+        pw.this.agent,
+        pw.this.ticker,
+        decision=pw.reducers.latest(pw.this.decision),
+        seconds_to_decision=pw.reducers.latest(pw.this.seconds_to_decision),
+    )
+    return table, subject
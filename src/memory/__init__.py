@@ -0,0 +1 @@
+__all__ = ['vector_memory']
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+Vector Memory
+Local, NumPy-backed memory of past situations and recommendations for the
+bull/bear analysts. Implements the `get_memories(query)` interface used by
+create_bull_bear_debate_pipeline.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9$%.]+")
+
+
+def hashing_embedder(dim: int) -> Callable[[Sequence[str]], np.ndarray]:
+    """
+    Returns a dependency-free embedder: signed feature hashing over word
+    unigrams and bigrams. Swap in a real embedding model via `embed_fn`.
+    """
+
+    def embed(texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                vectors[row, digest % dim] += 1.0 if digest >> 63 else -1.0
+        return vectors
+
+    return embed
+
+
+class VectorMemory:
+    """
+    Top-k cosine search over embedded situations.
+
+    Embeddings live in a growable float32 matrix (rows are L2-normalised, so a
+    search is one matrix-vector product). Results are cached per query until
+    the next insert, so repeated lookups for the same `analysis_summary`
+    across debate rounds cost a dictionary hit.
+    `version` is a digest of the stored texts, so caches of answers that used the
+    memory can tell when it changed.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[Sequence[str]], np.ndarray]] = None,
+        dim: Optional[int] = None,
+        n_matches: Optional[int] = None,
+        cache_size: int = 4096,
+    ):
+        self.dim = dim or settings.MEMORY_EMBEDDING_DIM
+        self.embed_fn = embed_fn or hashing_embedder(self.dim)
+        self.n_matches = n_matches or settings.MEMORY_TOP_K
+        self.cache_size = cache_size
+
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._size = 0
+        self._situations: List[str] = []
+        self._recommendations: List[str] = []
+        self.version = hashlib.sha1().hexdigest()
+        self._cache: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.cache_hits = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _advance_version(self, situations: Sequence[str], recommendations: Sequence[str]) -> None:
+        # Chained per entry, so the version depends on the entries and not on how they were batched.
+        version = self.version
+        for situation, recommendation in zip(situations, recommendations):
+            version = hashlib.sha1(json.dumps([version, situation, recommendation]).encode()).hexdigest()
+        self.version = version
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self.embed_fn(list(texts)), dtype=np.float32).reshape(len(texts), -1)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def add_situations(self, situations_and_advice: Sequence[Tuple[str, str]]) -> None:
+        """Batched insert of (situation, recommendation) pairs."""
+        if not situations_and_advice:
+            return
+        situations = [situation for situation, _ in situations_and_advice]
+        vectors = self._embed(situations)
+
+        with self._lock:
+            needed = self._size + len(vectors)
+            if needed > self._matrix.shape[0] or not self._matrix.flags.writeable:
+                capacity = max(needed, 2 * self._matrix.shape[0], 64)
+                grown = np.zeros((capacity, self.dim), dtype=np.float32)
+                grown[: self._size] = self._matrix[: self._size]
+                self._matrix = grown
+            self._matrix[self._size:needed] = vectors
+            self._size = needed
+            self._situations.extend(situations)
+            self._recommendations.extend(advice for _, advice in situations_and_advice)
+            self._advance_version(situations, [advice for _, advice in situations_and_advice])
+            self._cache.clear()
+
+    def get_memories(self, query: str, n_matches: Optional[int] = None) -> List[Dict[str, Any]]:
+        n_matches = n_matches or self.n_matches
+        key = (query, n_matches)
+        with self._lock:
+            self.lookups += 1
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return cached
+            if self._size == 0:
+                return []
+            matrix = self._matrix[: self._size]
+
+        scores = matrix @ self._embed([query])[0]
+        k = min(n_matches, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        memories = [
+            {
+                "matched_situation": self._situations[i],
+                "recommendation": self._recommendations[i],
+                "similarity_score": float(scores[i]),
+            }
+            for i in top
+        ]
+
+        with self._lock:
+            self._cache[key] = memories
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return memories
+
+    def save(self, path: Path) -> None:
+        """
+        Writes `<path>.npy` (embeddings) and `<path>.json` (texts). Each file is written
+        next to its target and renamed into place, so saving over the files a loaded
+        memory maps (see load) does not truncate them under the mapping.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            matrix_path, meta_path = path.with_suffix(".npy"), path.with_suffix(".json")
+            temporary = matrix_path.with_suffix(".npy.tmp")
+            with open(temporary, "wb") as f:
+                np.save(f, self._matrix[: self._size])
+            os.replace(temporary, matrix_path)
+
+            temporary = meta_path.with_suffix(".json.tmp")
+            with open(temporary, "w") as f:
+                json.dump({"dim": self.dim, "situations": self._situations, "recommendations": self._recommendations}, f)
+            os.replace(temporary, meta_path)
+
+    @classmethod
+    def load(
+        cls,
+        path: Path,
+        embed_fn: Optional[Callable[[Sequence[str]], np.ndarray]] = None,
+        n_matches: Optional[int] = None,
+    ) -> "VectorMemory":
+        """Loads a saved index; embeddings are memory-mapped read-only until the next insert."""
+        path = Path(path)
+        with open(path.with_suffix(".json"), "r") as f:
+            meta = json.load(f)
+        memory = cls(embed_fn=embed_fn, dim=meta["dim"], n_matches=n_matches)
+        memory._matrix = np.load(path.with_suffix(".npy"), mmap_mode="r")
+        memory._size = memory._matrix.shape[0]
+        memory._situations = meta["situations"]
+        memory._recommendations = meta["recommendations"]
+        memory._advance_version(memory._situations, memory._recommendations)
+        return memory
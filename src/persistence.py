@@ -0,0 +1,37 @@
+"""
+Pipeline Persistence
+Runs the agent pipeline with Pathway's persistence backend on the local
+filesystem. Input offsets and the results of the LLM stages whose inputs
+determine their answer (see llm_udf's `cache_name`) are stored, so after a
+crash completed stages are restored and only unfinished work calls the LLM
+again. Cache names carry a version of the models, prompt templates and stage
+options, so changing any of them starts from an empty cache. The data analyst
+team fetches fresh data on every call and is never restored.
+"""
+
+from pathlib import Path
+from typing import Any, Optional
+
+import pathway as pw
+
+from config.settings import settings
+
+
+def create_persistence_config(
+    persistence_dir: Optional[Path] = None,
+    snapshot_interval_ms: Optional[int] = None,
+) -> Optional[pw.persistence.Config]:
+    """Filesystem persistence config, or None when persistence is disabled."""
+    persistence_dir = persistence_dir or settings.PERSISTENCE_DIR
+    if persistence_dir is None:
+        return None
+    Path(persistence_dir).mkdir(parents=True, exist_ok=True)
+    return pw.persistence.Config(
+        pw.persistence.Backend.filesystem(str(persistence_dir)),
+        snapshot_interval_ms=settings.PERSISTENCE_SNAPSHOT_MS if snapshot_interval_ms is None else snapshot_interval_ms,
+    )
+
+
+def run(persistence_dir: Optional[Path] = None, **kwargs: Any) -> None:
+    """`pw.run` with checkpointing enabled when a persistence directory is configured."""
+    pw.run(persistence_config=create_persistence_config(persistence_dir), **kwargs)
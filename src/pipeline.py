@@ -0,0 +1,100 @@
+"""
+Investment Pipeline
+Chains the agent stages into one pipeline: bull/bear debate -> research
+manager (judge) -> trader -> risk debate -> portfolio manager. With a news
+stream, the news reports are built from it first (see src.agents.news_analyst).
+"""
+
+from typing import Any, Iterable, Optional
+
+import pathway as pw
+
+from src.agents.bull_bear_debate import create_bull_bear_debate_pipeline
+from src.agents.change_detection import ChangeDetector
+from src.agents.judge import create_judge_pipeline
+from src.agents.news_analyst import create_news_report_pipeline, with_news_reports
+from src.agents.portfolio_manager import create_portfolio_manager_pipeline
+from src.agents.risk_debate import create_risk_debate_pipeline
+from src.agents.trader import create_trader_pipeline
+from src.llm.cascade import ModelCascade
+from src.memory.vector_memory import VectorMemory
+from src.runner import shard_by_ticker
+
+
+class ReportSchema(pw.Schema):
+    """Per-ticker analyst reports, the input of create_investment_pipeline."""
+
+    ticker: str
+    market_report: str
+    news_report: str
+    social_media_report: str
+    fundamentals_report: str
+
+
+def create_investment_pipeline(
+    input_stream: pw.Table,
+    quick_llm: Any,
+    deep_llm: Any = None,
+    bull_memory: Any = None,
+    bear_memory: Any = None,
+    num_rounds: int = 1,
+    risk_rounds: int = 1,
+    executor: Any = None,
+    simultaneous_risk_rounds: bool = False,
+    change_detector: Optional[ChangeDetector] = None,
+    prompt_batch_size: Optional[int] = None,
+    pinned_agents: Optional[Iterable[str]] = None,
+    stream_decisions: Optional[bool] = None,
+    news: Optional[pw.Table] = None,
+) -> pw.Table:
+    """
+    Builds the full agent chain on a table of per-ticker reports
+    (`ticker`, `market_report`, `news_report`, `social_media_report`, `fundamentals_report`).
+    Stages run on a ModelCascade: debate turns and the trader use `quick_llm` and escalate
+    to `deep_llm` when their answer is ambiguous; `pinned_agents` (default
+    Settings.DEEP_PINNED_AGENTS: the judge and portfolio manager) always use `deep_llm`.
+    Pass a ready ModelCascade as `quick_llm` to share its escalation stats.
+    Rows are sharded by ticker, so with several workers (see src.runner) every stage
+    of a ticker runs on the same worker. `prompt_batch_size` packs the judge, trader and
+    portfolio manager requests of several tickers into one LLM call. `stream_decisions`
+    streams the trader and portfolio manager and publishes their decisions early
+    (see src.llm.streaming.create_decision_table). With `news` (a read_news table), each
+    ticker's `news_report` is replaced by summaries of its latest stories, each story
+    summarized once for all the tickers it mentions.
+    """
+    if isinstance(quick_llm, ModelCascade):
+        cascade = quick_llm
+    else:
+        cascade = ModelCascade(quick_llm, deep_llm, pinned=pinned_agents)
+    bull_memory = bull_memory or VectorMemory()
+    bear_memory = bear_memory or VectorMemory()
+    if news is not None:
+        input_stream = with_news_reports(input_stream, create_news_report_pipeline(news, cascade, executor=executor))
+
+    debate_table = create_bull_bear_debate_pipeline(
+        shard_by_ticker(input_stream), cascade, bull_memory, bear_memory,
+        num_rounds=num_rounds, executor=executor, change_detector=change_detector,
+    )
+    judge_table = create_judge_pipeline(
+        debate_table, cascade, executor=executor, change_detector=change_detector,
+        prompt_batch_size=prompt_batch_size,
+    )
+    trader_table = create_trader_pipeline(
+        judge_table.with_columns(research_team_plan=pw.this.judge_investment_plan),
+        cascade, executor=executor, change_detector=change_detector,
+        prompt_batch_size=prompt_batch_size, stream=stream_decisions,
+    )
+    risk_table = create_risk_debate_pipeline(
+        trader_table, cascade,
+        num_rounds=risk_rounds, executor=executor,
+        simultaneous_rounds=simultaneous_risk_rounds, change_detector=change_detector,
+    )
+    decision_table = create_portfolio_manager_pipeline(
+        risk_table.with_columns(
+            trader_plan=pw.this.trader_investment_plan,
+            risk_debate=pw.this.risk_debate_history,
+        ),
+        cascade, executor=executor, change_detector=change_detector,
+        prompt_batch_size=prompt_batch_size, stream=stream_decisions,
+    )
+    return decision_table
@@ -0,0 +1,155 @@
+"""
+Sharded Runner
+Runs the agent pipeline on several Pathway worker processes. Rows are sharded
+by ticker, so every stage and every debate round for a ticker runs on the same
+worker, next to that worker's per-ticker state (change detector, debate
+summaries, memory caches). Input is ingested in Settings.BATCH_SIZE batches.
+
+Typical use, from a program's entry point:
+
+    def build():
+        reports = read_batched(rows, ReportSchema)
+        pw.io.subscribe(create_investment_pipeline(reports, llm), on_change=...)
+
+    run_sharded(build, processes=4)
+"""
+
+import itertools
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pathway as pw
+
+from config.settings import settings
+from src import persistence
+
+
+def default_processes() -> int:
+    """Settings.PIPELINE_PROCESSES, or one process per core capped at Settings.MAX_WORKERS."""
+    if settings.PIPELINE_PROCESSES > 0:
+        return settings.PIPELINE_PROCESSES
+    return max(1, min(os.cpu_count() or 1, settings.MAX_WORKERS))
+
+
+def shard_by_ticker(table: pw.Table) -> pw.Table:
+    """
+    Re-keys rows so that Pathway places them by `ticker`.
+    Downstream `with_columns` stages keep the key, so a ticker never changes worker.
+    """
+    return table.with_id_from(pw.this.id, instance=pw.this.ticker)
+
+
+class BatchedSubject(pw.io.python.ConnectorSubject):
+    """
+    Emits `rows` (dicts matching the schema), committing every `batch_size` rows.
+    With persistence, the number of committed rows is stored as the offset, so a
+    restarted run skips the rows it already ingested.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], batch_size: Optional[int] = None):
+        super().__init__()
+        self.rows = rows
+        self.batch_size = batch_size or settings.BATCH_SIZE
+        self.offset = 0
+
+    def _seek(self, state: bytes) -> None:
+        self.offset = int(state.decode())
+
+    def run(self) -> None:
+        pending = 0
+        for row in itertools.islice(self.rows, self.offset, None):
+            self.next(**row)
+            pending += 1
+            if pending == self.batch_size:
+                self._commit_batch(pending)
+                pending = 0
+        if pending:
+            self._commit_batch(pending)
+
+    def _commit_batch(self, rows: int) -> None:
+        self.offset += rows
+        self._report_offset(str(self.offset).encode())
+        self.commit()
+
+
+def read_batched(
+    rows: Iterable[Dict[str, Any]],
+    schema: type[pw.Schema],
+    batch_size: Optional[int] = None,
+    name: Optional[str] = None,
+) -> pw.Table:
+    """Table of `rows`, ingested in `batch_size` batches."""
+    return pw.io.python.read(
+        BatchedSubject(rows, batch_size), schema=schema, autocommit_duration_ms=None, name=name
+    )
+
+
+def spawn_workers(
+    processes: int,
+    threads: int = 1,
+    first_port: int = 10000,
+    argv: Optional[List[str]] = None,
+) -> int:
+    """
+    Launches `argv` (the current command line by default) once per process with the
+    environment Pathway uses to form a multi-process cluster, as `pathway spawn` does.
+    Returns the first non-zero exit code, terminating the other processes, or 0.
+    """
+    argv = argv or list(sys.orig_argv)
+    env = dict(os.environ)
+    env.update(
+        PATHWAY_PROCESSES=str(processes),
+        PATHWAY_THREADS=str(threads),
+        PATHWAY_FIRST_PORT=str(first_port),
+        PATHWAY_RUN_ID=env.get("PATHWAY_RUN_ID", f"sharded-{os.getpid()}-{time.time_ns()}"),
+        PATHWAY_START_TIMESTAMP_MS=str(int(time.time() * 1000)),
+        PATHWAY_SUPPRESS_OTHER_WORKER_ERRORS="1",
+    )
+    handles = [
+        subprocess.Popen(argv, env=dict(env, PATHWAY_PROCESS_ID=str(process_id)))
+        for process_id in range(processes)
+    ]
+
+    try:
+        while handles:
+            for handle in list(handles):
+                code = handle.poll()
+                if code is None:
+                    continue
+                handles.remove(handle)
+                if code != 0:
+                    return code
+            time.sleep(0.1)
+        return 0
+    finally:
+        for handle in handles:
+            handle.terminate()
+            handle.wait()
+
+
+def run_sharded(
+    build: Callable[[], Any],
+    processes: Optional[int] = None,
+    threads: int = 1,
+    first_port: int = 10000,
+    **run_kwargs: Any,
+) -> int:
+    """
+    Builds the graph with `build()` and runs it on `processes` worker processes.
+
+    Call it from the program's entry point: outside a Pathway cluster it relaunches
+    the program once per process and waits for them; inside, each process builds the
+    same graph and runs its share of the tickers. Python input connectors are read by
+    the first process and their rows are distributed by ticker; outputs are gathered
+    back, so sinks see every ticker once. `run_kwargs` go to src.persistence.run.
+    """
+    processes = processes or default_processes()
+    if processes > 1 and "PATHWAY_PROCESS_ID" not in os.environ:
+        return spawn_workers(processes, threads, first_port)
+
+    build()
+    persistence.run(**run_kwargs)
+    return 0
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import src.backtest as backtest
+from src.backtest import run_backtest, score_decisions
+
+
+def prices_of(rows):
+    tickers, dates, closes = zip(*rows) if rows else ((), (), ())
+    return np.array(tickers, dtype=str), np.array(dates, dtype=str), np.array(closes, dtype=np.float64)
+
+
+def test_score_decisions():
+    prices = prices_of([
+        ("AAPL", "2024-01-01", 100.0), ("AAPL", "2024-01-02", 110.0),
+        ("MSFT", "2024-01-01", 200.0), ("MSFT", "2024-01-02", 190.0),
+    ])
+    scores = score_decisions(
+        np.array(["AAPL", "MSFT", "MSFT"]), np.array(["2024-01-01", "2024-01-01", "2024-01-02"]),
+        np.array(["BUY", "SELL", "BUY"]), prices,
+    )
+    assert scores["priced"] == 2  # the last MSFT day has no next close
+    assert scores["trades"] == 2
+    assert scores["hit_rate"] == 1.0
+    assert scores["total_return"] == pytest.approx(0.075)
+
+
+def test_score_decisions_without_prices():
+    scores = score_decisions(
+        np.array(["AAPL"]), np.array(["2024-01-01"]), np.array(["BUY"]), prices_of([])
+    )
+    assert scores["decisions"] == 1
+    assert scores["priced"] == scores["trades"] == 0
+    assert scores["total_return"] == 0.0
+
+
+class PipelineBuilt(Exception):
+    pass
+
+
+def test_run_backtest_pins_replayable_prompts(monkeypatch, tmp_path):
+    seen = {}
+
+    def capture(reports, quick, deep, **kwargs):
+        seen.update(kwargs)
+        raise PipelineBuilt
+
+    monkeypatch.setattr(backtest, "read_reports", lambda path: None)
+    monkeypatch.setattr(backtest, "create_investment_pipeline", capture)
+    with pytest.raises(PipelineBuilt):
+        run_backtest(tmp_path / "reports.jsonl", "quick", cache_dir=tmp_path, prompt_batch_size=8, stream_decisions=True)
+    assert seen["prompt_batch_size"] == 1
+    assert seen["stream_decisions"] is False
@@ -0,0 +1,114 @@
+import threading
+
+from src.llm.batching import REQUEST_PATTERN, PromptBatcher, parse_batch_response
+from src.llm.cache import CachedResponse
+
+INSTRUCTIONS = "You are the trader. Propose a transaction."
+
+
+class BatchLLM:
+    """Answers "### ANSWER <n>" for every request of a batch prompt, except those in `drop`."""
+
+    def __init__(self, drop=(), fail=False):
+        self.drop = set(drop)
+        self.fail = fail
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise RuntimeError("provider error")
+        numbers = [int(n) for n in REQUEST_PATTERN.findall(prompt)]
+        return CachedResponse("\n".join(f"### ANSWER {n}\nbatched {n}" for n in numbers if n not in self.drop))
+
+
+def run_batch(batcher, tickers):
+    """Invokes the batcher concurrently for `tickers`; returns {ticker: answer} and the single calls."""
+    answers = {}
+
+    def ask(ticker):
+        answers[ticker] = batcher.invoke(ticker, f"{INSTRUCTIONS}\n{ticker} report")
+
+    threads = [threading.Thread(target=ask, args=(ticker,)) for ticker in tickers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return answers
+
+
+def make_batcher(llm, singles, **kwargs):
+    def single_call(ticker, prompt):
+        singles.append(ticker)
+        return f"single {ticker}"
+
+    kwargs.setdefault("max_wait_ms", 5000)
+    return PromptBatcher(llm, "Trader", INSTRUCTIONS, single_call=single_call, **kwargs)
+
+
+def test_full_batch_is_sent_once_by_the_leader():
+    llm, singles = BatchLLM(), []
+    batcher = make_batcher(llm, singles, max_batch=3)
+
+    answers = run_batch(batcher, ["AAPL", "MSFT", "NVDA"])
+
+    assert len(llm.prompts) == 1
+    assert llm.prompts[0].count(INSTRUCTIONS) == 1
+    assert sorted(answers.values()) == ["batched 1", "batched 2", "batched 3"]
+    assert singles == []
+    assert batcher.stats() == {"batches": 1, "batched_requests": 3, "fallbacks": 0}
+
+
+def test_leader_sends_a_partial_batch_after_max_wait():
+    llm, singles = BatchLLM(), []
+    batcher = make_batcher(llm, singles, max_batch=8, max_wait_ms=200)
+
+    answers = run_batch(batcher, ["AAPL", "MSFT"])
+
+    assert len(llm.prompts) == 1
+    assert sorted(answers.values()) == ["batched 1", "batched 2"]
+
+
+def test_lone_request_is_sent_on_its_own():
+    llm, singles = BatchLLM(), []
+    batcher = make_batcher(llm, singles, max_batch=8, max_wait_ms=10)
+
+    assert run_batch(batcher, ["AAPL"]) == {"AAPL": "single AAPL"}
+    assert llm.prompts == []
+
+
+def test_missing_and_invalid_answers_fall_back_to_single_calls():
+    llm, singles = BatchLLM(drop=[2]), []
+    batcher = make_batcher(llm, singles, max_batch=3, validate=lambda answer: answer != "batched 3")
+
+    answers = run_batch(batcher, ["AAPL", "MSFT", "NVDA"])
+
+    assert len(llm.prompts) == 1
+    assert len(singles) == 2
+    assert sorted(answers.values()) == sorted(["batched 1"] + [f"single {ticker}" for ticker in singles])
+    assert batcher.stats()["fallbacks"] == 2
+
+
+def test_failed_batch_call_falls_back_for_every_request():
+    llm, singles = BatchLLM(fail=True), []
+    batcher = make_batcher(llm, singles, max_batch=2)
+
+    answers = run_batch(batcher, ["AAPL", "MSFT"])
+
+    assert answers == {"AAPL": "single AAPL", "MSFT": "single MSFT"}
+    assert sorted(singles) == ["AAPL", "MSFT"]
+
+
+def test_unbatchable_prompts_skip_the_batch():
+    llm, singles = BatchLLM(), []
+    batcher = make_batcher(llm, singles, max_batch=1)
+    assert batcher.invoke("AAPL", f"{INSTRUCTIONS}\nAAPL report") == "single AAPL"
+
+    batcher = make_batcher(llm, singles, max_batch=4)
+    assert batcher.invoke("MSFT", "Another agent's prompt") == "single MSFT"
+    assert llm.prompts == []
+
+
+def test_parse_batch_response_drops_repeated_empty_and_unknown_answers():
+    response = "### ANSWER 1\nbuy\n### ANSWER 2\n\n### ANSWER 3\nsell\n## ANSWER 3:\nhold\n### ANSWER 9\nx"
+    assert parse_batch_response(response, 4) == {1: "buy"}
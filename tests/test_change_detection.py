@@ -0,0 +1,68 @@
+from src.agents.change_detection import ChangeDetector, ChangeRule, run_stage
+
+SUMMARY = "revenue beat estimates margins expanded guidance raised buyback announced"  # 9 words
+
+
+def runner(detector, stage="Trader", ticker="AAPL"):
+    outputs = iter(range(100))
+
+    def run(context, state=""):
+        return run_stage(detector, stage, ticker, context, lambda: next(outputs), state=state)
+
+    return run
+
+
+def test_default_rule_skips_only_normalized_duplicates():
+    detector = ChangeDetector(ChangeRule(min_change=0.0))
+    run = runner(detector)
+
+    assert run(SUMMARY) == 0
+    assert run("  Revenue BEAT estimates, margins expanded; guidance raised. Buyback announced!") == 0
+    assert run(SUMMARY + " again") == 1
+    assert detector.stats() == {"evaluated": 2, "skipped": 1, "entries": 1}
+
+
+def test_changes_within_min_change_are_skipped():
+    detector = ChangeDetector(ChangeRule(min_change=0.2))
+    run = runner(detector)
+
+    assert run(SUMMARY) == 0
+    # One new word out of 10: change 0.1 <= 0.2.
+    assert run(SUMMARY + " quietly") == 0
+    # Three new words out of 12: change 0.25 > 0.2.
+    assert run(SUMMARY + " ceo resigned unexpectedly") == 1
+
+
+def test_small_changes_are_measured_against_the_last_run():
+    detector = ChangeDetector(ChangeRule(min_change=0.2))
+    run = runner(detector)
+
+    assert run(SUMMARY) == 0
+    assert run(SUMMARY + " one") == 0
+    assert run(SUMMARY + " one two") == 0
+    # 3 words away from the input the stage last ran on, though 1 from the previous one.
+    assert run(SUMMARY + " one two three") == 1
+
+
+def test_state_must_match_exactly():
+    detector = ChangeDetector(ChangeRule(min_change=0.5))
+    run = runner(detector)
+
+    assert run(SUMMARY, state="Bull: buy") == 0
+    assert run(SUMMARY, state="Bull: buy") == 0
+    assert run(SUMMARY, state="Bull: buy.") == 1
+
+
+def test_stages_and_tickers_are_tracked_separately():
+    detector = ChangeDetector()
+    outputs = []
+    for stage, ticker in [("Trader", "AAPL"), ("Trader", "MSFT"), ("Judge", "AAPL"), ("Trader", "AAPL")]:
+        outputs.append(run_stage(detector, stage, ticker, SUMMARY, lambda: (stage, ticker)))
+
+    assert outputs[3] == ("Trader", "AAPL")
+    assert detector.stats() == {"evaluated": 3, "skipped": 1, "entries": 3}
+
+
+def test_without_a_detector_every_call_runs():
+    run = runner(None)
+    assert [run(SUMMARY) for _ in range(3)] == [0, 1, 2]
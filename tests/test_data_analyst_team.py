@@ -0,0 +1,46 @@
+import pathway as pw
+
+from benchmarks.mock_llm import MockLLM
+from src.agents.data_analyst_team import ANALYSTS, DataSource, SourceCache, create_data_analyst_team_pipeline
+
+
+class TickerSchema(pw.Schema):
+    ticker: str
+
+
+class RecordingLLM(MockLLM):
+    def __init__(self):
+        super().__init__(latency=0.0)
+        self.prompts = []
+
+    def invoke(self, prompt, **kwargs):
+        with self._lock:
+            self.prompts.append(str(prompt))
+        return super().invoke(prompt)
+
+
+def test_team_writes_every_report_from_shared_sources():
+    fetched = []
+
+    def fetch(name):
+        def fetch_ticker(ticker):
+            fetched.append((name, ticker))
+            return f"{name} data for {ticker}"
+        return DataSource(fetch_ticker)
+
+    sources = SourceCache({name: fetch(name) for name in ("market_data", "news", "social_media", "fundamentals")})
+    llm = RecordingLLM()
+    tickers = pw.debug.table_from_rows(TickerSchema, [("AAPL",), ("MSFT",)])
+    reports = create_data_analyst_team_pipeline(tickers, llm, sources, executor=pw.udfs.sync_executor())
+    result = pw.debug.table_to_pandas(reports).set_index("ticker")
+
+    assert sorted(result.columns) == sorted(ANALYSTS)
+    assert all(result[column].str.len().min() > 0 for column in ANALYSTS)
+    assert len(llm.prompts) == 2 * len(ANALYSTS)
+    # market_data is read by two analysts but fetched once per ticker.
+    assert sorted(fetched) == sorted(
+        (name, ticker) for name in sources.sources for ticker in ("AAPL", "MSFT")
+    )
+    # Each analyst's prompts start with its role.
+    assert all(any(p.lstrip().startswith(role.strip()) for _, role, _ in ANALYSTS.values()) for p in llm.prompts)
+    assert any("news data for AAPL" in p for p in llm.prompts)
@@ -0,0 +1,37 @@
+from src.agents.debate_context import DebateContext, append_turn
+
+
+class RecordingContext(DebateContext):
+    """DebateContext remembering the turns passed to every fold."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.folded = []
+
+    def fold(self, summary, new_turns, max_tokens):
+        self.folded.append(tuple(new_turns))
+        return super().fold(summary, new_turns, max_tokens)
+
+
+def test_each_new_turn_folds_exactly_one_turn():
+    context = RecordingContext(token_budget=200, keep_last_turns=2)
+    turns = ()
+    for i in range(10):
+        # Recent turns of varying length change the budget left for the summary.
+        turns = append_turn(turns, "Bull" if i % 2 else "Bear", f"Argument {i}. " + "detail " * (i * 7 % 40))
+        context.render(turns)
+
+    assert context.folded[0] == turns[:1]
+    assert all(len(new_turns) == 1 for new_turns in context.folded)
+    assert [new_turns[0] for new_turns in context.folded] == list(turns[:-2])
+
+
+def test_summary_fits_the_remaining_budget():
+    context = DebateContext(token_budget=100, keep_last_turns=2)
+    turns = ()
+    for i in range(20):
+        turns = append_turn(turns, "Risky", f"Point {i}. " + "x" * 120)
+    rendered = context.render(turns)
+
+    assert rendered.startswith("[Summary of earlier turns]")
+    assert len(rendered) <= 100 * 4 + 80
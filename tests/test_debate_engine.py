@@ -0,0 +1,123 @@
+import time
+
+import pathway as pw
+import pytest
+
+from src.agents.debate_engine import Participant, create_debate_udf
+from src.llm.executor import create_llm_executor
+
+
+class FlakyDebater:
+    """Answers with its name and turn number; raises on the turns listed in `fail_on` once."""
+
+    def __init__(self, name, fail_on=()):
+        self.name = name
+        self.fail_on = set(fail_on)
+        self.calls = []
+
+    def respond(self, ticker, topic, turns):
+        self.calls.append(len(turns))
+        if len(turns) in self.fail_on:
+            self.fail_on.discard(len(turns))
+            raise RuntimeError(f"{self.name} crashed")
+        return f"{self.name} on {ticker} #{len(turns)}"
+
+
+@pytest.mark.parametrize("simultaneous", [False, True])
+def test_interrupted_debate_resumes_from_last_completed_turn(tmp_path, monkeypatch, simultaneous):
+    monkeypatch.setenv("PATHWAY_PERSISTENT_STORAGE", str(tmp_path))
+    # The bear crashes on its second-round turn: turn 3 when speaking in order, 2 when simultaneous.
+    bull, bear = FlakyDebater("Bull"), FlakyDebater("Bear", fail_on=[2 if simultaneous else 3])
+    debate = create_debate_udf(
+        f"Resume {simultaneous}",
+        [Participant("Bull", bull.respond, ("quick",)), Participant("Bear", bear.respond, ("quick",))],
+        num_rounds=2,
+        executor=pw.udfs.sync_executor(),
+        simultaneous=simultaneous,
+    )
+
+    with pytest.raises(RuntimeError):
+        debate.func("AAPL", "topic")
+    bull_calls, bear_calls = len(bull.calls), len(bear.calls)
+    transcript = debate.func("AAPL", "topic")
+
+    assert transcript.count("\n") == 3
+    # Only the failed turn (and the turns after it) are asked again.
+    assert len(bull.calls) == bull_calls
+    assert len(bear.calls) - bear_calls == 1
+
+
+def test_turns_are_asked_again_when_participant_version_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATHWAY_PERSISTENT_STORAGE", str(tmp_path))
+    bull = FlakyDebater("Bull")
+    memory = {"version": "v1"}
+    debate = create_debate_udf(
+        "Versioned", [Participant("Bull", bull.respond, ("quick",), lambda: memory["version"])],
+        num_rounds=2, executor=pw.udfs.sync_executor(),
+    )
+
+    debate.func("AAPL", "topic")
+    debate.func("AAPL", "topic")
+    assert bull.calls == [0, 1]
+
+    memory["version"] = "v2"
+    debate.func("AAPL", "topic")
+    assert bull.calls == [0, 1, 0, 1]
+
+
+def test_debate_without_persistence_calls_every_turn(monkeypatch):
+    monkeypatch.delenv("PATHWAY_PERSISTENT_STORAGE", raising=False)
+    bull = FlakyDebater("Bull")
+    debate = create_debate_udf(
+        "No persistence", [Participant("Bull", bull.respond)], num_rounds=2, executor=pw.udfs.sync_executor()
+    )
+
+    debate.func("AAPL", "topic")
+    debate.func("AAPL", "topic")
+
+    assert bull.calls == [0, 1, 0, 1]
+
+
+class SlowDebater(FlakyDebater):
+    """Takes `latency` seconds per answer; the first call of each turn in `hang_on` takes `hang` seconds."""
+
+    def __init__(self, name, latency, hang_on=(), hang=0.0):
+        super().__init__(name)
+        self.latency = latency
+        self.hang_on = set(hang_on)
+        self.hang = hang
+        self.attempts = []
+
+    def respond(self, ticker, topic, turns):
+        self.attempts.append(len(turns))
+        if len(turns) in self.hang_on:
+            self.hang_on.discard(len(turns))
+            time.sleep(self.hang)
+        time.sleep(self.latency)
+        return super().respond(ticker, topic, turns)
+
+
+def run_debate_table(debate):
+    table = pw.debug.table_from_rows(TopicSchema, [("AAPL", "plan")])
+    return pw.debug.table_to_pandas(table.select(history=debate(pw.this.ticker, pw.this.topic))).history.iloc[0]
+
+
+class TopicSchema(pw.Schema):
+    ticker: str
+    topic: str
+
+
+def test_timeout_and_retries_apply_per_turn(monkeypatch):
+    monkeypatch.delenv("PATHWAY_PERSISTENT_STORAGE", raising=False)
+    debaters = [SlowDebater("Risky", 0.1), SlowDebater("Safe", 0.1, hang_on=[4], hang=1.0), SlowDebater("Neutral", 0.1)]
+    executor = create_llm_executor(async_mode=True, timeout=0.5, max_retries=1, retry_delay_ms=10)
+    debate = create_debate_udf(
+        "Timeouts", [Participant(d.name, d.respond) for d in debaters], num_rounds=3, executor=executor
+    )
+
+    # The debate takes longer than the timeout; only the hung turn exceeds it.
+    history = run_debate_table(debate)
+
+    assert history.count("\n") == 8
+    # Only the hung turn was asked again.
+    assert [d.attempts for d in debaters] == [[0, 3, 6], [1, 4, 4, 7], [2, 5, 8]]
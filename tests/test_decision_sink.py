@@ -0,0 +1,25 @@
+import pytest
+
+from src.decision_sink import DecisionIndex
+
+
+def test_lookup_on_full_index_returns_none_for_unknown_ticker(tmp_path):
+    index = DecisionIndex(tmp_path / "latest.idx", slots=4)
+    for number, ticker in enumerate(("AAPL", "MSFT", "NVDA", "TSLA")):
+        index.update(ticker, "BUY", 0, 0, number)
+
+    reader = DecisionIndex(tmp_path / "latest.idx", readonly=True)
+    assert reader.lookup("AMZN") is None
+    assert reader.lookup("NVDA")["row"] == 2
+    with pytest.raises(RuntimeError):
+        index.update("AMZN", "SELL", 0, 0, 4)
+
+
+def test_lookup_gives_up_on_slot_left_mid_update(tmp_path):
+    index = DecisionIndex(tmp_path / "latest.idx", slots=8)
+    index.update("AAPL", "BUY", 0, 0, 0)
+    slot = index._find(b"AAPL")
+    index._seq[slot] += 1  # writer died between the two seq bumps
+
+    with pytest.raises(RuntimeError, match="mid-update"):
+        index.lookup("AAPL")
@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+import src.llm.cache as cache
+from src.llm.cache import CachedLLM, CachedResponse
+
+
+class GatedLLM:
+    """Counts calls; each call blocks until `gate` is set. The first `failures` calls raise."""
+
+    model_name = "gated"
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.failures = 0
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        self.started.set()
+        self.gate.wait(5)
+        if self.calls <= self.failures:
+            raise RuntimeError("provider error")
+        return CachedResponse(f"answer to {prompt}")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock.time)
+    return clock
+
+
+def run_concurrently(llm, prompt, count):
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(llm.invoke(prompt).content)) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, answers
+
+
+def test_identical_concurrent_prompts_call_the_model_once(tmp_path):
+    model = GatedLLM()
+    llm = CachedLLM(model, cache_dir=tmp_path)
+
+    threads, answers = run_concurrently(llm, "AAPL?", 4)
+    model.started.wait(5)
+    model.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert model.calls == 1
+    assert answers == ["answer to AAPL?"] * 4
+    assert (llm.misses, llm.hits) == (1, 3)
+
+
+def test_waiters_retry_when_the_leader_fails(tmp_path):
+    model = GatedLLM()
+    model.failures = 1
+    llm = CachedLLM(model, cache_dir=tmp_path)
+    errors = []
+
+    def lead():
+        try:
+            llm.invoke("AAPL?")
+        except RuntimeError as error:
+            errors.append(error)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    model.started.wait(5)
+    threads, answers = run_concurrently(llm, "AAPL?", 2)
+    model.gate.set()
+    for thread in [leader, *threads]:
+        thread.join(5)
+
+    assert len(errors) == 1
+    assert answers == ["answer to AAPL?"] * 2
+    assert model.calls == 2  # the failed call and one retry for both waiters
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    model = GatedLLM()
+    model.gate.set()
+    llm = CachedLLM(model, cache_dir=tmp_path, ttl=60)
+
+    llm.invoke("AAPL?")
+    clock.now += 59
+    llm.invoke("AAPL?")
+    assert model.calls == 1
+
+    clock.now += 2
+    llm.invoke("AAPL?")
+    assert model.calls == 2
+
+
+def test_disk_entries_survive_restart_until_ttl(tmp_path, clock):
+    model = GatedLLM()
+    model.gate.set()
+    CachedLLM(model, cache_dir=tmp_path, ttl=60).invoke("AAPL?")
+
+    restarted = CachedLLM(model, cache_dir=tmp_path, ttl=60)
+    assert restarted.peek("AAPL?").content == "answer to AAPL?"
+    assert restarted.disk_hits == 1
+
+    clock.now += 61
+    assert CachedLLM(model, cache_dir=tmp_path, ttl=60).peek("AAPL?") is None
+
+
+def test_disk_store_is_trimmed_to_least_recently_used(tmp_path, clock):
+    model = GatedLLM()
+    model.gate.set()
+    llm = CachedLLM(model, cache_dir=tmp_path, max_memory_entries=1, max_disk_entries=5)
+
+    for i in range(5):
+        clock.now += 1
+        llm.invoke(f"prompt {i}")
+    clock.now += 1
+    llm.invoke("prompt 0")  # disk hit: prompt 0 becomes the most recently used
+    for i in range(5, 7):
+        clock.now += 1
+        llm.invoke(f"prompt {i}")
+
+    assert llm.stats()["disk_entries"] == 5
+    kept = {i for i in range(7) if llm.peek(f"prompt {i}") is not None}
+    assert kept == {0, 3, 4, 5, 6}
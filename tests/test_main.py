@@ -0,0 +1,24 @@
+import json
+
+from src.__main__ import report_rows
+
+COLUMNS = ["ticker", "market_report"]
+
+
+def test_report_rows_reads_json_lines_csv_and_directories(tmp_path):
+    (tmp_path / "reports.jsonl").write_text(
+        json.dumps({"ticker": "AAPL", "market_report": "up", "date": "2024-01-02"}) + "\n\n"
+        + json.dumps({"ticker": "MSFT", "market_report": "down"}) + "\n"
+    )
+    (tmp_path / "reports.csv").write_text("ticker,market_report,extra\nNVDA,flat,x\n")
+    directory = tmp_path / "daily"
+    directory.mkdir()
+    (directory / "2.jsonl").write_text(json.dumps({"ticker": "MSFT", "market_report": "b"}) + "\n")
+    (directory / "1.jsonl").write_text(json.dumps({"ticker": "AAPL", "market_report": "a"}) + "\n")
+
+    assert list(report_rows(tmp_path / "reports.jsonl", COLUMNS)) == [
+        {"ticker": "AAPL", "market_report": "up"},
+        {"ticker": "MSFT", "market_report": "down"},
+    ]
+    assert list(report_rows(tmp_path / "reports.csv", COLUMNS)) == [{"ticker": "NVDA", "market_report": "flat"}]
+    assert [row["ticker"] for row in report_rows(directory, COLUMNS)] == ["AAPL", "MSFT"]
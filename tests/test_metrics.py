@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from config.settings import settings
+from src.llm.metrics import start_exporters
+
+
+class RecordingRegistry:
+    def __init__(self):
+        self.files = []
+        self.ports = []
+
+    def start_file_writer(self, path, interval):
+        self.files.append(path)
+
+    def serve(self, port):
+        self.ports.append(port)
+
+
+def exporters_of(monkeypatch, processes, process_id):
+    monkeypatch.setattr(settings, "METRICS_FILE", Path("/tmp/metrics.prom"))
+    monkeypatch.setattr(settings, "METRICS_PORT", 9100)
+    monkeypatch.setenv("PATHWAY_PROCESSES", str(processes))
+    monkeypatch.setenv("PATHWAY_PROCESS_ID", str(process_id))
+    registry = RecordingRegistry()
+    start_exporters(registry)
+    return registry
+
+
+def test_single_process_uses_configured_port_and_file(monkeypatch):
+    registry = exporters_of(monkeypatch, 1, 0)
+    assert registry.ports == [9100]
+    assert registry.files == [Path("/tmp/metrics.prom")]
+
+
+def test_sharded_processes_get_their_own_port_and_file(monkeypatch):
+    registries = [exporters_of(monkeypatch, 3, i) for i in range(3)]
+    assert [r.ports for r in registries] == [[9100], [9101], [9102]]
+    assert [r.files[0].name for r in registries] == ["metrics.0.prom", "metrics.1.prom", "metrics.2.prom"]
@@ -0,0 +1,47 @@
+import pathway as pw
+
+from benchmarks.mock_llm import MockLLM
+from src.agents.news_analyst import create_news_report_pipeline, with_news_reports
+from src.connectors.news_connector import NewsSchema
+from src.pipeline import ReportSchema
+
+
+class CountingLLM(MockLLM):
+    """MockLLM counting the prompts it answers per headline."""
+
+    def __init__(self):
+        super().__init__(latency=0.0)
+        self.headlines = []
+
+    def invoke(self, prompt, **kwargs):
+        self.headlines.append(next(line for line in str(prompt).splitlines() if line.startswith("Headline:")))
+        return super().invoke(prompt)
+
+
+def news_rows(*rows):
+    return pw.debug.table_from_rows(NewsSchema, [
+        (article, cluster, ticker, "Wire", title, "", "", f"https://news.example/{article}", published_at)
+        for article, cluster, ticker, title, published_at in rows
+    ])
+
+
+def test_each_story_is_summarized_once_and_fanned_out():
+    news = news_rows(
+        ("a1", "a1", "AAPL", "Apple and Gartner partner", "2026-10-17T01:00:00Z"),
+        ("a1", "a1", "IT", "Apple and Gartner partner", "2026-10-17T01:00:00Z"),
+        ("b1", "b1", "AAPL", "Apple sued over patents", "2026-10-17T02:00:00Z"),
+    )
+    reports = pw.debug.table_from_rows(ReportSchema, [
+        ("AAPL", "market", "stale news", "social", "fundamentals"),
+        ("NVDA", "market", "nvidia news", "social", "fundamentals"),
+    ])
+    llm = CountingLLM()
+    news_reports = create_news_report_pipeline(news, llm, executor=pw.udfs.sync_executor())
+    merged = pw.debug.table_to_pandas(with_news_reports(reports, news_reports)).set_index("ticker")
+
+    assert sorted(llm.headlines) == ["Headline: Apple and Gartner partner", "Headline: Apple sued over patents"]
+    aapl = merged.loc["AAPL", "news_report"]
+    # Newest story first.
+    assert aapl.index("Apple sued over patents") < aapl.index("Apple and Gartner partner")
+    assert merged.loc["NVDA", "news_report"] == "nvidia news"
+    assert merged.loc["AAPL", "market_report"] == "market"
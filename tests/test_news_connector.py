@@ -0,0 +1,187 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.connectors.news_connector import (
+    NearDuplicateIndex, NewsAPIClient, NewsAPISubject, mentioned_tickers,
+)
+
+
+class StandInNewsAPI:
+    """Local stand-in for NewsAPI `/everything`: newest first, paged, with scripted 429s."""
+
+    def __init__(self):
+        self.articles = []
+        self.requests = []
+        self.rate_limited_pages = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                status, body = server.handle(params)
+                content = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def publish(self, count, start=0, query="Apple"):
+        for i in range(start, start + count):
+            self.articles.append({
+                "source": {"name": "Wire"},
+                "title": f"{query} story {i}",
+                "description": f"Report number {i} on {query}.",
+                "content": "",
+                "url": f"https://news.example/{query}/{i}",
+                "publishedAt": f"2026-10-17T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z",
+            })
+
+    def handle(self, params):
+        self.requests.append(params)
+        page, page_size = int(params.get("page", 1)), int(params["pageSize"])
+        if page in self.rate_limited_pages:
+            self.rate_limited_pages.discard(page)
+            return 429, {"status": "error", "code": "rateLimited", "message": "Too many requests"}
+        matching = [
+            a for a in self.articles
+            if params["q"] in a["title"] and a["publishedAt"] >= params.get("from", "")
+        ]
+        matching.sort(key=lambda a: a["publishedAt"], reverse=True)
+        articles = matching[(page - 1) * page_size:page * page_size]
+        return 200, {"status": "ok", "totalResults": len(matching), "articles": articles}
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class RecordingSubject(NewsAPISubject):
+    """NewsAPISubject keeping emitted rows instead of sending them to Pathway."""
+
+    def __init__(self, *args, **kwargs):
+        self.rows = []
+        super().__init__(*args, **kwargs)
+
+    def next(self, **row):
+        self.rows.append(row)
+
+
+@pytest.fixture
+def newsapi():
+    server = StandInNewsAPI()
+    yield server
+    server.close()
+
+
+def client_for(server, page_size=100, requests_per_day=None):
+    config = {
+        "base_url": server.url,
+        "page_size": page_size,
+        "rate_limits": {"requests_per_second": 1000, "requests_per_day": requests_per_day},
+    }
+    return NewsAPIClient(api_key="test", config=config)
+
+
+def subject_for(server, state_path, **client_kwargs):
+    return RecordingSubject(
+        {"AAPL": "Apple"}, client=client_for(server, **client_kwargs), max_polls=1, dedup=False, state_path=state_path
+    )
+
+
+def test_fetch_reads_every_page(newsapi):
+    newsapi.publish(250)
+    articles = client_for(newsapi).fetch("Apple")
+
+    assert len(articles) == 250
+    assert [a["title"] for a in articles[:2]] == ["Apple story 0", "Apple story 1"]
+    assert [r["page"] for r in newsapi.requests] == ["1", "2", "3"]
+
+
+def test_polls_from_watermark_and_drops_seen_articles(newsapi, tmp_path):
+    newsapi.publish(150)
+    subject = subject_for(newsapi, tmp_path / "state.json", page_size=50)
+    subject.run()
+    assert len(subject.rows) == 150
+    watermark = subject.watermarks["AAPL"]
+
+    newsapi.publish(5, start=150)
+    newsapi.requests.clear()
+    subject.run()
+    assert newsapi.requests[0]["from"] == watermark
+    # The article at the watermark is returned again but not re-emitted.
+    assert [row["title"] for row in subject.rows[150:]] == [f"Apple story {i}" for i in range(150, 155)]
+
+    restarted = subject_for(newsapi, tmp_path / "state.json", page_size=50)
+    restarted.run()
+    assert restarted.watermarks == subject.watermarks
+    assert restarted.rows == []
+
+
+def test_rate_limited_poll_keeps_watermark(newsapi, tmp_path):
+    newsapi.publish(150)
+    newsapi.rate_limited_pages = {2}
+    subject = subject_for(newsapi, tmp_path / "state.json", page_size=100)
+    subject.run()
+
+    # Page 1 alone would move the watermark past the unread page 2.
+    assert subject.rows == []
+    assert "AAPL" not in subject.watermarks
+
+    subject.run()
+    assert len(subject.rows) == 150
+
+
+def test_daily_quota_is_persisted(newsapi, tmp_path):
+    newsapi.publish(250)
+    subject = subject_for(newsapi, tmp_path / "state.json", requests_per_day=2)
+    subject.run()
+    assert subject.rows == []
+    assert len(newsapi.requests) == 2
+
+    restarted = subject_for(newsapi, tmp_path / "state.json", requests_per_day=2)
+    assert restarted.client.rate_limiter.remaining_today() == 0
+    restarted.run()
+    assert len(newsapi.requests) == 2
+
+
+QUERIES = {"AAPL": "Apple", "ON": "ON Semiconductor", "IT": "Gartner", "A": "Agilent", "BRK.B": "Berkshire Hathaway"}
+
+
+def test_short_symbols_are_not_matched_as_words():
+    assert mentioned_tickers("It was ON the A list, says IT firm", QUERIES) == set()
+
+
+def test_symbols_match_as_cashtags_exchange_symbols_or_names():
+    assert mentioned_tickers("$ON and NYSE: IT rallied, $BRK.B was flat", QUERIES) == {"ON", "IT", "BRK.B"}
+    assert mentioned_tickers("Gartner upgraded Apple; AAPL rose", QUERIES) == {"IT", "AAPL"}
+
+
+def test_syndicated_copies_fan_out_to_mentioned_tickers(newsapi, tmp_path):
+    story = "Apple and Gartner announce a research partnership on enterprise devices and services"
+    for i, title in enumerate((story, story + " today")):
+        newsapi.articles.append({
+            "source": {"name": f"Wire {i}"}, "title": title, "description": "", "content": "",
+            "url": f"https://news.example/copy/{i}", "publishedAt": f"2026-10-17T00:00:0{i}Z",
+        })
+    subject = RecordingSubject(
+        {"AAPL": "Apple", "IT": "Gartner"}, client=client_for(newsapi), max_polls=1,
+        dedup_index=NearDuplicateIndex(threshold=0.5), state_path=tmp_path / "state.json",
+    )
+    subject.run()
+
+    # The first copy is mapped to both tickers; the copy adds nothing new.
+    assert sorted((row["ticker"], row["cluster_id"]) for row in subject.rows) == sorted(
+        [("AAPL", subject.rows[0]["cluster_id"]), ("IT", subject.rows[0]["cluster_id"])]
+    )
@@ -0,0 +1,37 @@
+from src.runner import BatchedSubject
+
+ROWS = [{"ticker": f"T{i}"} for i in range(7)]
+
+
+class RecordingSubject(BatchedSubject):
+    """Records rows, commits and offsets instead of sending them to Pathway."""
+
+    def __init__(self, rows, batch_size):
+        super().__init__(rows, batch_size)
+        self.events = []
+
+    def next(self, **row):
+        self.events.append(row["ticker"])
+
+    def commit(self):
+        self.events.append("commit")
+
+    def _report_offset(self, offset):
+        self.events.append(offset)
+
+
+def test_rows_are_committed_in_batches_with_their_offset():
+    subject = RecordingSubject(iter(ROWS), batch_size=3)
+    subject.run()
+    assert subject.events == [
+        "T0", "T1", "T2", b"3", "commit",
+        "T3", "T4", "T5", b"6", "commit",
+        "T6", b"7", "commit",
+    ]
+
+
+def test_restarted_subject_skips_committed_rows():
+    subject = RecordingSubject(iter(ROWS), batch_size=3)
+    subject._seek(b"6")
+    subject.run()
+    assert subject.events == ["T6", b"7", "commit"]
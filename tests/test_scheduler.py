@@ -0,0 +1,115 @@
+import threading
+import time
+
+from src.llm.scheduler import LLMScheduler
+
+
+def test_sharded_processes_split_the_budgets(monkeypatch):
+    monkeypatch.setenv("PATHWAY_PROCESSES", "4")
+    scheduler = LLMScheduler(requests_per_minute=600, tokens_per_minute=120000, max_concurrency=64)
+
+    assert scheduler.requests.rate * 60 == 150
+    assert scheduler.tokens.rate * 60 == 30000
+    assert scheduler.max_concurrency == 16
+
+
+def test_single_process_keeps_the_full_budgets(monkeypatch):
+    monkeypatch.delenv("PATHWAY_PROCESSES", raising=False)
+    scheduler = LLMScheduler(requests_per_minute=600, tokens_per_minute=120000, max_concurrency=64)
+
+    assert scheduler.requests.rate * 60 == 600
+    assert scheduler.max_concurrency == 64
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def unlimited(**kwargs):
+    kwargs.setdefault("processes", 1)
+    return LLMScheduler(requests_per_minute=0, tokens_per_minute=0, backoff=0, target_latency=0, **kwargs)
+
+
+def test_concurrency_grows_by_one_per_window_of_successes():
+    scheduler = unlimited(max_concurrency=64, initial_concurrency=4)
+    for _ in range(4):
+        with scheduler.request("Trader", "AAPL", 10):
+            pass
+    assert 4.9 < scheduler.limit < 5.0
+
+
+def test_rate_limit_halves_concurrency_once_per_round_trip():
+    scheduler = unlimited(max_concurrency=64, initial_concurrency=8)
+    tickets = [scheduler.acquire("Trader", "AAPL", 10) for _ in range(3)]
+    for ticket in tickets:  # all sent before the first 429: one cut
+        scheduler.release(ticket, RateLimitError("429 Too Many Requests"))
+    assert scheduler.limit == 4
+    assert (scheduler.rate_limited, scheduler.decreases) == (3, 1)
+
+    ticket = scheduler.acquire("Trader", "AAPL", 10)
+    scheduler.release(ticket, RateLimitError("rate limit"))
+    assert scheduler.limit == 2
+
+
+def test_slow_responses_halve_concurrency_with_a_target_latency():
+    scheduler = LLMScheduler(
+        requests_per_minute=0, tokens_per_minute=0, target_latency=0.01, initial_concurrency=8, processes=1
+    )
+    with scheduler.request("Trader", "AAPL", 10):
+        time.sleep(0.02)
+    assert scheduler.limit == 4
+
+
+def test_requests_per_minute_spaces_out_requests():
+    scheduler = LLMScheduler(requests_per_minute=600, tokens_per_minute=0, processes=1)  # 10/s, burst of 10
+    start = time.monotonic()
+    for _ in range(11):
+        with scheduler.request("Trader", "AAPL", 10):
+            pass
+    assert 0.08 < time.monotonic() - start < 1.0
+
+
+def test_tokens_per_minute_waits_and_actual_usage_corrects_the_budget():
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=60000, processes=1)  # 1000/s
+    with scheduler.request("Trader", "AAPL", 1000) as ticket:
+        ticket.tokens = 0  # nothing was used: the reservation is given back
+    start = time.monotonic()
+    with scheduler.request("Trader", "AAPL", 1000):
+        pass
+    assert time.monotonic() - start < 0.05
+
+    start = time.monotonic()
+    with scheduler.request("Trader", "AAPL", 500):
+        pass
+    assert 0.4 < time.monotonic() - start < 1.5
+
+
+def test_queued_requests_go_by_priority_then_round_robin_per_ticker():
+    scheduler = unlimited(max_concurrency=1, initial_concurrency=1, held_tickers=["TSLA"])
+    order = []
+
+    def call(agent, ticker):
+        with scheduler.request(agent, ticker, 10):
+            order.append((agent, ticker))
+
+    blocker = scheduler.acquire("Trader", "AAPL", 10)
+    queued = [
+        ("Bull Analyst", "AAPL"), ("Trader", "AAPL"), ("Trader", "AAPL"),
+        ("Trader", "MSFT"), ("Market Analyst", "TSLA"), ("Portfolio Manager", "MSFT"),
+    ]
+    threads = []
+    for agent, ticker in queued:
+        threads.append(threading.Thread(target=call, args=(agent, ticker)))
+        threads[-1].start()
+        while scheduler.stats()["queued"] < len(threads):
+            time.sleep(0.001)
+    scheduler.release(blocker)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == [
+        ("Market Analyst", "TSLA"),  # held position first, whatever the stage
+        ("Portfolio Manager", "MSFT"),
+        ("Trader", "AAPL"), ("Trader", "MSFT"), ("Trader", "AAPL"),
+        ("Bull Analyst", "AAPL"),
+    ]
@@ -0,0 +1,52 @@
+from src.agents.portfolio_manager import parse_decision
+from src.agents.trader import parse_final_proposal
+from src.llm.streaming import DIRECTIVE_MARKER, PROPOSAL_MARKER, DecisionFeed, stream_decision
+
+
+class Chunk:
+    def __init__(self, content):
+        self.content = content
+
+
+class CharStreamLLM:
+    """Streams a fixed answer one character at a time, like a token-level provider stream."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.streamed = 0
+
+    def stream(self, prompt, **kwargs):
+        for char in self.answer:
+            self.streamed += 1
+            yield Chunk(char)
+
+
+TRADER_ANSWER = "Trim into strength.\nFINAL TRANSACTION PROPOSAL: **SELL**\nRationale: the plan calls for it. "
+MANAGER_ANSWER = "**DECISION: BUY**\n\n**Justification:** Growth outweighs the valuation risk."
+
+
+def test_stopped_stream_keeps_a_parseable_proposal():
+    for stop_after in (0, 1, 5, -1):
+        llm = CharStreamLLM(TRADER_ANSWER)
+        feed = DecisionFeed()
+        text = stream_decision(llm, "prompt", "Trader", "AAPL", PROPOSAL_MARKER, stop_after, feed=feed)
+
+        assert parse_final_proposal(text) == "SELL"
+        assert feed.latest("Trader", "AAPL") == "SELL"
+        if stop_after >= 0:
+            assert llm.streamed < len(TRADER_ANSWER)
+
+
+def test_stopped_stream_keeps_a_parseable_directive():
+    for stop_after in (0, 1):
+        text = stream_decision(
+            CharStreamLLM(MANAGER_ANSWER), "prompt", "Portfolio Manager", "AAPL", DIRECTIVE_MARKER, stop_after,
+            feed=DecisionFeed(),
+        )
+        assert parse_decision(text) == "BUY"
+
+
+def test_parse_final_proposal():
+    assert parse_final_proposal("FINAL TRANSACTION PROPOSAL: **HOLD**") == "HOLD"
+    assert parse_final_proposal("FINAL TRANSACTION PROPOSAL: **BUY") == "BUY"
+    assert parse_final_proposal("I would BUY here.") == "UNKNOWN"
@@ -0,0 +1,58 @@
+from src.memory.vector_memory import VectorMemory
+
+SITUATIONS = [
+    ("Revenue beat estimates and guidance was raised", "Lean bullish on strong guidance."),
+    ("Margins compressed on rising input costs", "Watch cost pass-through before adding."),
+    ("Regulator opened an antitrust probe", "Size positions for headline risk."),
+]
+
+
+def test_save_load_round_trip(tmp_path):
+    memory = VectorMemory(dim=64)
+    memory.add_situations(SITUATIONS)
+    memory.save(tmp_path / "bull")
+
+    loaded = VectorMemory.load(tmp_path / "bull")
+    assert len(loaded) == 3
+    assert loaded.get_memories("antitrust probe opened", 1)[0]["recommendation"] == SITUATIONS[2][1]
+    assert loaded.get_memories("guidance raised") == memory.get_memories("guidance raised")
+
+
+def test_save_over_loaded_files_keeps_memories(tmp_path):
+    memory = VectorMemory(dim=64)
+    memory.add_situations(SITUATIONS)
+    memory.save(tmp_path / "bull")
+
+    # Load at startup, learn more, save back on shutdown.
+    loaded = VectorMemory.load(tmp_path / "bull")
+    loaded.save(tmp_path / "bull")
+    loaded.add_situations([("Short interest spiked ahead of earnings", "Expect volatility.")])
+    loaded.save(tmp_path / "bull")
+
+    reloaded = VectorMemory.load(tmp_path / "bull")
+    assert len(reloaded) == 4
+    assert reloaded.get_memories("short interest spiked", 1)[0]["recommendation"] == "Expect volatility."
+    assert reloaded.get_memories("margins compressed", 1)[0]["recommendation"] == SITUATIONS[1][1]
+
+
+def test_save_right_after_load_without_inserts(tmp_path):
+    memory = VectorMemory(dim=64)
+    memory.add_situations(SITUATIONS)
+    memory.save(tmp_path / "bear")
+
+    loaded = VectorMemory.load(tmp_path / "bear")
+    loaded.save(tmp_path / "bear")
+    assert len(VectorMemory.load(tmp_path / "bear")) == 3
+    assert loaded.get_memories("regulator probe", 1)[0]["matched_situation"] == SITUATIONS[2][0]
+
+
+def test_version_tracks_contents(tmp_path):
+    memory = VectorMemory(dim=64)
+    empty = memory.version
+    memory.add_situations(SITUATIONS[:2])
+    two = memory.version
+    memory.add_situations(SITUATIONS[2:])
+    assert len({empty, two, memory.version}) == 3
+
+    memory.save(tmp_path / "bull")
+    assert VectorMemory.load(tmp_path / "bull").version == memory.version